@@ -0,0 +1,35 @@
+"""
+Admin endpoints.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.api.deps import AdminUserDep
+from app.services.startup import reindex_state, start_reindex
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/reindex", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_reindex(
+    request: Request, current_user: AdminUserDep, force: bool = False
+) -> Dict[str, Any]:
+    """
+    Rebuild the KB and guide collections in the background. Changed
+    collections are built as a new version and swapped in atomically; `force`
+    rebuilds them even when nothing changed.
+    """
+    try:
+        start_reindex(request.app, force=force)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    print(f"Reindex requested by {current_user.username} (force={force})")
+    return {"status": "started", "force": force}
+
+
+@router.get("/reindex", status_code=status.HTTP_200_OK)
+async def reindex_status(current_user: AdminUserDep) -> Dict[str, Any]:
+    """Progress of the last reindex."""
+    return reindex_state.snapshot()
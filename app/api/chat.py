@@ -1,10 +1,31 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.llm.admission import LLMUnavailable
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.services.chat_service import process_chat
+from app.services.chat_stream import stream_chat
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.post("", response_model=ChatResponse)
 async def chat(req: ChatRequest, request: Request):
     categories = request.app.state.all_categories
-    return await process_chat(req, categories)
\ No newline at end of file
+    try:
+        return await process_chat(req, categories)
+    except LLMUnavailable as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+@router.post("/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """Same flow as /chat, sent as server-sent events (status, token, final)."""
+    categories = request.app.state.all_categories
+    return StreamingResponse(
+        stream_chat(req, categories),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -59,6 +59,19 @@ async def get_current_user(
 
 AuthUserDep = Annotated[User, Depends(get_current_user)]
 
+
+async def get_admin_user(current_user: AuthUserDep) -> User:
+    """Authenticated user listed in ADMIN_USERNAMES."""
+    if current_user.username not in settings.admin_usernames:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+
+AdminUserDep = Annotated[User, Depends(get_admin_user)]
+
 api_key_header = APIKeyHeader(name="X-API-Token", auto_error=False)
 
 
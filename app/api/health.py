@@ -3,9 +3,12 @@ Health check endpoints.
 """
 
 from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Dict
 
+from app.services.startup import startup_state
+
 router = APIRouter()
 
 
@@ -20,3 +23,14 @@ class HealthStatusOutput(BaseModel):
 async def health_check() -> Dict:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/ready", status_code=status.HTTP_200_OK)
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: 200 once categories and collections are loaded, else 503."""
+    snapshot = startup_state.snapshot()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if startup_state.ready
+        else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=snapshot,
+    )
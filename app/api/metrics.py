@@ -0,0 +1,40 @@
+"""
+Runtime metrics endpoints.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, status
+
+from app.db.vector_registry import get_vector_registry
+from app.llm.resilience import ResilientProvider
+from app.services import chat_service
+from app.services.chat_stream import stream_stats
+from app.services.keyword_index import keyword_index
+from app.services.prompt_budget import prompt_budget
+
+router = APIRouter()
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def metrics() -> Dict[str, Any]:
+    """Expose in-process counters for the retrieval and LLM layers."""
+    registry = get_vector_registry()
+    return {
+        "vector_registry": registry.stats(),
+        "query_embedding_cache": registry.query_cache.stats(),
+        "keyword_fast_path": keyword_index.stats(),
+        "chat_stream": stream_stats.stats(),
+        "completion_cache": (
+            chat_service.completion_cache.stats()
+            if chat_service.completion_cache else {"enabled": False}
+        ),
+        "answer_cache": chat_service.answer_cache.stats(),
+        "prompt_budget": prompt_budget.stats(),
+        "llm_admission": chat_service.admission.stats(),
+        "llm_resilience": (
+            chat_service.llm_client.stats()
+            if isinstance(chat_service.llm_client, ResilientProvider)
+            else {"enabled": False}
+        ),
+    }
@@ -39,6 +39,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Comma-separated usernames allowed to call /admin endpoints
+    ADMIN_USERNAMES: str = os.getenv("ADMIN_USERNAMES", "")
+
+    @property
+    def admin_usernames(self) -> List[str]:
+        return [name.strip() for name in self.ADMIN_USERNAMES.split(",") if name.strip()]
+
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
 
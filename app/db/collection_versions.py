@@ -0,0 +1,81 @@
+"""
+Versioned collections behind aliases.
+
+Searches always go through the alias (e.g. `kb_collection`). A rebuild writes a
+new physical collection `kb_collection_v<N>`, validates it and then repoints the
+alias in one atomic operation, so readers never see a half-built index. Versions
+beyond `keep_versions` are dropped afterwards.
+
+Deployments that predate versioning have a plain collection named like the
+alias; it keeps serving until the first rebuild replaces it.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from app.db.schema import SchemaManager
+from app.db.vector_backends import VectorBackend
+
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+
+class CollectionVersions:
+    def __init__(self, backend: VectorBackend, alias: str, schema: Optional[SchemaManager] = None):
+        self.backend = backend
+        self.alias = alias
+        # Deleted collections are forgotten here, so a later rebuild reusing
+        # the name creates it again instead of trusting the cached schema
+        self.schema = schema
+        self._pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+
+    def versions(self) -> List[Tuple[int, str]]:
+        """Physical versions of this alias, oldest first."""
+        found = []
+        for name in self.backend.list_collections():
+            match = self._pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), name))
+        return sorted(found)
+
+    def live(self) -> Optional[str]:
+        """Collection the alias points at, or None."""
+        return self.backend.get_alias(self.alias)
+
+    def is_legacy(self) -> bool:
+        """True when a plain, unversioned collection holds the alias name."""
+        return self.live() is None and self.alias in self.backend.list_collections()
+
+    def next_name(self) -> str:
+        versions = self.versions()
+        return version_name(self.alias, versions[-1][0] + 1 if versions else 1)
+
+    def promote(self, collection_name: str) -> None:
+        """Atomically point the alias at `collection_name`."""
+        if self.is_legacy():
+            # An alias cannot shadow a collection; this one-time migration has a
+            # short window in which the name does not resolve
+            print(f"Replacing unversioned collection {self.alias} with {collection_name}")
+            self._delete(self.alias)
+        self.backend.set_alias(self.alias, collection_name)
+        print(f"Alias {self.alias} -> {collection_name}")
+
+    def _delete(self, collection_name: str) -> None:
+        self.backend.delete_collection(collection_name)
+        if self.schema is not None:
+            self.schema.forget(collection_name)
+
+    def drop(self, collection_name: str) -> None:
+        if collection_name in self.backend.list_collections():
+            self._delete(collection_name)
+
+    def collect_garbage(self, keep: int = 2) -> List[str]:
+        """Delete all but the newest `keep` versions; the live one is never deleted."""
+        live = self.live()
+        versions = [name for _, name in self.versions()]
+        stale = [name for name in versions[: max(len(versions) - keep, 0)] if name != live]
+        for name in stale:
+            self._delete(name)
+            print(f"Deleted old collection version {name}")
+        return stale
@@ -0,0 +1,155 @@
+"""
+Vector compression options from the `compression` section of embedding.yaml.
+
+Two independent knobs:
+    quantization  "int8" stores scalar-quantized vectors for search and, with
+                  `rescore`, re-ranks `oversampling * limit` candidates with the
+                  full-precision originals (kept on disk in Qdrant if `on_disk`).
+    reduction     "truncate" keeps the first `reduced_dim` components of every
+                  embedding; "pca" projects onto the top `reduced_dim` principal
+                  components fitted on the collection's documents.
+
+Reduction changes the collection's vector size, so switching it on an existing
+collection fails the startup schema check until the collection is re-created.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8")
+REDUCTION_MODES = ("none", "truncate", "pca")
+
+
+@dataclass(frozen=True)
+class CompressionConfig:
+    quantization: str = "none"
+    rescore: bool = True
+    oversampling: float = 2.0
+    always_ram: bool = True
+    on_disk: bool = False
+    reduction: str = "none"
+    reduced_dim: Optional[int] = None
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"compression.quantization must be one of {QUANTIZATION_MODES}, "
+                f"not '{self.quantization}'."
+            )
+        if self.reduction not in REDUCTION_MODES:
+            raise ValueError(
+                f"compression.reduction must be one of {REDUCTION_MODES}, not '{self.reduction}'."
+            )
+        if self.reduction != "none" and not self.reduced_dim:
+            raise ValueError("compression.reduced_dim must be set when reduction is enabled.")
+        if self.oversampling < 1.0:
+            raise ValueError("compression.oversampling must be at least 1.0.")
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "CompressionConfig":
+        config = config or {}
+        return cls(
+            quantization=str(config.get("quantization", "none")).lower(),
+            rescore=bool(config.get("rescore", True)),
+            oversampling=float(config.get("oversampling", 2.0)),
+            always_ram=bool(config.get("always_ram", True)),
+            on_disk=bool(config.get("on_disk", False)),
+            reduction=str(config.get("reduction", "none")).lower(),
+            reduced_dim=config.get("reduced_dim"),
+        )
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization != "none"
+
+    def stored_dim(self, embedding_dim: int) -> int:
+        """Vector size of the collection for a model producing `embedding_dim` vectors."""
+        if self.reduction == "none":
+            return embedding_dim
+        if self.reduced_dim > embedding_dim:
+            raise ValueError(
+                f"compression.reduced_dim ({self.reduced_dim}) exceeds the "
+                f"embedding dimension ({embedding_dim})."
+            )
+        return self.reduced_dim
+
+
+class DimensionReducer:
+    """
+    Maps model embeddings to the collection's reduced space. PCA components are
+    saved to `path` so queries use the same basis after a restart.
+    """
+
+    def __init__(
+        self, method: str, embedding_dim: int, target_dim: int, path: Optional[Path] = None
+    ):
+        if method not in ("truncate", "pca"):
+            raise ValueError(f"Unknown reduction method '{method}'.")
+        self.method = method
+        self.embedding_dim = embedding_dim
+        self.target_dim = target_dim
+        self.path = Path(path) if path is not None else None
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._fingerprint = ""
+        if method == "pca" and self.path is not None and self.path.exists():
+            self._load()
+
+    @property
+    def fitted(self) -> bool:
+        return self.method == "truncate" or self._components is not None
+
+    @property
+    def signature(self) -> str:
+        """Identifies the projection, so documents are re-uploaded when it changes."""
+        return f"{self.method}{self.target_dim}{self._fingerprint}"
+
+    def _set(self, mean: np.ndarray, components: np.ndarray) -> None:
+        self._mean = mean.astype(np.float32)
+        self._components = np.ascontiguousarray(components.astype(np.float32))
+        digest = hashlib.sha256(self._components.tobytes()).hexdigest()
+        self._fingerprint = f":{digest[:12]}"
+
+    def _load(self) -> None:
+        with np.load(self.path) as data:
+            mean, components = data["mean"], data["components"]
+        if components.shape != (self.target_dim, self.embedding_dim):
+            print(f"Ignoring PCA basis at {self.path}: shape {components.shape} does not match")
+            return
+        self._set(mean, components)
+
+    def fit(self, vectors: Any) -> None:
+        """Fit the PCA basis on document embeddings (no-op for truncation)."""
+        if self.method != "pca":
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[0] < self.target_dim:
+            raise ValueError(
+                f"PCA to {self.target_dim} dims needs at least {self.target_dim} documents, "
+                f"got {matrix.shape[0]}. Use reduction: truncate or a smaller reduced_dim."
+            )
+        mean = matrix.mean(axis=0)
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        self._set(mean, vt[: self.target_dim])
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(self.path, mean=self._mean, components=self._components)
+
+    def transform(self, vectors: Any) -> np.ndarray:
+        """Reduce one vector or a batch of row vectors."""
+        array = np.asarray(vectors, dtype=np.float32)
+        if self.method == "truncate":
+            return np.ascontiguousarray(array[..., : self.target_dim])
+        if self._components is None:
+            raise RuntimeError("PCA reducer is not fitted; index the collection first.")
+        return (array - self._mean) @ self._components.T
+
+
+def reducer_path(root: Path, model_name: str, collection_name: str, target_dim: int) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+    return Path(root) / slug / f"{collection_name}-pca{target_dim}.npz"
@@ -0,0 +1,171 @@
+"""
+Micro-batching of query embeddings.
+
+Concurrent retrievals each need one query vector. Instead of every request
+calling `model.encode` on a single string, callers enqueue their text and a
+worker thread drains the queue: it waits at most `max_wait_ms` after the first
+item (or until `max_batch_size` items arrived), runs one batched forward pass
+and resolves each caller's future. torch releases the GIL during the forward
+pass, so one thread next to the event loop is enough.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class EmbeddingBatcher:
+    """Single worker thread that encodes queued texts in batches."""
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "embedding-batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._name = name
+        self._queue: "queue.Queue[Optional[Tuple[str, Future, float]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._failures = 0
+        self._encode_seconds = 0.0
+        self._histogram = {bucket: 0 for bucket in BATCH_BUCKETS}
+        self._histogram_overflow = 0
+        self._waits_ms: Deque[float] = deque(maxlen=2048)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue `text` for encoding; the future resolves to its vector."""
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed.")
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def aencode(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the worker after it finishes the texts already queued."""
+        with self._start_lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _collect(self, first: Tuple[str, Future, float]) -> Tuple[List, bool]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining) if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            # Drop callers that gave up (e.g. a cancelled request) before encoding
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if batch:
+                self._encode(batch)
+
+    def _encode(self, batch: List[Tuple[str, Future, float]]) -> None:
+        start = time.perf_counter()
+        waits = [(start - enqueued) * 1000 for _, _, enqueued in batch]
+        try:
+            vectors = self.model.encode(
+                [text for text, _, _ in batch], batch_size=len(batch), show_progress_bar=False
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            with self._stats_lock:
+                self._failures += 1
+            return
+        elapsed = time.perf_counter() - start
+        for (_, future, _), vector in zip(batch, vectors):
+            future.set_result(vector)
+        self._record(len(batch), waits, elapsed)
+
+    def _record(self, size: int, waits: List[float], seconds: float) -> None:
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._encode_seconds += seconds
+            self._waits_ms.extend(waits)
+            for bucket in BATCH_BUCKETS:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._histogram_overflow += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            waits = list(self._waits_ms)
+            histogram = {f"le_{bucket}": count for bucket, count in self._histogram.items()}
+            histogram[f"gt_{BATCH_BUCKETS[-1]}"] = self._histogram_overflow
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "failures": self._failures,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": histogram,
+                "queue_wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": round(float(np.percentile(waits, 50)), 3) if waits else 0.0,
+                    "p99": round(float(np.percentile(waits, 99)), 3) if waits else 0.0,
+                },
+                "avg_encode_ms": round(1000 * self._encode_seconds / self._batches, 3)
+                if self._batches else 0.0,
+            }
@@ -0,0 +1,174 @@
+"""
+Persistent, memory-mapped embedding cache shared across restarts and workers.
+
+Layout under `<root>/<model slug>/`:
+    vectors.bin  raw row-major matrix (float16 or float32), read through np.memmap
+    index.json   {"dim": ..., "dtype": ..., "rows": {text_hash: row}}
+    .lock        flock target serialising writers across processes
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Hash -> vector store backed by an append-only memory-mapped matrix."""
+
+    def __init__(self, root: Path, model_name: str, dim: int, dtype: str = "float16"):
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory = Path(root) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._matrix_path = self.directory / "vectors.bin"
+        self._index_path = self.directory / "index.json"
+        self._lock_path = self.directory / ".lock"
+        self._matrix_path.touch(exist_ok=True)
+
+        self._thread_lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._index_mtime: Optional[tuple] = None
+        self._matrix: Optional[np.memmap] = None
+        self._hits = 0
+        self._misses = 0
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        with self._thread_lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _row_count(self) -> int:
+        return self._matrix_path.stat().st_size // (self.dim * self.dtype.itemsize)
+
+    def _refresh(self) -> None:
+        """Reload the index and remap the matrix if another writer changed them."""
+        try:
+            stat = self._index_path.stat()
+            mtime = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            self._rows, self._index_mtime, self._matrix = {}, None, None
+            return
+        if mtime == self._index_mtime and self._matrix is not None:
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("dim") != self.dim or index.get("dtype") != self.dtype.name:
+            raise RuntimeError(
+                f"Embedding store at {self.directory} was built with dim={index.get('dim')} "
+                f"dtype={index.get('dtype')}, expected dim={self.dim} dtype={self.dtype.name}."
+            )
+        self._rows = index["rows"]
+        self._index_mtime = mtime
+        rows = self._row_count()
+        self._matrix = (
+            np.memmap(self._matrix_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            if rows else None
+        )
+
+    def _write_index(self, rows: Dict[str, int]) -> None:
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "rows": rows}, f)
+        os.replace(tmp_path, self._index_path)
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return float32 vectors for the hashes already stored."""
+        with self._file_lock(exclusive=False):
+            self._refresh()
+            found = {
+                h: np.asarray(self._matrix[self._rows[h]], dtype=np.float32)
+                for h in hashes
+                if h in self._rows and self._matrix is not None
+            }
+            self._hits += len(found)
+            self._misses += len(hashes) - len(found)
+        return found
+
+    def missing(self, texts: Sequence[str]) -> List[str]:
+        """Unique texts whose embedding is not stored yet (does not count as lookups)."""
+        with self._file_lock(exclusive=False):
+            self._refresh()
+            rows = self._rows
+        return [t for t in dict.fromkeys(texts) if text_hash(t) not in rows]
+
+    def put_many(self, vectors: Dict[str, Any]) -> int:
+        """Append vectors for hashes not stored yet; returns the number written."""
+        with self._file_lock(exclusive=True):
+            self._refresh()
+            rows = dict(self._rows)
+            new = [(h, v) for h, v in vectors.items() if h not in rows]
+            if not new:
+                return 0
+            next_row = self._row_count()
+            block = np.asarray([v for _, v in new], dtype=self.dtype).reshape(-1, self.dim)
+            with open(self._matrix_path, "ab") as f:
+                f.write(block.tobytes())
+            for offset, (h, _) in enumerate(new):
+                rows[h] = next_row + offset
+            self._write_index(rows)
+            self._index_mtime = None
+            return len(new)
+
+    def compact(self, live_hashes: Iterable[str]) -> int:
+        """Drop rows whose hash is not in `live_hashes`; returns rows removed."""
+        live = set(live_hashes)
+        with self._file_lock(exclusive=True):
+            self._refresh()
+            keep = [(h, row) for h, row in self._rows.items() if h in live]
+            removed = len(self._rows) - len(keep)
+            if not removed:
+                return 0
+            tmp_path = self._matrix_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for _, row in keep:
+                    f.write(np.asarray(self._matrix[row], dtype=self.dtype).tobytes())
+            self._matrix = None
+            os.replace(tmp_path, self._matrix_path)
+            self._write_index({h: i for i, (h, _) in enumerate(keep)})
+            self._index_mtime = None
+            return removed
+
+    def encode_many(
+        self, texts: List[str], encode: Any, batch_size: int = 64
+    ) -> np.ndarray:
+        """Return embeddings for `texts`, encoding and storing only the unknown ones."""
+        hashes = [text_hash(t) for t in texts]
+        cached = self.get_many(hashes)
+        missing = list(dict.fromkeys(h for h in hashes if h not in cached))
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            encoded = encode([text_by_hash[h] for h in missing], batch_size=batch_size)
+            fresh = {h: np.asarray(v, dtype=np.float32) for h, v in zip(missing, encoded)}
+            self.put_many(fresh)
+            cached.update(fresh)
+        return np.stack([cached[h] for h in hashes])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._file_lock(exclusive=False):
+            self._refresh()
+            rows = len(self._rows)
+            stored = self._row_count()
+        return {
+            "model": self.model_name,
+            "rows": rows,
+            "stale_rows": stored - rows,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
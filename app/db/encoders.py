@@ -0,0 +1,57 @@
+"""
+Encoder loading for the embedding model, selected with `encoder` in embedding.yaml.
+
+    torch       the stock SentenceTransformer in float32 (default)
+    torch_int8  the same model with its Linear layers dynamically quantized to
+                int8; no extra dependencies
+
+An ONNX Runtime backend needs `SentenceTransformer(..., backend="onnx")`, which
+only exists from sentence-transformers 3.2; requirements.txt pins 2.7.0, so it
+is not offered.
+
+Every variant still exposes `encode`, so QdrantWrapper and the embedding store
+do not care which one is loaded. Non-default variants produce slightly
+different vectors, so they get their own embedding store key (see `variant_name`).
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+ENCODER_BACKENDS = ("torch", "torch_int8")
+
+
+def variant_name(model_name: str, encoder_config: Optional[Dict[str, Any]] = None) -> str:
+    """Key under which vectors from this model + encoder backend are cached."""
+    config = encoder_config or {}
+    backend = config.get("backend", "torch")
+    if backend == "torch":
+        return model_name
+    return f"{model_name}@{backend}"
+
+
+def load_encoder(
+    model_name: str,
+    encoder_config: Optional[Dict[str, Any]] = None,
+    loader: Optional[Callable[..., Any]] = None,
+) -> Any:
+    """Load `model_name` with the backend configured under `encoder`."""
+    config = encoder_config or {}
+    backend = config.get("backend", "torch")
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(
+            f"encoder.backend must be one of {ENCODER_BACKENDS}, not '{backend}'."
+        )
+    if loader is None:
+        from sentence_transformers import SentenceTransformer
+
+        loader = SentenceTransformer
+
+    import torch
+
+    if config.get("num_threads"):
+        torch.set_num_threads(int(config["num_threads"]))
+    model = loader(model_name)
+    if backend == "torch_int8":
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
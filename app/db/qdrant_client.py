@@ -1,16 +1,50 @@
-from qdrant_client import QdrantClient 
-from qdrant_client.models import Distance, VectorParams, Filter, models, PayloadSchemaType
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import Counter
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Set, Tuple
+from app.db.compression import DimensionReducer
+from app.db.embedding_batcher import EmbeddingBatcher
+from app.db.embedding_store import EmbeddingStore
+from app.db.schema import SchemaManager
+from app.db.vector_backends import QdrantBackend, VectorBackend
+from app.utils.embedding_cache import QueryEmbeddingCache
 
 import dotenv
 dotenv.load_dotenv()
+import asyncio
+import hashlib
+import json
 import os
+import resource
+import sys
+import time
+import uuid
 
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
 
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def document_text(doc: Dict, text_fields: List[str]) -> str:
+    """Combine text fields to create the string that gets embedded."""
+    return " ".join(str(doc[f]) for f in text_fields if f in doc)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
 class QdrantWrapper:
     
     def __init__(
@@ -20,6 +54,16 @@ class QdrantWrapper:
         embedding_dim: int,
         distance: str = "Cosine",
         url: str = QDRANT_URL,
+        model: Optional[Any] = None,
+        client: Optional[QdrantClient] = None,
+        backend: Optional[VectorBackend] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        embedding_store: Optional[EmbeddingStore] = None,
+        schema: Optional[SchemaManager] = None,
+        payload_indexes: Iterable[str] = ("category", "issue_code"),
+        reducer: Optional[DimensionReducer] = None,
+        batcher: Optional[EmbeddingBatcher] = None,
+        id_namespace: Optional[str] = None,
     ):
         if collection_name is None:
             raise ValueError("Collection name must be provided.")
@@ -29,80 +73,274 @@ class QdrantWrapper:
             raise ValueError("Embedding dimension must be provided.")
             
         self.collection_name = collection_name
-        self.client = QdrantClient(url=url, api_key=QDRANT_API_KEY)
+        # Point IDs are derived from the logical name, so every physical version
+        # of a collection (see app/db/collection_versions.py) uses the same IDs
+        self.id_namespace = id_namespace or collection_name
+        self.backend = backend or QdrantBackend(
+            client or QdrantClient(url=url, api_key=QDRANT_API_KEY)
+        )
         self.embedding_dim = embedding_dim
         self.distance = distance.upper()
-        
-        self.model = SentenceTransformer(embedding_model) 
-
-        # Create collection if not exists
-        if self.collection_name not in [c.name for c in self.client.get_collections().collections]:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim,
-                    distance=Distance[self.distance]
-                )
-            )
+        # Optional truncation / PCA applied to every stored and query vector
+        self.reducer = reducer
+        self.vector_dim = reducer.target_dim if reducer is not None else embedding_dim
+
+        # Reuse a shared model when one is given (see app/db/vector_registry.py)
+        self.embedding_model = embedding_model
+        self.model = model or SentenceTransformer(embedding_model)
+        self.query_cache = query_cache
+        self.embedding_store = embedding_store
+        # Single-query encodes go through the shared micro-batcher when configured
+        self.batcher = batcher
+
+        # Collections and payload indexes are reconciled once and then cached
+        self.schema = schema or SchemaManager()
+        self.schema.ensure_collection(
+            self.backend,
+            self.collection_name,
+            self.vector_dim,
+            self.distance,
+            payload_indexes,
+            self.backend.compression.quantization,
+        )
 
-    # NEW helper
     def ensure_index(self, field_name: str):
-        try:
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name=field_name,
-                field_schema=PayloadSchemaType.KEYWORD
-            )
-        except Exception as e:
-            if "already exists" not in str(e):
-                raise
+        self.schema.ensure_index(self.backend, self.collection_name, field_name)
+
+    def content_hash(self, doc: Dict, text_fields: List[str], payload_fields: List[str]) -> str:
+        fields = {k: doc.get(k) for k in sorted(set(text_fields) | set(payload_fields))}
+        if self.reducer is not None:
+            # A new projection invalidates every stored vector
+            fields["_reduction"] = self.reducer.signature
+        return hashlib.sha256(
+            json.dumps(fields, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _keyed_documents(
+        self, documents: Iterable[Dict], text_fields: List[str], payload_fields: List[str]
+    ) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        Yield (point_id, content_hash, doc). The ID is derived from issue_code so
+        it survives reordering and edits. Rows sharing an issue_code are keyed by
+        (issue_code, content hash) and rows without one by their content hash, so
+        no ID depends on row order. Exact duplicate rows are yielded once.
+        """
+        documents = list(documents)
+        codes = Counter(doc.get("issue_code") for doc in documents if doc.get("issue_code"))
+        seen: Set[str] = set()
+        for doc in documents:
+            digest = self.content_hash(doc, text_fields, payload_fields)
+            code = doc.get("issue_code")
+            if not code:
+                key = digest
+            elif codes[code] > 1:
+                key = f"{code}/{digest}"
+            else:
+                key = code
+            point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.id_namespace}/{key}"))
+            if point_id in seen:
+                continue
+            seen.add(point_id)
+            yield point_id, digest, doc
 
     def upsert_documents(
         self,
-        documents: List[Dict],
+        documents: Iterable[Dict],
         text_fields: List[str],
-        payload_fields: List[str]
-    ):
-        points = []
-        i = 0
-        for doc in documents:
-            # Combine text fields to create embedding
-            text_to_embed = " ".join(str(doc[f]) for f in text_fields if f in doc)
-            vector = self.model.encode(text_to_embed).tolist()
-
-            # Prepare payload from metadata fields
-            payload = {k: doc[k] for k in payload_fields if k in doc}
-
-            points.append({
-                "id": i,
-                "vector": vector,
-                "payload": payload
-            })
-            i += 1
-
-        for field in payload_fields:
-            self.ensure_index(field)
-
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
+        payload_fields: List[str],
+        encode_batch_size: int = 64,
+        upload_chunk_size: int = 256,
+        upload_parallelism: int = 4,
+    ) -> Dict[str, float]:
+        """
+        Stream documents through batched encoding and upload them in fixed-size
+        chunks, keeping at most `upload_parallelism` uploads in flight so only a
+        bounded number of chunks is held in memory at once.
+        """
+        if self.reducer is not None and not self.reducer.fitted:
+            documents = list(documents)
+            self.fit_reducer(documents, text_fields, encode_batch_size)
+        return self._upload(
+            self._keyed_documents(documents, text_fields, payload_fields),
+            text_fields,
+            payload_fields,
+            encode_batch_size=encode_batch_size,
+            upload_chunk_size=upload_chunk_size,
+            upload_parallelism=upload_parallelism,
         )
-    
-    def query(self, query: str, metadata_key: str, metadata_value: str, max_results: int):
-        self.ensure_index(metadata_key)
-
-        query_vector = self.model.encode(query)
-        hits = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            limit=max_results,
-            query_filter=Filter(
-                must=[
-                    models.FieldCondition(
-                        key=metadata_key,
-                        match=models.MatchValue(value=metadata_value)
+
+    def _upload(
+        self,
+        keyed_documents: Iterable[Tuple[str, str, Dict]],
+        text_fields: List[str],
+        payload_fields: List[str],
+        encode_batch_size: int = 64,
+        upload_chunk_size: int = 256,
+        upload_parallelism: int = 4,
+    ) -> Dict[str, float]:
+        start = time.perf_counter()
+        total = 0
+        in_flight: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=upload_parallelism) as pool:
+            for chunk in _chunks(keyed_documents, upload_chunk_size):
+                texts = [document_text(doc, text_fields) for _, _, doc in chunk]
+                vectors = self.reduce(self.encode_documents(texts, batch_size=encode_batch_size))
+                points = [
+                    PointStruct(
+                        id=point_id,
+                        vector=vector.tolist(),
+                        # Prepare payload from metadata fields
+                        payload={
+                            **{k: doc[k] for k in payload_fields if k in doc},
+                            "content_hash": digest,
+                        },
                     )
+                    for (point_id, digest, doc), vector in zip(chunk, vectors)
                 ]
+
+                if len(in_flight) >= upload_parallelism:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(self.backend.upsert, self.collection_name, points))
+                total += len(points)
+
+            for future in in_flight:
+                future.result()
+
+        elapsed = time.perf_counter() - start
+        report = {
+            "documents": total,
+            "seconds": round(elapsed, 3),
+            "docs_per_second": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        print(
+            f"{self.collection_name}: {total} docs in {report['seconds']}s "
+            f"({report['docs_per_second']} docs/s, peak RSS {report['peak_rss_mb']} MB)"
+        )
+        return report
+
+    def encode_documents(self, texts: List[str], batch_size: int = 64):
+        """Batch-encode texts, reusing vectors from the on-disk store when configured."""
+        encode = lambda batch, batch_size: self.model.encode(
+            batch, batch_size=batch_size, show_progress_bar=False
+        )
+        if self.embedding_store is None:
+            return encode(texts, batch_size)
+        return self.embedding_store.encode_many(texts, encode, batch_size=batch_size)
+
+    def reduce(self, vectors: Any) -> Any:
+        """Map model embeddings into the collection's vector space."""
+        return vectors if self.reducer is None else self.reducer.transform(vectors)
+
+    def fit_reducer(
+        self, documents: List[Dict], text_fields: List[str], batch_size: int = 64
+    ) -> None:
+        """Fit the PCA basis on the embeddings of every source document."""
+        texts = [document_text(doc, text_fields) for doc in documents]
+        print(f"{self.collection_name}: fitting {self.reducer.method} basis on {len(texts)} docs")
+        self.reducer.fit(self.encode_documents(texts, batch_size=batch_size))
+
+    def plan_sync(
+        self,
+        documents: Iterable[Dict],
+        text_fields: List[str],
+        payload_fields: List[str],
+        encode_batch_size: int = 64,
+    ) -> Tuple[List[Tuple[str, str, Dict]], List[Tuple[str, str, Dict]], List[str]]:
+        """
+        Compare `documents` with what is stored. Returns (all keyed documents,
+        new or changed ones, IDs of points whose document disappeared).
+        """
+        if self.reducer is not None and not self.reducer.fitted:
+            documents = list(documents)
+            self.fit_reducer(documents, text_fields, encode_batch_size)
+        existing = self.backend.existing_hashes(self.collection_name)
+        keyed = list(self._keyed_documents(documents, text_fields, payload_fields))
+        changed = [item for item in keyed if existing.get(item[0]) != item[1]]
+        removed = list(existing.keys() - {point_id for point_id, _, _ in keyed})
+        return keyed, changed, removed
+
+    def sync_documents(
+        self,
+        documents: Iterable[Dict],
+        text_fields: List[str],
+        payload_fields: List[str],
+        plan: Optional[Tuple[List, List, List[str]]] = None,
+        **upload_params: int,
+    ) -> Dict[str, Any]:
+        """
+        Incrementally re-index: embed and upsert only new or changed documents
+        and delete points whose document disappeared from the source. `plan`
+        is a `plan_sync` result already computed for this collection.
+        """
+        if plan is None:
+            plan = self.plan_sync(
+                documents, text_fields, payload_fields, upload_params.get("encode_batch_size", 64)
             )
+        keyed, changed, removed = plan
+
+        report: Dict[str, Any] = {
+            "skipped": len(keyed) - len(changed),
+            "updated": len(changed),
+            "deleted": len(removed),
+        }
+        if changed:
+            report["upload"] = self._upload(changed, text_fields, payload_fields, **upload_params)
+        if removed:
+            self.backend.delete(self.collection_name, removed)
+        print(
+            f"{self.collection_name}: {report['updated']} new/changed, "
+            f"{report['skipped']} unchanged, {report['deleted']} deleted"
+        )
+        return report
+
+    def encode_query(self, query: str):
+        encode = self.batcher.encode if self.batcher is not None else self.model.encode
+        if self.query_cache is None:
+            return encode(query)
+        return self.query_cache.get_or_encode(self.embedding_model, query, encode)
+
+    def query(self, query: str, metadata_key: str, metadata_value: str, max_results: int):
+        query_vector = self.reduce(self.encode_query(query))
+        return self.backend.query(
+            self.collection_name, query_vector, max_results, metadata_key, metadata_value
+        )
+
+
+class AsyncQdrantWrapper:
+    """
+    Async search path over a QdrantWrapper: network calls go through the
+    backend's async client and CPU-bound encoding runs in a worker thread, so
+    retrieval never blocks the event loop.
+    """
+
+    def __init__(self, wrapper: QdrantWrapper):
+        self.wrapper = wrapper
+        self.collection_name = wrapper.collection_name
+        self.backend = wrapper.backend
+
+    async def _encode(self, query: str):
+        if self.wrapper.batcher is not None:
+            return await self.wrapper.batcher.aencode(query)
+        return await asyncio.to_thread(self.wrapper.model.encode, query)
+
+    async def encode_query(self, query: str):
+        wrapper = self.wrapper
+        cache = wrapper.query_cache
+        if cache is None:
+            return await self._encode(query)
+        # Cache lookups are cheap enough to stay on the loop; only misses hop threads
+        vector = cache.get(wrapper.embedding_model, query)
+        if vector is None:
+            start = time.perf_counter()
+            vector = await self._encode(query)
+            cache.put(wrapper.embedding_model, query, vector, time.perf_counter() - start)
+        return vector
+
+    async def query(self, query: str, metadata_key: str, metadata_value: str, max_results: int):
+        query_vector = self.wrapper.reduce(await self.encode_query(query))
+        return await self.backend.aquery(
+            self.collection_name, query_vector, max_results, metadata_key, metadata_value
         )
-        return hits
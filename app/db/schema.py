@@ -0,0 +1,96 @@
+"""
+One-time reconciliation of vector collections and payload indexes.
+
+The schema is checked (and created where missing) once at startup, then cached
+in-process so the query and upsert paths never pay for `get_collections` or
+`create_payload_index` round trips.
+"""
+
+import threading
+from typing import Dict, Iterable, Optional
+
+from app.db.vector_backends import CollectionSchema, VectorBackend
+
+
+class SchemaError(RuntimeError):
+    """The live collection does not match the configured schema."""
+
+
+class SchemaManager:
+    def __init__(self):
+        self._known: Dict[str, CollectionSchema] = {}
+        self._lock = threading.Lock()
+
+    def known(self, collection_name: str) -> Optional[CollectionSchema]:
+        return self._known.get(collection_name)
+
+    def reconcile(
+        self,
+        backend: VectorBackend,
+        collection_name: str,
+        dim: int,
+        distance: str,
+        payload_indexes: Iterable[str] = (),
+        quantization: str = "none",
+    ) -> CollectionSchema:
+        """
+        Make sure `collection_name` exists with the expected vector size and
+        distance and carries the given keyword indexes. Raises SchemaError if
+        an existing collection was created with different vector parameters.
+        """
+        with self._lock:
+            schema = backend.describe_collection(collection_name)
+            if schema is None:
+                print(f"Creating collection {collection_name} ({dim}-dim, {distance})")
+                backend.create_collection(collection_name, dim, distance)
+                schema = CollectionSchema(dim=dim, distance=distance, quantization=quantization)
+            elif schema.dim != dim or schema.distance != distance:
+                raise SchemaError(
+                    f"Collection {collection_name} has {schema.dim}-dim {schema.distance} "
+                    f"vectors but embedding.yaml expects {dim}-dim {distance}. "
+                    f"Drop the collection or fix the embedding config."
+                )
+            elif schema.quantization != quantization:
+                # Search still works, it just does not get the configured compression
+                print(
+                    f"Warning: collection {collection_name} uses quantization "
+                    f"'{schema.quantization}' but embedding.yaml asks for '{quantization}'. "
+                    f"Re-create the collection to apply it."
+                )
+            for field_name in payload_indexes:
+                if field_name not in schema.indexed_fields:
+                    backend.create_index(collection_name, field_name)
+                    schema.indexed_fields.add(field_name)
+            self._known[collection_name] = schema
+            return schema
+
+    def forget(self, collection_name: str) -> None:
+        """Drop the cached schema of a deleted collection so it is reconciled again."""
+        with self._lock:
+            self._known.pop(collection_name, None)
+
+    def ensure_collection(
+        self,
+        backend: VectorBackend,
+        collection_name: str,
+        dim: int,
+        distance: str,
+        payload_indexes: Iterable[str] = (),
+        quantization: str = "none",
+    ) -> None:
+        """Cheap check for callers outside startup: no round trip once known."""
+        if collection_name not in self._known:
+            self.reconcile(
+                backend, collection_name, dim, distance, payload_indexes, quantization
+            )
+
+    def ensure_index(
+        self, backend: VectorBackend, collection_name: str, field_name: str
+    ) -> None:
+        schema = self._known.get(collection_name)
+        if schema is None or field_name in schema.indexed_fields:
+            return
+        with self._lock:
+            if field_name not in schema.indexed_fields:
+                backend.create_index(collection_name, field_name)
+                schema.indexed_fields.add(field_name)
@@ -0,0 +1,511 @@
+"""
+Vector storage backends used by QdrantWrapper.
+
+`QdrantBackend` talks to a Qdrant server (or local mode); `NumpyBackend` keeps
+everything in-process, which is enough for a few thousand KB/guide vectors and
+removes the network round trip from every lookup. The backend is selected with
+`vector_backend` in embedding.yaml; both honour the `compression` settings
+(see app/db/compression.py).
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    VectorParams,
+)
+
+from app.db.compression import CompressionConfig
+
+
+@dataclass
+class CollectionSchema:
+    dim: int
+    distance: str
+    indexed_fields: Set[str] = field(default_factory=set)
+    quantization: str = "none"
+
+
+# (metadata_key, metadata_value, limit) for one filtered search in a batch
+FilteredSearch = Tuple[str, str, int]
+
+
+def metadata_filter(metadata_key: str, metadata_value: str) -> Filter:
+    return Filter(
+        must=[FieldCondition(key=metadata_key, match=MatchValue(value=metadata_value))]
+    )
+
+
+class VectorBackend(ABC):
+    """Operations QdrantWrapper needs from a vector store."""
+
+    compression: CompressionConfig = CompressionConfig()
+
+    @abstractmethod
+    def describe_collection(self, collection_name: str) -> Optional[CollectionSchema]:
+        """Return the live schema of `collection_name`, or None if it does not exist."""
+
+    @abstractmethod
+    def create_collection(self, collection_name: str, dim: int, distance: str) -> None: ...
+
+    @abstractmethod
+    def create_index(self, collection_name: str, field_name: str) -> None:
+        """Create a keyword payload index on `field_name`."""
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """Names of the physical collections (aliases are not included)."""
+
+    @abstractmethod
+    def delete_collection(self, collection_name: str) -> None: ...
+
+    @abstractmethod
+    def get_alias(self, alias: str) -> Optional[str]:
+        """Return the collection `alias` points at, or None."""
+
+    @abstractmethod
+    def set_alias(self, alias: str, collection_name: str) -> None:
+        """Create `alias`, or atomically repoint it, to `collection_name`."""
+
+    @abstractmethod
+    def upsert(self, collection_name: str, points: List[PointStruct]) -> None: ...
+
+    @abstractmethod
+    def delete(self, collection_name: str, point_ids: List[str]) -> None: ...
+
+    @abstractmethod
+    def existing_hashes(self, collection_name: str) -> Dict[str, Optional[str]]:
+        """Map every stored point ID to the `content_hash` in its payload."""
+
+    @abstractmethod
+    def count(self, collection_name: str) -> int: ...
+
+    @abstractmethod
+    def query(
+        self,
+        collection_name: str,
+        vector: Sequence[float],
+        limit: int,
+        metadata_key: str,
+        metadata_value: str,
+    ) -> List[ScoredPoint]: ...
+
+    async def aquery(
+        self,
+        collection_name: str,
+        vector: Sequence[float],
+        limit: int,
+        metadata_key: str,
+        metadata_value: str,
+    ) -> List[ScoredPoint]:
+        return self.query(collection_name, vector, limit, metadata_key, metadata_value)
+
+    def query_batch(
+        self, collection_name: str, vector: Sequence[float], searches: List[FilteredSearch]
+    ) -> List[List[ScoredPoint]]:
+        """Run several filtered searches for one query vector."""
+        return [
+            self.query(collection_name, vector, limit, key, value)
+            for key, value, limit in searches
+        ]
+
+    async def aquery_batch(
+        self, collection_name: str, vector: Sequence[float], searches: List[FilteredSearch]
+    ) -> List[List[ScoredPoint]]:
+        return self.query_batch(collection_name, vector, searches)
+
+
+class QdrantBackend(VectorBackend):
+    """Qdrant server backend; async calls use a lazily created AsyncQdrantClient."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        async_client_factory: Optional[Callable[[], AsyncQdrantClient]] = None,
+        compression: Optional[CompressionConfig] = None,
+    ):
+        self.client = client
+        self.compression = compression or CompressionConfig()
+        self._search_params = (
+            SearchParams(
+                quantization=QuantizationSearchParams(
+                    rescore=self.compression.rescore,
+                    oversampling=self.compression.oversampling,
+                )
+            )
+            if self.compression.quantized else None
+        )
+        self._async_client_factory = async_client_factory
+        self._async_client: Optional[AsyncQdrantClient] = None
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        if self._async_client is None:
+            if self._async_client_factory is None:
+                raise RuntimeError("QdrantBackend has no async client configured.")
+            self._async_client = self._async_client_factory()
+        return self._async_client
+
+    def describe_collection(self, collection_name: str) -> Optional[CollectionSchema]:
+        if not self.client.collection_exists(collection_name):
+            return None
+        info = self.client.get_collection(collection_name)
+        vectors = info.config.params.vectors
+        if not isinstance(vectors, VectorParams):
+            raise ValueError(f"Collection {collection_name} uses named vectors, which are not supported.")
+        return CollectionSchema(
+            dim=vectors.size,
+            distance=Distance(vectors.distance).name,
+            indexed_fields={
+                name for name, index in (info.payload_schema or {}).items()
+                if index.data_type == PayloadSchemaType.KEYWORD
+            },
+            quantization=(
+                "int8" if isinstance(info.config.quantization_config, ScalarQuantization)
+                else "none"
+            ),
+        )
+
+    def create_collection(self, collection_name: str, dim: int, distance: str) -> None:
+        compression = self.compression
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=dim, distance=Distance[distance], on_disk=compression.on_disk or None
+            ),
+            quantization_config=(
+                ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8, quantile=0.99, always_ram=compression.always_ram
+                    )
+                )
+                if compression.quantized else None
+            ),
+        )
+
+    def create_index(self, collection_name: str, field_name: str) -> None:
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD,
+        )
+
+    def list_collections(self) -> List[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def delete_collection(self, collection_name: str) -> None:
+        self.client.delete_collection(collection_name=collection_name)
+
+    def get_alias(self, alias: str) -> Optional[str]:
+        for description in self.client.get_aliases().aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+
+    def set_alias(self, alias: str, collection_name: str) -> None:
+        # Delete + create in one request is applied atomically by Qdrant
+        operations: List[Any] = []
+        if self.get_alias(alias) is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+
+    def upsert(self, collection_name: str, points: List[PointStruct]) -> None:
+        self.client.upsert(collection_name=collection_name, points=points)
+
+    def delete(self, collection_name: str, point_ids: List[str]) -> None:
+        self.client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=point_ids),
+        )
+
+    def existing_hashes(
+        self, collection_name: str, page_size: int = 1000
+    ) -> Dict[str, Optional[str]]:
+        hashes: Dict[str, Optional[str]] = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["content_hash"],
+                with_vectors=False,
+            )
+            for point in points:
+                hashes[str(point.id)] = (point.payload or {}).get("content_hash")
+            if offset is None:
+                return hashes
+
+    def count(self, collection_name: str) -> int:
+        return self.client.count(collection_name=collection_name).count
+
+    def query(self, collection_name, vector, limit, metadata_key, metadata_value):
+        response = self.client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            limit=limit,
+            query_filter=metadata_filter(metadata_key, metadata_value),
+            search_params=self._search_params,
+        )
+        return response.points
+
+    async def aquery(self, collection_name, vector, limit, metadata_key, metadata_value):
+        response = await self.async_client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            limit=limit,
+            query_filter=metadata_filter(metadata_key, metadata_value),
+            search_params=self._search_params,
+        )
+        return response.points
+
+    def _batch_requests(self, vector, searches: List[FilteredSearch]) -> List[QueryRequest]:
+        vector = [float(x) for x in vector]
+        return [
+            QueryRequest(
+                query=vector,
+                filter=metadata_filter(key, value),
+                limit=limit,
+                params=self._search_params,
+                with_payload=True,
+            )
+            for key, value, limit in searches
+        ]
+
+    def query_batch(self, collection_name, vector, searches):
+        responses = self.client.query_batch_points(
+            collection_name=collection_name,
+            requests=self._batch_requests(vector, searches),
+        )
+        return [response.points for response in responses]
+
+    async def aquery_batch(self, collection_name, vector, searches):
+        # One HTTP round trip for every filtered search on this collection
+        responses = await self.async_client.query_batch_points(
+            collection_name=collection_name,
+            requests=self._batch_requests(vector, searches),
+        )
+        return [response.points for response in responses]
+
+
+class _NumpyCollection:
+    def __init__(self, dim: int, distance: str, quantization: str = "none"):
+        if distance not in ("COSINE", "DOT"):
+            raise ValueError(f"NumpyBackend supports Cosine and Dot distance, not {distance}.")
+        self.dim = dim
+        self.distance = distance
+        self.normalize = distance == "COSINE"
+        self.quantization = quantization
+        self.indexed_fields: Set[str] = set()
+        self.points: Dict[str, tuple] = {}
+        # Search partitions, rebuilt lazily after writes:
+        # {(metadata_key, value): (ids, payloads, contiguous matrix, scale, originals)}
+        # The matrix is float32 (scale 1.0) or int8 with a per-partition scale;
+        # for int8, `originals` keeps the full-precision rows used to rescore,
+        # captured with the partition so queries never read `points` unlocked.
+        self.partitions: Dict[tuple, tuple] = {}
+
+    def partition(self, metadata_key: str, metadata_value: str) -> tuple:
+        key = (metadata_key, metadata_value)
+        if key not in self.partitions:
+            members = [
+                (point_id, payload, vector)
+                for point_id, (vector, payload) in self.points.items()
+                if payload.get(metadata_key) == metadata_value
+            ]
+            matrix = (
+                np.ascontiguousarray(np.stack([m[2] for m in members]))
+                if members else np.empty((0, self.dim), dtype=np.float32)
+            )
+            scale, originals = 1.0, None
+            if self.quantization == "int8" and members:
+                originals = [m[2] for m in members]
+                # Symmetric scalar quantization clipped at the 99th percentile,
+                # like Qdrant's `quantile: 0.99`
+                scale = float(np.quantile(np.abs(matrix), 0.99)) / 127 or 1.0
+                matrix = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+            self.partitions[key] = (
+                [m[0] for m in members], [m[1] for m in members], matrix, scale, originals
+            )
+        return self.partitions[key]
+
+
+class NumpyBackend(VectorBackend):
+    """
+    In-process brute-force backend. Vectors are normalized at insert time and
+    kept in one contiguous float32 (or int8, see `compression`) matrix per
+    (field, value) partition, so a category-filtered search is a single
+    matrix-vector product plus top-k.
+    """
+
+    def __init__(self, compression: Optional[CompressionConfig] = None):
+        self.compression = compression or CompressionConfig()
+        self._collections: Dict[str, _NumpyCollection] = {}
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def _collection(self, collection_name: str) -> _NumpyCollection:
+        try:
+            return self._collections[self._aliases.get(collection_name, collection_name)]
+        except KeyError:
+            raise ValueError(f"Collection {collection_name} does not exist.") from None
+
+    def describe_collection(self, collection_name: str) -> Optional[CollectionSchema]:
+        with self._lock:
+            collection = self._collections.get(
+                self._aliases.get(collection_name, collection_name)
+            )
+            if collection is None:
+                return None
+            return CollectionSchema(
+                dim=collection.dim,
+                distance=collection.distance,
+                indexed_fields=set(collection.indexed_fields),
+                quantization=collection.quantization,
+            )
+
+    def create_collection(self, collection_name: str, dim: int, distance: str) -> None:
+        with self._lock:
+            self._collections[collection_name] = _NumpyCollection(
+                dim, distance, self.compression.quantization
+            )
+
+    def create_index(self, collection_name: str, field_name: str) -> None:
+        # Partitions are built lazily for any field; this only records the field
+        with self._lock:
+            self._collection(collection_name).indexed_fields.add(field_name)
+
+    def list_collections(self) -> List[str]:
+        with self._lock:
+            return list(self._collections)
+
+    def delete_collection(self, collection_name: str) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            self._aliases = {
+                alias: target for alias, target in self._aliases.items()
+                if target != collection_name
+            }
+
+    def get_alias(self, alias: str) -> Optional[str]:
+        with self._lock:
+            return self._aliases.get(alias)
+
+    def set_alias(self, alias: str, collection_name: str) -> None:
+        with self._lock:
+            if alias in self._collections:
+                raise ValueError(f"Alias {alias} would shadow an existing collection.")
+            self._collection(collection_name)
+            self._aliases[alias] = collection_name
+
+    def _prepare(self, collection: _NumpyCollection, vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != collection.dim:
+            raise ValueError(f"Expected a {collection.dim}-dim vector, got {vector.shape[0]}.")
+        if collection.normalize:
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+        return vector
+
+    def upsert(self, collection_name: str, points: List[PointStruct]) -> None:
+        with self._lock:
+            collection = self._collection(collection_name)
+            for point in points:
+                collection.points[str(point.id)] = (
+                    self._prepare(collection, point.vector),
+                    dict(point.payload or {}),
+                )
+            collection.partitions.clear()
+
+    def delete(self, collection_name: str, point_ids: List[str]) -> None:
+        with self._lock:
+            collection = self._collection(collection_name)
+            for point_id in point_ids:
+                collection.points.pop(str(point_id), None)
+            collection.partitions.clear()
+
+    def existing_hashes(self, collection_name: str) -> Dict[str, Optional[str]]:
+        with self._lock:
+            return {
+                point_id: payload.get("content_hash")
+                for point_id, (_, payload) in self._collection(collection_name).points.items()
+            }
+
+    def count(self, collection_name: str) -> int:
+        with self._lock:
+            return len(self._collection(collection_name).points)
+
+    def memory_bytes(self, collection_name: str) -> int:
+        """Bytes held by stored vectors plus the search partitions built so far."""
+        with self._lock:
+            collection = self._collection(collection_name)
+            originals = sum(vector.nbytes for vector, _ in collection.points.values())
+            return originals + sum(p[2].nbytes for p in collection.partitions.values())
+
+    def query(self, collection_name, vector, limit, metadata_key, metadata_value):
+        with self._lock:
+            collection = self._collection(collection_name)
+            ids, payloads, matrix, scale, full = collection.partition(metadata_key, metadata_value)
+        if not ids or limit <= 0:
+            return []
+        query = self._prepare(collection, vector)
+        scores = (matrix @ query) * scale
+        k = min(limit, len(ids))
+        if matrix.dtype == np.int8 and self.compression.rescore:
+            # Take oversampled candidates from the int8 scores, then re-rank
+            # them with the full-precision vectors
+            candidates = min(len(ids), max(k, int(np.ceil(k * self.compression.oversampling))))
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            originals = np.stack([full[i] for i in top])
+            scores = dict(zip(top.tolist(), (originals @ query).tolist()))
+            top = sorted(scores, key=scores.get, reverse=True)[:k]
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        return [
+            ScoredPoint(id=ids[i], version=0, score=float(scores[i]), payload=payloads[i])
+            for i in top
+        ]
+
+    async def aquery(self, collection_name, vector, limit, metadata_key, metadata_value):
+        # A few thousand dot products take well under a millisecond; stay on the loop
+        return self.query(collection_name, vector, limit, metadata_key, metadata_value)
+
+
+def create_backend(
+    name: str,
+    client_factory: Callable[[], QdrantClient],
+    async_client_factory: Optional[Callable[[], AsyncQdrantClient]] = None,
+    compression: Optional[CompressionConfig] = None,
+) -> VectorBackend:
+    if name == "qdrant":
+        return QdrantBackend(client_factory(), async_client_factory, compression)
+    if name == "numpy":
+        return NumpyBackend(compression)
+    raise ValueError(f"Unknown vector_backend '{name}'. Use 'qdrant' or 'numpy'.")
@@ -0,0 +1,389 @@
+"""
+Process-wide registry of embedding models and Qdrant collections.
+
+Loading a SentenceTransformer and opening a Qdrant connection are both
+expensive, so they are done once per process and shared by the indexer and
+the tool handlers.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from app.db.qdrant_client import (
+    QDRANT_API_KEY,
+    QDRANT_URL,
+    AsyncQdrantWrapper,
+    QdrantWrapper,
+)
+from app.db.collection_versions import CollectionVersions
+from app.db.compression import CompressionConfig, DimensionReducer, reducer_path
+from app.db.embedding_batcher import EmbeddingBatcher
+from app.db.embedding_store import EmbeddingStore
+from app.db.encoders import load_encoder, variant_name
+from app.db.schema import SchemaManager
+from app.db.vector_backends import NumpyBackend, VectorBackend, create_backend
+from app.utils.embedding_cache import QueryEmbeddingCache
+from app.utils.yaml_loader import BASE_DIR, load_yaml
+
+
+@dataclass(frozen=True)
+class VectorSearch:
+    """One filtered search in a `VectorRegistry.search_many` call."""
+
+    collection_name: str
+    metadata_value: str
+    limit: int = 3
+    metadata_key: str = "category"
+    label: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return self.label or self.collection_name
+
+
+class VectorRegistry:
+    """Hands out one loaded model per model name and one client per collection."""
+
+    def __init__(
+        self,
+        embedding_config: Dict[str, Any],
+        url: Optional[str] = QDRANT_URL,
+        api_key: Optional[str] = QDRANT_API_KEY,
+        model_loader: Optional[Callable[[str], Any]] = None,
+        client_factory: Optional[Callable[[], Any]] = None,
+        async_client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        model_config = embedding_config.get("embedding_model", {})
+        self.default_model = model_config.get("default_model")
+        self.embedding_dim = model_config.get("params", {}).get("embedding_dim", 768)
+        self.distance = model_config.get("params", {}).get("distance", "Cosine").upper()
+        if self.default_model is None:
+            raise ValueError("embedding_model.default_model must be set in embedding.yaml.")
+        self.indexing_params = embedding_config.get("indexing", {})
+        # The subset QdrantWrapper.sync_documents / upsert_documents accept
+        self.upload_params = {
+            k: v for k, v in self.indexing_params.items()
+            if k in ("encode_batch_size", "upload_chunk_size", "upload_parallelism")
+        }
+        self.encoder_config = embedding_config.get("encoder", {})
+        self.batching_config = embedding_config.get("batching", {})
+        cache_config = embedding_config.get("query_cache", {})
+        self.query_cache = QueryEmbeddingCache(
+            capacity=cache_config.get("max_entries", 1024),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+        )
+        self.store_config = embedding_config.get("embedding_store", {})
+        self.backend_name = embedding_config.get("vector_backend", "qdrant")
+        compression_config = embedding_config.get("compression", {})
+        self.compression = CompressionConfig.from_config(compression_config)
+        self.reducer_root = compression_config.get("path", ".cache/reducers")
+        self.collection_dim = self.compression.stored_dim(self.embedding_dim)
+        # collection name -> payload fields that get a keyword index
+        self.collections_config: Dict[str, List[str]] = {
+            name: spec.get("payload_indexes", [])
+            for name, spec in embedding_config.get("collections", {}).items()
+        }
+        self.schema = SchemaManager()
+        self.keep_versions = embedding_config.get("versioning", {}).get("keep_versions", 2)
+
+        self._url = url
+        self._api_key = api_key
+        self._model_loader = model_loader or (
+            lambda name: load_encoder(name, self.encoder_config)
+        )
+        self._client_factory = client_factory or (
+            lambda: QdrantClient(url=self._url, api_key=self._api_key)
+        )
+        self._async_client_factory = async_client_factory or (
+            lambda: AsyncQdrantClient(url=self._url, api_key=self._api_key)
+        )
+
+        self._models: Dict[str, Any] = {}
+        self._collections: Dict[str, QdrantWrapper] = {}
+        self._async_collections: Dict[str, AsyncQdrantWrapper] = {}
+        self._stores: Dict[str, EmbeddingStore] = {}
+        self._batchers: Dict[str, EmbeddingBatcher] = {}
+        self._numpy_backend: Optional[NumpyBackend] = None
+        self._lock = threading.RLock()
+        self._counters = {
+            "model_loads": 0,
+            "model_hits": 0,
+            "collection_opens": 0,
+            "collection_hits": 0,
+        }
+
+    def get_model(self, model_name: Optional[str] = None) -> Any:
+        """Return the shared encoder for `model_name`, loading it on first use."""
+        model_name = model_name or self.default_model
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is not None:
+                self._counters["model_hits"] += 1
+                return model
+            print(
+                f"Loading embedding model {model_name} "
+                f"({self.encoder_config.get('backend', 'torch')} encoder)"
+            )
+            model = self._model_loader(model_name)
+            self._models[model_name] = model
+            self._counters["model_loads"] += 1
+            return model
+
+    def get_batcher(self, model_name: Optional[str] = None) -> Optional[EmbeddingBatcher]:
+        """Return the query micro-batcher for `model_name`, or None if disabled."""
+        if not self.batching_config.get("enabled", False):
+            return None
+        model_name = model_name or self.default_model
+        with self._lock:
+            batcher = self._batchers.get(model_name)
+            if batcher is None:
+                batcher = EmbeddingBatcher(
+                    self.get_model(model_name),
+                    max_batch_size=self.batching_config.get("max_batch_size", 32),
+                    max_wait_ms=self.batching_config.get("max_wait_ms", 5),
+                )
+                self._batchers[model_name] = batcher
+            return batcher
+
+    def get_embedding_store(self, model_name: Optional[str] = None) -> Optional[EmbeddingStore]:
+        """Return the on-disk embedding store for `model_name`, or None if disabled."""
+        if not self.store_config.get("enabled", False):
+            return None
+        model_name = model_name or self.default_model
+        with self._lock:
+            store = self._stores.get(model_name)
+            if store is None:
+                # Relative paths are resolved against the project root
+                root = BASE_DIR.parent / self.store_config.get("path", ".cache/embeddings")
+                store = EmbeddingStore(
+                    root,
+                    variant_name(model_name, self.encoder_config),
+                    self.embedding_dim,
+                    dtype=self.store_config.get("dtype", "float16"),
+                )
+                self._stores[model_name] = store
+            return store
+
+    def _create_backend(self) -> VectorBackend:
+        # The in-process backend holds every collection, so share one instance
+        if self.backend_name == "numpy":
+            if self._numpy_backend is None:
+                self._numpy_backend = NumpyBackend(self.compression)
+            return self._numpy_backend
+        return create_backend(
+            self.backend_name,
+            self._client_factory,
+            self._async_client_factory,
+            self.compression,
+        )
+
+    def _create_reducer(
+        self, collection_name: str, model_name: str
+    ) -> Optional[DimensionReducer]:
+        if self.compression.reduction == "none":
+            return None
+        return DimensionReducer(
+            self.compression.reduction,
+            self.embedding_dim,
+            self.collection_dim,
+            path=reducer_path(
+                BASE_DIR.parent / self.reducer_root,
+                variant_name(model_name, self.encoder_config),
+                collection_name,
+                self.collection_dim,
+            ),
+        )
+
+    def get_collection(
+        self, collection_name: str, model_name: Optional[str] = None
+    ) -> QdrantWrapper:
+        """Return the shared wrapper (and its client) for `collection_name`."""
+        with self._lock:
+            wrapper = self._collections.get(collection_name)
+            if wrapper is not None:
+                self._counters["collection_hits"] += 1
+                return wrapper
+            model_name = model_name or self.default_model
+            wrapper = QdrantWrapper(
+                collection_name=collection_name,
+                # Query cache key; differs per encoder backend
+                embedding_model=variant_name(model_name, self.encoder_config),
+                embedding_dim=self.embedding_dim,
+                distance=self.distance,
+                model=self.get_model(model_name),
+                backend=self._create_backend(),
+                schema=self.schema,
+                payload_indexes=self.collections_config.get(
+                    collection_name, ["category", "issue_code"]
+                ),
+                query_cache=self.query_cache,
+                embedding_store=self.get_embedding_store(model_name),
+                reducer=self._create_reducer(collection_name, model_name),
+                batcher=self.get_batcher(model_name),
+            )
+            self._collections[collection_name] = wrapper
+            self._counters["collection_opens"] += 1
+            return wrapper
+
+    def reconcile_schema(self) -> Dict[str, Any]:
+        """
+        Create or verify every collection and payload index listed in
+        embedding.yaml. Runs once at startup; raises SchemaError when a live
+        collection has the wrong vector size or distance.
+        """
+        # Uses its own backend handle so the embedding model is not loaded here;
+        # wrappers created later find the schema already known
+        backend = self._create_backend()
+        reconciled = {}
+        for name, payload_indexes in self.collections_config.items():
+            versions = CollectionVersions(backend, name, self.schema)
+            if versions.live() is None and not versions.is_legacy():
+                # Fresh deployment: start at version 1 behind the alias
+                first = versions.next_name()
+                self.schema.reconcile(
+                    backend,
+                    first,
+                    self.collection_dim,
+                    self.distance,
+                    payload_indexes,
+                    self.compression.quantization,
+                )
+                versions.promote(first)
+            reconciled[name] = self.schema.reconcile(
+                backend,
+                name,
+                self.collection_dim,
+                self.distance,
+                payload_indexes,
+                self.compression.quantization,
+            )
+        return reconciled
+
+    def open_version(self, collection_name: str, physical_name: str) -> QdrantWrapper:
+        """
+        Writer for one physical version of `collection_name` (created if
+        missing). Shares the model, backend and reducer of the live wrapper and
+        is not cached.
+        """
+        live = self.get_collection(collection_name)
+        return QdrantWrapper(
+            collection_name=physical_name,
+            embedding_model=live.embedding_model,
+            embedding_dim=self.embedding_dim,
+            distance=self.distance,
+            model=live.model,
+            backend=live.backend,
+            schema=self.schema,
+            payload_indexes=self.collections_config.get(
+                collection_name, ["category", "issue_code"]
+            ),
+            query_cache=live.query_cache,
+            embedding_store=live.embedding_store,
+            reducer=live.reducer,
+            batcher=live.batcher,
+            id_namespace=collection_name,
+        )
+
+    def versions(self, collection_name: str) -> CollectionVersions:
+        return CollectionVersions(
+            self.get_collection(collection_name).backend, collection_name, self.schema
+        )
+
+    def get_async_collection(
+        self, collection_name: str, model_name: Optional[str] = None
+    ) -> AsyncQdrantWrapper:
+        """Return the shared async search wrapper for `collection_name`."""
+        with self._lock:
+            wrapper = self._async_collections.get(collection_name)
+            if wrapper is None:
+                wrapper = AsyncQdrantWrapper(self.get_collection(collection_name, model_name))
+                self._async_collections[collection_name] = wrapper
+            return wrapper
+
+    async def search_many(
+        self, query: str, searches: List[VectorSearch]
+    ) -> Dict[str, List[Any]]:
+        """
+        Encode `query` once and run every search with it. Searches on the same
+        collection go out as one batched request, and collections are queried
+        concurrently. Results are keyed by `VectorSearch.key`.
+        """
+        keys = [search.key for search in searches]
+        if len(set(keys)) != len(keys):
+            raise ValueError(f"search_many needs distinct search keys, got {keys}.")
+        if not searches:
+            return {}
+
+        by_collection: Dict[str, List[VectorSearch]] = {}
+        for search in searches:
+            by_collection.setdefault(search.collection_name, []).append(search)
+        wrappers = {name: self.get_async_collection(name) for name in by_collection}
+
+        query_vector = await next(iter(wrappers.values())).encode_query(query)
+        batches = await asyncio.gather(*[
+            wrappers[name].backend.aquery_batch(
+                name,
+                wrappers[name].wrapper.reduce(query_vector),
+                [(s.metadata_key, s.metadata_value, s.limit) for s in group],
+            )
+            for name, group in by_collection.items()
+        ])
+
+        results: Dict[str, List[Any]] = {}
+        for group, hits in zip(by_collection.values(), batches):
+            for search, points in zip(group, hits):
+                results[search.key] = points
+        return results
+
+    def close(self) -> None:
+        """Stop background encoder threads (called on shutdown)."""
+        with self._lock:
+            batchers = list(self._batchers.values())
+        for batcher in batchers:
+            batcher.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "backend": self.backend_name,
+                "encoder": self.encoder_config.get("backend", "torch"),
+                "compression": {
+                    "quantization": self.compression.quantization,
+                    "reduction": self.compression.reduction,
+                    "collection_dim": self.collection_dim,
+                },
+                "models": sorted(self._models),
+                "collections": sorted(self._collections),
+                "embedding_stores": [store.stats() for store in self._stores.values()],
+                "embedding_batchers": {
+                    name: batcher.stats() for name, batcher in self._batchers.items()
+                },
+            }
+
+
+_registry: Optional[VectorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def init_vector_registry(
+    embedding_config: Optional[Dict[str, Any]] = None,
+) -> VectorRegistry:
+    """Build the process-wide registry from embedding.yaml (called at startup)."""
+    global _registry
+    with _registry_lock:
+        _registry = VectorRegistry(embedding_config or load_yaml("embedding.yaml"))
+        return _registry
+
+
+def get_vector_registry() -> VectorRegistry:
+    """Return the process-wide registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VectorRegistry(load_yaml("embedding.yaml"))
+    return _registry
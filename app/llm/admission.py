@@ -0,0 +1,145 @@
+"""
+Admission control in front of the LLM provider.
+
+At most `max_in_flight` LLM calls run at once; further calls wait in a queue of
+at most `max_queue`. A call that finds the queue full is rejected at once
+(429), and one that waits longer than `queue_timeout_seconds` gives up (503).
+Both carry a Retry-After estimate, so bursts turn into fast rejections instead
+of every request slowing down together against the provider's rate limits.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+import numpy as np
+
+from app.utils.yaml_loader import load_yaml
+
+
+class LLMUnavailable(Exception):
+    """The LLM could not serve the call; maps to an HTTP status with Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionRejected(LLMUnavailable):
+    """The LLM call was not admitted (queue full or queue wait timed out)."""
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_queue: int = 64,
+        queue_timeout_seconds: float = 10.0,
+        enabled: bool = True,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self._max_waiting = 0
+        self._admitted = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        self._waits_ms: Deque[float] = deque(maxlen=2048)
+        self._call_seconds: Deque[float] = deque(maxlen=256)
+
+    @classmethod
+    def from_config(cls) -> "AdmissionController":
+        config = load_yaml("llm.yaml").get("llm", {}).get("admission", {})
+        return cls(
+            max_in_flight=config.get("max_in_flight", 16),
+            max_queue=config.get("max_queue", 64),
+            queue_timeout_seconds=config.get("queue_timeout_seconds", 10.0),
+            enabled=config.get("enabled", True),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained, at least 1."""
+        with self._lock:
+            calls = list(self._call_seconds)
+            waiting = self.waiting
+        average = sum(calls) / len(calls) if calls else 1.0
+        return max(1, math.ceil(average * (waiting + 1) / self.max_in_flight))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one in-flight LLM slot for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+        enqueued = time.perf_counter()
+        if self._semaphore.locked():
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    self._rejected_full += 1
+                    full = True
+                else:
+                    self.waiting += 1
+                    self._max_waiting = max(self._max_waiting, self.waiting)
+                    full = False
+            if full:
+                raise AdmissionRejected(429, "LLM queue is full", self.retry_after())
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._rejected_timeout += 1
+                raise AdmissionRejected(503, "Timed out waiting for an LLM slot", self.retry_after())
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+            self._admitted += 1
+            self._waits_ms.append((started - enqueued) * 1000)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._call_seconds.append(time.perf_counter() - started)
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._waits_ms)
+            return {
+                "enabled": self.enabled,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self._max_waiting,
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_full,
+                "rejected_queue_timeout": self._rejected_timeout,
+                "queue_wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": round(float(np.percentile(waits, 50)), 3) if waits else 0.0,
+                    "p99": round(float(np.percentile(waits, 99)), 3) if waits else 0.0,
+                },
+            }
+
+
+admission = AdmissionController.from_config()
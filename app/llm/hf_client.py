@@ -1,34 +1,38 @@
+"""
+Hugging Face inference provider (OpenAI-compatible router endpoint).
+"""
+
 import os
-from typing import Dict, Any
-from huggingface_hub import InferenceClient
+from typing import Any, Dict, Optional
+
+import httpx
 from dotenv import load_dotenv
 
-class HFClient:
-    def __init__(self, token: str | None = None):
+from app.llm.providers import OpenAICompatibleProvider
+
+# OpenAI-compatible chat completions endpoint of the HF inference router
+DEFAULT_BASE_URL = "https://router.huggingface.co/v1"
+
+
+class HFInferenceProvider(OpenAICompatibleProvider):
+    """Hugging Face inference router through its OpenAI-compatible endpoint."""
+
+    name = "hf"
+
+    def __init__(
+        self,
+        token: str | None = None,
+        base_url: str | None = None,
+        client_config: Optional[Dict[str, Any]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         load_dotenv()
-        self.token = token or os.getenv("HF_TOKEN")
-        if not self.token:
+        token = token or os.getenv("HF_TOKEN")
+        if not token:
             raise RuntimeError("HF_TOKEN is missing. Set it in your environment variables.")
-        self.client = InferenceClient(token=self.token)
-   
-    def generate(self, model: str, prompt: str, params: Dict[str, Any],tools) :
-        
-        
-        completion =self.client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3-0324",
-            messages=[{"role": "user", "content": prompt}],
-            tools=tools,
-            tool_choice="auto",
-        
-            
+        super().__init__(
+            base_url=base_url or DEFAULT_BASE_URL,
+            api_key=token,
+            client_config=client_config,
+            transport=transport,
         )
-        if not completion.choices:
-            raise RuntimeError("No completion returned from HF Inference API.")
-        if len(completion.choices) > 1:
-            print("Warning: Multiple completions returned, using the first one.")
-        if completion.choices[0].message.tool_calls:
-            print(f"Tool calls: {completion.choices[0].message.tool_calls}")
-            return completion
-        
-
-        return completion
\ No newline at end of file
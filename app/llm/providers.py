@@ -0,0 +1,252 @@
+"""
+LLM providers behind one interface.
+
+`chat_service` only talks to `LLMProvider`: `generate` for a full completion,
+`generate_stream` for token streaming and tool calls in both. The provider is
+picked by `llm.provider` in `llm.yaml`:
+
+    hf                 Hugging Face inference router (HF_TOKEN)
+    openai_compatible  any OpenAI-compatible HTTP server, e.g. a self-hosted
+                       vLLM / TGI / llama.cpp server, or app/llm/stub_server.py
+
+Both speak the OpenAI `/chat/completions` protocol, so they share one pooled
+httpx.AsyncClient implementation.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+from huggingface_hub import ChatCompletionOutput
+
+# Our decoding params -> OpenAI request fields
+PARAM_NAMES = {
+    "max_new_tokens": "max_tokens",
+    "max_tokens": "max_tokens",
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "stop": "stop",
+    "seed": "seed",
+    "frequency_penalty": "frequency_penalty",
+    "presence_penalty": "presence_penalty",
+}
+
+
+def openai_params(params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Map decoding params to OpenAI request fields; unknown ones are dropped."""
+    return {
+        PARAM_NAMES[name]: value
+        for name, value in (params or {}).items()
+        if name in PARAM_NAMES and value is not None
+    }
+
+
+class LLMProvider(ABC):
+    """Chat completion backend used by the chat flow."""
+
+    name = "provider"
+
+    @property
+    def identity(self) -> str:
+        """Which backend answers; part of the completion cache key."""
+        return self.name
+
+    @abstractmethod
+    def request_body(self, model: str, prompt: str, params: Dict[str, Any], tools) -> Dict[str, Any]:
+        """The request payload as sent (also identifies a completion for caching)."""
+
+    @abstractmethod
+    async def generate(self, model: str, prompt: str, params: Dict[str, Any], tools) -> ChatCompletionOutput:
+        ...
+
+    @abstractmethod
+    async def generate_stream(
+        self,
+        model: str,
+        prompt: str,
+        params: Dict[str, Any],
+        tools,
+        on_token: Callable[[str], Any],
+    ) -> ChatCompletionOutput:
+        """Stream a completion, calling `on_token` per content delta; returns the whole completion."""
+
+    async def warmup(self, model: str) -> None:
+        """Open a connection ahead of the first chat."""
+
+    async def aclose(self) -> None:
+        """Release pooled connections."""
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Non-blocking client for an OpenAI-compatible `/chat/completions` endpoint
+    over one pooled httpx.AsyncClient, so many chats can wait on the LLM at
+    once without blocking the event loop.
+    """
+
+    name = "openai_compatible"
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        client_config: Optional[Dict[str, Any]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        config = client_config or {}
+        self.base_url = base_url.rstrip("/")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client_kwargs = {
+            "base_url": self.base_url,
+            "headers": headers,
+            "timeout": httpx.Timeout(
+                connect=config.get("connect_timeout", 5.0),
+                read=config.get("read_timeout", 60.0),
+                write=config.get("write_timeout", 10.0),
+                pool=config.get("pool_timeout", 5.0),
+            ),
+            "limits": httpx.Limits(
+                max_connections=config.get("max_connections", 50),
+                max_keepalive_connections=config.get("max_keepalive_connections", 20),
+                keepalive_expiry=config.get("keepalive_expiry", 30.0),
+            ),
+            "transport": transport,
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(**self._client_kwargs)
+        return self._client
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name} {self.base_url}"
+
+    def request_body(self, model: str, prompt: str, params: Dict[str, Any], tools) -> Dict[str, Any]:
+        body = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            **openai_params(params),
+        }
+        if tools:
+            body.update(tools=tools, tool_choice="auto")
+        return body
+
+    async def _complete(self, body: Dict[str, Any]) -> ChatCompletionOutput:
+        response = await self.client.post("/chat/completions", json=body)
+        response.raise_for_status()
+        return ChatCompletionOutput.parse_obj_as_instance(response.json())
+
+    @staticmethod
+    def _check(completion: ChatCompletionOutput) -> ChatCompletionOutput:
+        if not completion.choices:
+            raise RuntimeError("No completion returned from the LLM provider.")
+        if len(completion.choices) > 1:
+            print("Warning: Multiple completions returned, using the first one.")
+        if completion.choices[0].message.tool_calls:
+            print(f"Tool calls: {completion.choices[0].message.tool_calls}")
+        return completion
+
+    async def warmup(self, model: str) -> None:
+        """Open a pooled connection with a 1-token request."""
+        await self._complete({
+            "model": model,
+            "messages": [{"role": "user", "content": "ping"}],
+            "max_tokens": 1,
+        })
+
+    async def generate(self, model: str, prompt: str, params: Dict[str, Any], tools) -> ChatCompletionOutput:
+        return self._check(await self._complete(self.request_body(model, prompt, params, tools)))
+
+    async def stream_chunks(self, body: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the decoded server-sent chunks of a streamed completion."""
+        async with self.client.stream("POST", "/chat/completions", json={**body, "stream": True}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+
+    async def generate_stream(
+        self,
+        model: str,
+        prompt: str,
+        params: Dict[str, Any],
+        tools,
+        on_token: Callable[[str], Any],
+    ) -> ChatCompletionOutput:
+        """
+        Stream a completion, calling `on_token` with each content delta as it
+        arrives. Tool-call deltas are merged, so the result has the same shape
+        as `generate`.
+        """
+        content, tool_calls, finish_reason = [], {}, None
+        async for chunk in self.stream_chunks(self.request_body(model, prompt, params, tools)):
+            for choice in chunk.get("choices") or []:
+                if choice.get("index", 0) != 0:
+                    continue
+                delta = choice.get("delta") or {}
+                finish_reason = choice.get("finish_reason") or finish_reason
+                if delta.get("content"):
+                    content.append(delta["content"])
+                    on_token(delta["content"])
+                for call in delta.get("tool_calls") or []:
+                    merged = tool_calls.setdefault(call.get("index", 0), {
+                        "id": None, "type": "function", "function": {"name": "", "arguments": ""},
+                    })
+                    merged["id"] = call.get("id") or merged["id"]
+                    function = call.get("function") or {}
+                    merged["function"]["name"] += function.get("name") or ""
+                    merged["function"]["arguments"] += function.get("arguments") or ""
+
+        message = {"role": "assistant", "content": "".join(content) if content else None}
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+        return self._check(ChatCompletionOutput.parse_obj_as_instance({
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": message}]
+            if content or tool_calls else [],
+        }))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+PROVIDERS = ("hf", "openai_compatible")
+
+
+def create_provider(
+    llm_config: Dict[str, Any], transport: Optional[httpx.AsyncBaseTransport] = None
+) -> LLMProvider:
+    """Build the provider selected by `llm.provider` in llm.yaml."""
+    name = llm_config.get("provider", "hf")
+    client_config = llm_config.get("client", {})
+    if name == "hf":
+        from app.llm.hf_client import HFInferenceProvider
+
+        return HFInferenceProvider(
+            base_url=client_config.get("base_url"),
+            client_config=client_config,
+            transport=transport,
+        )
+    if name == "openai_compatible":
+        config = llm_config.get("openai_compatible", {})
+        base_url = os.getenv("LLM_BASE_URL") or config.get("base_url")
+        if not base_url:
+            raise ValueError("llm.openai_compatible.base_url (or LLM_BASE_URL) is required.")
+        return OpenAICompatibleProvider(
+            base_url=base_url,
+            api_key=os.getenv(config.get("api_key_env") or "LLM_API_KEY"),
+            client_config=client_config,
+            transport=transport,
+        )
+    raise ValueError(f"Unknown llm.provider {name!r}; expected one of {PROVIDERS}.")
@@ -0,0 +1,340 @@
+"""
+Deadlines, retries, hedging and a circuit breaker around an LLM provider.
+
+`ResilientProvider` wraps any `LLMProvider` (configured under `resilience` in
+llm.yaml):
+
+- every call has a total deadline (`deadline_seconds`) and each attempt its
+  own timeout (`attempt_timeout_seconds`); running out answers 504;
+- retryable failures (timeouts, connection errors, 429 and 5xx) are retried
+  up to `max_retries` times with exponential backoff and full jitter;
+- with hedging on, a non-streamed call still running after the observed p95
+  latency gets a duplicate request; the first successful response wins;
+- the circuit breaker opens when the error rate of the last `window` attempts
+  reaches `error_rate_threshold`, and fails calls fast with 503 for
+  `open_seconds`. After that, one probe call decides whether it closes again.
+
+Streamed calls are retried only until the first token is emitted and are not
+hedged, so a user never sees duplicated text.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import httpx
+import numpy as np
+from huggingface_hub import ChatCompletionOutput
+
+from app.llm.admission import LLMUnavailable
+from app.llm.providers import LLMProvider
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class DeadlineExceeded(LLMUnavailable):
+    def __init__(self, deadline: float):
+        super().__init__(504, f"LLM call exceeded its {deadline:g}s deadline", 1)
+
+
+class CircuitOpen(LLMUnavailable):
+    def __init__(self, retry_after: int):
+        super().__init__(503, "LLM provider circuit is open", retry_after)
+
+
+def retryable(error: BaseException) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        error_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> None:
+        """Raise CircuitOpen unless a call may go to the provider now."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - self._clock()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpen(max(1, math.ceil(remaining)))
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpen(1)
+                self._probing = True
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if success:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.error_rate_threshold
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self.opened += 1
+        print(f"LLM circuit opened for {self.open_seconds:g}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "state": self.state,
+                "error_rate": round(outcomes.count(False) / len(outcomes), 4) if outcomes else 0.0,
+                "opened": self.opened,
+                "fast_failures": self.rejected,
+            }
+
+
+class ResilientProvider(LLMProvider):
+    def __init__(
+        self,
+        provider: LLMProvider,
+        deadline_seconds: float = 45.0,
+        attempt_timeout_seconds: float = 20.0,
+        max_retries: int = 2,
+        backoff_base_seconds: float = 0.25,
+        backoff_max_seconds: float = 4.0,
+        hedging: bool = False,
+        hedge_min_samples: int = 20,
+        hedge_min_delay_seconds: float = 0.5,
+        breaker: Optional[CircuitBreaker] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.provider = provider
+        self.name = provider.name
+        self.deadline = deadline_seconds
+        self.attempt_timeout = attempt_timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base_seconds
+        self.backoff_max = backoff_max_seconds
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=500)
+        self._calls = 0
+        self._attempts = 0
+        self._retries = 0
+        self._failures = 0
+        self._deadlines = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    @classmethod
+    def from_config(cls, provider: LLMProvider, config: Dict[str, Any]) -> "ResilientProvider":
+        breaker = config.get("circuit_breaker", {})
+        hedging = config.get("hedging", {})
+        return cls(
+            provider,
+            deadline_seconds=config.get("deadline_seconds", 45.0),
+            attempt_timeout_seconds=config.get("attempt_timeout_seconds", 20.0),
+            max_retries=config.get("max_retries", 2),
+            backoff_base_seconds=config.get("backoff_base_seconds", 0.25),
+            backoff_max_seconds=config.get("backoff_max_seconds", 4.0),
+            hedging=hedging.get("enabled", False),
+            hedge_min_samples=hedging.get("min_samples", 20),
+            hedge_min_delay_seconds=hedging.get("min_delay_seconds", 0.5),
+            breaker=CircuitBreaker(
+                window=breaker.get("window", 20),
+                min_calls=breaker.get("min_calls", 10),
+                error_rate_threshold=breaker.get("error_rate_threshold", 0.5),
+                open_seconds=breaker.get("open_seconds", 30.0),
+            ),
+        )
+
+    @property
+    def identity(self) -> str:
+        return self.provider.identity
+
+    def request_body(self, model: str, prompt: str, params: Dict[str, Any], tools) -> Dict[str, Any]:
+        return self.provider.request_body(model, prompt, params, tools)
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2**retry)]."""
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent successful calls, once there are enough samples."""
+        with self._lock:
+            samples = list(self._latencies)
+        if not self.hedging or len(samples) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, float(np.percentile(samples, 95)))
+
+    async def _attempt(self, call: Callable[[], Any], timeout: float) -> ChatCompletionOutput:
+        self.breaker.allow()
+        with self._lock:
+            self._attempts += 1
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(), timeout)
+        except Exception as e:
+            # Client-side errors (bad request, auth) say nothing about provider health
+            self.breaker.record(not retryable(e))
+            raise
+        self.breaker.record(True)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _hedged(self, call: Callable[[], Any], timeout: float) -> ChatCompletionOutput:
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(self._attempt(call, timeout))
+        if delay is None or delay >= timeout:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        with self._lock:
+            self._hedges += 1
+        # The duplicate shares the original attempt's timeout
+        second = asyncio.ensure_future(self._attempt(call, max(timeout - delay, 0.001)))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            with self._lock:
+                                self._hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _run(self, call: Callable[[], Any], hedge: bool, retry_allowed: Callable[[], bool]):
+        deadline = time.monotonic() + self.deadline
+        with self._lock:
+            self._calls += 1
+        retry = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self._deadlines += 1
+                raise DeadlineExceeded(self.deadline)
+            timeout = min(self.attempt_timeout, remaining)
+            try:
+                if hedge:
+                    return await self._hedged(call, timeout)
+                return await self._attempt(call, timeout)
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                # An attempt cut short by the overall deadline ends the call
+                deadline_hit = isinstance(e, asyncio.TimeoutError) and timeout >= remaining
+                pause = self.backoff(retry)
+                if (
+                    deadline_hit
+                    or not retryable(e)
+                    or retry >= self.max_retries
+                    or not retry_allowed()
+                    or time.monotonic() + pause >= deadline
+                ):
+                    with self._lock:
+                        self._failures += 1
+                        self._deadlines += deadline_hit
+                    if deadline_hit:
+                        raise DeadlineExceeded(self.deadline) from e
+                    raise
+                retry += 1
+                with self._lock:
+                    self._retries += 1
+                print(f"LLM call failed ({type(e).__name__}: {e}); retry {retry} in {pause:.2f}s")
+                await asyncio.sleep(pause)
+
+    async def generate(self, model: str, prompt: str, params: Dict[str, Any], tools) -> ChatCompletionOutput:
+        return await self._run(
+            lambda: self.provider.generate(model, prompt, params, tools),
+            hedge=True,
+            retry_allowed=lambda: True,
+        )
+
+    async def generate_stream(
+        self,
+        model: str,
+        prompt: str,
+        params: Dict[str, Any],
+        tools,
+        on_token: Callable[[str], Any],
+    ) -> ChatCompletionOutput:
+        emitted = []
+
+        def forward(token: str) -> None:
+            emitted.append(token)
+            on_token(token)
+
+        return await self._run(
+            lambda: self.provider.generate_stream(model, prompt, params, tools, forward),
+            hedge=False,
+            retry_allowed=lambda: not emitted,
+        )
+
+    async def warmup(self, model: str) -> None:
+        await self.provider.warmup(model)
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._latencies)
+            stats = {
+                "calls": self._calls,
+                "attempts": self._attempts,
+                "retries": self._retries,
+                "failures": self._failures,
+                "deadline_exceeded": self._deadlines,
+                "hedging": self.hedging,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "latency_p95_seconds": round(float(np.percentile(samples, 95)), 3) if samples else 0.0,
+            }
+        stats["circuit"] = self.breaker.stats()
+        return stats
@@ -0,0 +1,151 @@
+"""
+Lightweight OpenAI-compatible chat server for local benchmarks and tests.
+
+Answers `/v1/chat/completions` (plain and streamed) with a canned reply after a
+configurable latency, so the chat orchestration overhead can be measured
+without a real model. Point the app at it with `provider: openai_compatible`.
+
+Usage:
+    python -m app.llm.stub_server [--port 8081] [--latency-ms 0] [--token-delay-ms 0] [--tool-calls]
+                                  [--error-rate 0] [--error-status 503] [--fail-first 0]
+                                  [--slow-first 0] [--slow-latency-ms 0] [--seed N]
+
+With --tool-calls the first turn calls `query_knowledge_base` (when the request
+offers tools), and the turn after a tool result answers, like the real flow.
+
+Fault injection, for exercising retries, hedging and the circuit breaker: the
+first `--fail-first` requests fail with `--error-status`, later ones fail with
+probability `--error-rate`, and the first `--slow-first` requests wait an
+extra `--slow-latency-ms`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANSWER = "Please restart the device and tell me if the problem persists."
+
+
+def _tool_call(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A knowledge-base tool call for the last user line, if the tool is offered."""
+    prompt = body["messages"][-1]["content"]
+    if "TOOL-CALL-OUTPUT" in prompt:
+        return None
+    for tool in body.get("tools") or []:
+        function = tool.get("function", {})
+        if function.get("name") != "query_knowledge_base":
+            continue
+        categories = function.get("parameters", {}).get("properties", {}).get("type_issue", {}).get("enum") or [""]
+        users = [line[len("USER: "):] for line in prompt.splitlines() if line.startswith("USER: ")]
+        arguments = {"query": users[-1] if users else prompt[-200:], "type_issue": categories[0]}
+        return {
+            "id": f"call-{uuid.uuid4().hex[:8]}",
+            "type": "function",
+            "function": {"name": "query_knowledge_base", "arguments": json.dumps(arguments)},
+        }
+    return None
+
+
+def create_stub_app(
+    latency_ms: float = 0.0,
+    token_delay_ms: float = 0.0,
+    answer: str = DEFAULT_ANSWER,
+    tool_calls: bool = False,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    fail_first: int = 0,
+    slow_first: int = 0,
+    slow_latency_ms: float = 0.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """Build the stub app; `app.state.requests` keeps every request body received."""
+    app = FastAPI(title="LLM stub")
+    app.state.requests: List[Dict[str, Any]] = []
+    rng = random.Random(seed)
+
+    def envelope(body: Dict[str, Any], **choice: Any) -> Dict[str, Any]:
+        return {
+            "id": f"stub-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion.chunk" if "delta" in choice else "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, **choice}],
+        }
+
+    @app.get("/v1/models")
+    async def models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests.append(body)
+        number = len(app.state.requests)
+        delay = latency_ms + (slow_latency_ms if number <= slow_first else 0.0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if number <= fail_first or (error_rate and rng.random() < error_rate):
+            return JSONResponse({"error": {"message": "injected fault"}}, status_code=error_status)
+        call = _tool_call(body) if tool_calls else None
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": None if call else answer}
+            if call:
+                message["tool_calls"] = [call]
+            result = envelope(body, message=message, finish_reason="tool_calls" if call else "stop")
+            result["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            return JSONResponse(result)
+
+        async def events():
+            if call:
+                delta = {"role": "assistant", "tool_calls": [{**call, "index": 0}]}
+                yield f"data: {json.dumps(envelope(body, delta=delta, finish_reason=None))}\n\n"
+            else:
+                for i, word in enumerate(answer.split(" ")):
+                    if token_delay_ms:
+                        await asyncio.sleep(token_delay_ms / 1000)
+                    delta = {"content": word if i == 0 else f" {word}"}
+                    yield f"data: {json.dumps(envelope(body, delta=delta, finish_reason=None))}\n\n"
+            done = envelope(body, delta={}, finish_reason="tool_calls" if call else "stop")
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before responding")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="delay between streamed tokens")
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    parser.add_argument("--tool-calls", action="store_true")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--fail-first", type=int, default=0, help="fail the first N requests")
+    parser.add_argument("--slow-first", type=int, default=0, help="slow down the first N requests")
+    parser.add_argument("--slow-latency-ms", type=float, default=0.0, help="extra delay for slowed requests")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    app = create_stub_app(
+        args.latency_ms, args.token_delay_ms, args.answer, args.tool_calls,
+        error_rate=args.error_rate, error_status=args.error_status, fail_first=args.fail_first,
+        slow_first=args.slow_first, slow_latency_ms=args.slow_latency_ms, seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
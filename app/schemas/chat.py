@@ -10,6 +10,8 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     user_id: str
     messages: List[Message] = Field(default_factory=list)
+    # False forces fresh LLM completions for this request
+    use_cache: bool = True
 
 class ChatResponse(BaseModel):
     user_id: str 
@@ -0,0 +1,146 @@
+"""
+Semantic cache of first-turn answers.
+
+Opening messages are often paraphrases of the same issue ("printer says paper
+jam but there's none"). After a first turn ends in a validated answer (the LLM
+answered from retrieved KB or guide content), the opening message's embedding
+is stored with the messages that turn produced. A later opening message whose
+embedding is at least `similarity_threshold` cosine-similar, with the same
+ticket state, replays those messages and skips both LLM calls and retrieval.
+
+The category is only known after the LLM classifies the message, so an entry
+keeps the category its answer was retrieved under and only matches while that
+category still exists. Entries expire after `ttl_seconds` and are dropped
+whenever indexing changes the KB or guide collections.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.lru_cache import LRUCache
+from app.utils.yaml_loader import load_yaml
+
+
+def ticket_state(tickets: Any) -> str:
+    """Coarse ticket state an answer depends on: none, open or closed."""
+    if not isinstance(tickets, list) or not tickets:
+        return "none"
+    if any(str(ticket.get("status", "")).lower() == "open" for ticket in tickets):
+        return "open"
+    return "closed"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        capacity: int = 1024,
+        ttl_seconds: float = 86400,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.similarity_threshold = similarity_threshold
+        self._entries = LRUCache(capacity)
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._invalidations = 0
+        self._hit_similarities: List[float] = []
+
+    @classmethod
+    def from_config(cls) -> "SemanticAnswerCache":
+        config = load_yaml("llm.yaml").get("llm", {}).get("answer_cache", {})
+        return cls(
+            similarity_threshold=config.get("similarity_threshold", 0.92),
+            capacity=config.get("max_entries", 1024),
+            ttl_seconds=config.get("ttl_seconds", 86400),
+            enabled=config.get("enabled", True),
+        )
+
+    @staticmethod
+    def _unit(vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(
+        self, vector: Any, state: str, categories: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Best live entry for `vector` in `state` above the threshold, or None."""
+        query = self._unit(vector)
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e["expires_at"] <= now]:
+                del self._entries[key]
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry["state"] == state and entry["category"] in categories
+                and entry["vector"].shape == query.shape
+            ]
+            best, best_similarity = None, -1.0
+            if candidates:
+                similarities = np.stack([e["vector"] for _, e in candidates]) @ query
+                index = int(np.argmax(similarities))
+                best, best_similarity = candidates[index], float(similarities[index])
+            if best is None or best_similarity < self.similarity_threshold:
+                self._misses += 1
+                return None
+            key, entry = best
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._hit_similarities.append(best_similarity)
+            del self._hit_similarities[:-1024]
+            return {**entry, "similarity": best_similarity}
+
+    def store(
+        self, text: str, vector: Any, state: str, category: str, messages: List[Dict[str, Any]]
+    ) -> None:
+        with self._lock:
+            self._stores += 1
+            self._entries.put(f"{state}\x00{normalize(text)}", {
+                "text": text,
+                "vector": self._unit(vector),
+                "state": state,
+                "category": category,
+                "messages": messages,
+                "expires_at": self._clock() + self._ttl,
+            })
+
+    def invalidate(self) -> None:
+        """Drop every entry (the indexed content behind the answers changed)."""
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "invalidations": self._invalidations,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                # A hit skips the tool-selecting and the answering LLM call
+                "llm_calls_saved": 2 * self._hits,
+                "avg_hit_similarity": round(float(np.mean(self._hit_similarities)), 4)
+                if self._hit_similarities else 0.0,
+            }
+
+
+answer_cache = SemanticAnswerCache.from_config()
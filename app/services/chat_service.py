@@ -1,12 +1,28 @@
-from app.schemas.chat import ChatRequest, ChatResponse
-from app.llm.hf_client import HFClient
-from app.services.prompt import build_prompt
+import asyncio
+import inspect
+import json
+import time
+
+from huggingface_hub import ChatCompletionOutput
+
+from app.db.vector_registry import get_vector_registry
+from app.schemas.chat import ChatRequest, ChatResponse, Message
+from app.llm.admission import admission
+from app.llm.providers import create_provider
+from app.llm.resilience import ResilientProvider
+from app.services.chat_stream import emit, streaming
+from app.services.answer_cache import answer_cache, ticket_state
+from app.services.prompt import build_prompt, load_tickets, prepare_history
 from app.services.tools import get_tools
 from app.services.tool_dispatcher import handle_tool_call
-from app.utils.yaml_loader import load_yaml
+from app.utils.completion_cache import CompletionCache, completion_key
+from app.utils.yaml_loader import BASE_DIR, load_yaml
 
-llm_client = HFClient()
 llm_config = load_yaml("llm.yaml")
+llm_client = create_provider(llm_config.get("llm"))
+resilience_config = llm_config.get("llm").get("resilience", {})
+if resilience_config.get("enabled", True):
+    llm_client = ResilientProvider.from_config(llm_client, resilience_config)
 model = llm_config.get("llm").get("default_model")
 params = llm_config.get("llm").get("params", {})
 params = {
@@ -16,19 +32,172 @@ params = {
     "return_full_text": False,
 }
 
+cache_config = llm_config.get("llm").get("completion_cache", {})
+completion_cache = None
+if cache_config.get("enabled", True):
+    cache_path = cache_config.get("path")
+    completion_cache = CompletionCache(
+        capacity=cache_config.get("max_entries", 512),
+        ttl_seconds=cache_config.get("ttl_seconds", 3600),
+        path=BASE_DIR.parent / cache_path if cache_path else None,
+    )
+
+
+async def complete(req: ChatRequest, prompt: str, tools) -> ChatCompletionOutput:
+    """Call the LLM (streamed inside /chat/stream), going through the completion cache."""
+    key = None
+    if completion_cache is not None:
+        if req.use_cache:
+            key = completion_key(
+                llm_client.identity, llm_client.request_body(model, prompt, params, tools)
+            )
+            cached = completion_cache.get(key)
+            if cached is not None:
+                completion = ChatCompletionOutput.parse_obj_as_instance(cached)
+                content = completion.choices[0].message.content
+                if content:
+                    emit("token", {"content": content})
+                return completion
+        else:
+            completion_cache.bypass()
+
+    # Raises AdmissionRejected when the LLM queue is saturated
+    async with admission.slot():
+        start = time.perf_counter()
+        if streaming():
+            completion = await llm_client.generate_stream(
+                model=model, prompt=prompt, params=params, tools=tools,
+                on_token=lambda token: emit("token", {"content": token}),
+            )
+        else:
+            completion = await llm_client.generate(model=model, prompt=prompt, params=params, tools=tools)
+    if key is not None:
+        completion_cache.put(key, completion, time.perf_counter() - start)
+    return completion
+
+
+# Tools whose answers are grounded in indexed content and may be reused
+ANSWER_CACHE_TOOLS = {"query_knowledge_base", "query_issue_guide"}
+
+
+async def embed_opening(text: str):
+    """Query embedding of an opening message (shares the query embedding cache)."""
+    return await get_vector_registry().get_async_collection("kb_collection").encode_query(text)
+
+
+def opening_message(req: ChatRequest, attempts: int):
+    """The user's message when this is the first turn of a conversation, else None."""
+    if attempts or not answer_cache.enabled or not req.use_cache:
+        return None
+    if len(req.messages) != 1 or req.messages[0].role != "user":
+        return None
+    return req.messages[0].content
+
+
+def validated_answer(response: ChatResponse, opening_count: int):
+    """Messages of a first turn that ended in an LLM answer over retrieved content."""
+    added = (response.messages or [])[opening_count:]
+    if len(added) >= 2 and added[-1].role == "assistant" and added[-2].role == "tool-call-output":
+        return [m.model_dump() for m in added]
+    return None
+
+
+class StageTimings:
+    """Wall-clock time of each process_chat stage, printed with the request log."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    async def run(self, name: str, call, *args, blocking: bool = False):
+        """Run one stage; `blocking` calls go to a worker thread."""
+        start = time.perf_counter()
+        try:
+            if blocking:
+                return await asyncio.to_thread(call, *args)
+            result = call(*args)
+            return await result if inspect.isawaitable(result) else result
+        finally:
+            self.stages[name] = (time.perf_counter() - start) * 1000
+
+    def mark(self, name: str) -> None:
+        """Record the time from the start of the request to this point."""
+        self.stages[name] = (time.perf_counter() - self.start) * 1000
+
+    def log(self, user_id: str) -> None:
+        breakdown = ", ".join(f"{name}={ms:.1f}ms" for name, ms in self.stages.items())
+        print(f"Chat stages for {user_id}: {breakdown}")
+
+
+async def embed_opening_safely(opening):
+    if opening is None:
+        return None
+    try:
+        return await embed_opening(opening)
+    except Exception as e:
+        print(f"Answer cache skipped, could not embed the opening message: {e}")
+        return None
+
+
 async def process_chat(req: ChatRequest, categories: list[str], attempts: int = 0) -> ChatResponse:
     """
     Orchestrates the chat flow: builds prompt, calls LLM, dispatches tool calls,
     and returns a structured ChatResponse with user_id preserved.
+
+    The stages before the LLM call that do not depend on each other (ticket
+    fetch, opening-message embedding, tool schemas, history preparation) run
+    concurrently, so the time to the LLM call is about that of the slowest one.
     """
-    prompt = build_prompt([m.dict() for m in req.messages], req.user_id, categories=categories)
-    tools = get_tools(categories)
+    timings = StageTimings()
+    try:
+        return await _process_chat(req, categories, attempts, timings)
+    finally:
+        timings.log(req.user_id)
+
+
+async def _process_chat(
+    req: ChatRequest, categories: list[str], attempts: int, timings: StageTimings
+) -> ChatResponse:
+    opening = opening_message(req, attempts)
+    def prepare_messages():
+        messages = [m.model_dump() for m in req.messages]
+        return messages, prepare_history(messages)
+
+    tickets, vector, tools, (messages, history) = await asyncio.gather(
+        timings.run("tickets", load_tickets, req.user_id, blocking=True),
+        timings.run("embed_opening", embed_opening_safely, opening),
+        timings.run("tools", get_tools, categories),
+        timings.run("history", prepare_messages),
+    )
+
+    state = ticket_state(tickets)
+    if vector is not None:
+        hit = answer_cache.lookup(vector, state, categories)
+        if hit is not None:
+            print(f"Answer cache hit ({hit['similarity']:.3f}): {hit['text']!r}")
+            emit("status", {"stage": "answer_cache", "similarity": round(hit["similarity"], 4)})
+            messages = [Message(**m) for m in hit["messages"]]
+            emit("token", {"content": messages[-1].content})
+            timings.mark("answer_cache_hit")
+            return ChatResponse(user_id=req.user_id, messages=req.messages + messages)
+
+    prompt = await timings.run("prompt", build_prompt, messages, req.user_id, categories, tickets, history)
+    timings.mark("time_to_llm")
 
-    completion = llm_client.generate(model=model, prompt=prompt, params=params, tools=tools)
+    completion = await timings.run("llm", complete, req, prompt, tools)
     message = completion.choices[0].message
 
     if message.tool_calls:
         # Make sure handle_tool_call also returns ChatResponse with user_id
-        return await handle_tool_call(req, categories, message.tool_calls, attempts)
+        response = await timings.run(
+            "tool_call", handle_tool_call, req, categories, message.tool_calls, attempts,
+        )
+        call = message.tool_calls[0].function
+        if vector is not None and call.name in ANSWER_CACHE_TOOLS:
+            answer = validated_answer(response, 1)
+            category = json.loads(call.arguments).get("type_issue")
+            if answer is not None and category:
+                answer_cache.store(opening, vector, state, category, answer)
+        return response
 
     return ChatResponse(user_id=req.user_id, messages=req.messages + [message])
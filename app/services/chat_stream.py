@@ -0,0 +1,130 @@
+"""
+Server-sent events for `POST /chat/stream`.
+
+`stream_chat` runs the normal `process_chat` flow as a task with an event
+queue bound to the request's context. While the queue is bound, the chat flow
+streams LLM completions and reports each token and tool call to it:
+
+    event: status   {"stage": "started"} / {"stage": "tool", "tool": ..., "arguments": ...}
+    event: token    {"content": "..."}
+    event: final    ChatResponse
+    event: error    {"detail": "Chat failed", "error": "<exception type>"}
+                    or {"detail": ..., "status": 429|503|504, "retry_after": seconds} when the LLM is unavailable
+
+Time-to-first-token is measured from the start of the request to the first
+token event and exported under `chat_stream` in `/metrics`.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.llm.admission import LLMUnavailable
+from app.schemas.chat import ChatRequest
+
+_events: ContextVar[Optional["asyncio.Queue[Optional[Tuple[str, Any]]]"]] = ContextVar(
+    "chat_stream_events", default=None
+)
+
+
+def streaming() -> bool:
+    """True inside a `/chat/stream` request."""
+    return _events.get() is not None
+
+
+def emit(event: str, data: Any) -> None:
+    """Send an event to the current stream; a no-op outside one."""
+    queue = _events.get()
+    if queue is not None:
+        queue.put_nowait((event, data))
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class StreamStats:
+    """Time-to-first-token and stream counters."""
+
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self._ttft_ms: Deque[float] = deque(maxlen=window)
+        self.streams = 0
+        self.without_tokens = 0
+        self.errors = 0
+
+    def record(self, ttft_seconds: Optional[float], failed: bool) -> None:
+        with self._lock:
+            self.streams += 1
+            if ttft_seconds is None:
+                self.without_tokens += 1
+            else:
+                self._ttft_ms.append(ttft_seconds * 1000)
+            if failed:
+                self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._ttft_ms)
+            return {
+                "streams": self.streams,
+                # e.g. canned answers from a tool handler that skip the LLM
+                "streams_without_tokens": self.without_tokens,
+                "errors": self.errors,
+                "ttft_ms": {
+                    "avg": round(sum(samples) / len(samples), 3) if samples else 0.0,
+                    "p50": round(float(np.percentile(samples, 50)), 3) if samples else 0.0,
+                    "p99": round(float(np.percentile(samples, 99)), 3) if samples else 0.0,
+                },
+            }
+
+
+stream_stats = StreamStats()
+
+
+async def stream_chat(req: ChatRequest, categories: list[str]) -> AsyncIterator[str]:
+    """Run the chat flow and yield its events as SSE frames."""
+    from app.services.chat_service import process_chat
+
+    start = time.perf_counter()
+    queue: "asyncio.Queue[Optional[Tuple[str, Any]]]" = asyncio.Queue()
+    bound = _events.set(queue)
+    try:
+        # The task copies the current context, so the chat flow sees the queue
+        task = asyncio.create_task(process_chat(req, categories))
+    finally:
+        _events.reset(bound)
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    ttft, failed = None, False
+    try:
+        yield format_sse("status", {"stage": "started"})
+        while (item := await queue.get()) is not None:
+            event, data = item
+            if event == "token" and ttft is None:
+                ttft = time.perf_counter() - start
+            yield format_sse(event, data)
+        try:
+            response = task.result()
+        except LLMUnavailable as e:
+            failed = True
+            yield format_sse("error", {
+                "detail": e.reason, "status": e.status_code, "retry_after": e.retry_after,
+            })
+        except Exception as e:
+            failed = True
+            print(f"Chat stream failed: {e}")
+            yield format_sse("error", {"detail": "Chat failed", "error": type(e).__name__})
+        else:
+            yield format_sse("final", response.model_dump())
+    finally:
+        # Client went away: stop generating
+        if not task.done():
+            task.cancel()
+        stream_stats.record(ttft, failed)
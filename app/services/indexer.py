@@ -1,8 +1,41 @@
+import asyncio
+import time
 from fastapi import FastAPI
-from app.db.qdrant_client import QdrantWrapper
-from app.utils.yaml_loader import load_yaml
+from app.db.vector_registry import get_vector_registry
 from app.db.database_client import fetch_kb_data, fetch_guide_data
-from typing import List, Dict
+from app.db.qdrant_client import document_text
+from app.services.answer_cache import answer_cache
+from app.services.keyword_index import keyword_index
+from app.services.parallel_embedding import embed_in_processes
+from typing import Any, List, Dict, Optional, Tuple
+
+# Fields embedded and stored per collection
+KB_TEXT_FIELDS = ["question", "answer"]
+KB_PAYLOAD_FIELDS = ["category", "issue_code", "answer", "question"]
+GUIDE_TEXT_FIELDS = ["issue", "resolution_steps"]
+GUIDE_PAYLOAD_FIELDS = [
+    "category",
+    "issue_code",
+    "issue",
+    "troubleshooting_steps",
+    "quick_fixes",
+    "escalation_criteria",
+    "diagnostic_questions",
+]
+
+
+def validate_collection(wrapper, documents: List[Dict], text_fields: List[str], expected: int):
+    """Check a freshly built version before it goes live; raises ValueError."""
+    count = wrapper.backend.count(wrapper.collection_name)
+    if count != expected:
+        raise ValueError(
+            f"{wrapper.collection_name} holds {count} points, expected {expected}"
+        )
+    probe = next((doc for doc in documents if doc.get("category")), None)
+    if probe is not None and not wrapper.query(
+        document_text(probe, text_fields), "category", probe["category"], 1
+    ):
+        raise ValueError(f"{wrapper.collection_name} returned no hits for a known document")
 
 
 def index_collection(
@@ -10,63 +43,166 @@ def index_collection(
     data: List[Dict],
     text_fields: List[str],
     payload_fields: List[str],
-    embedding: dict
+    force: bool = False,
 ):
-    """Helper function to index a single collection in Qdrant."""
-    indexer = QdrantWrapper(
-        collection_name=collection_name,
-        embedding_model=embedding.get('embedding_model', {}).get('default_model'),
-        embedding_dim=embedding.get("embedding_model", {}).get("params", {}).get("embedding_dim", 768)
-    )
+    """
+    Helper function to index a single collection in Qdrant. When the source
+    differs from the live version (or `force` is set), a new version is built,
+    validated and swapped in behind the alias; an empty live version is filled
+    in place. Returns a report, or None on failure.
+    """
+    registry = get_vector_registry()
+    live = registry.get_collection(collection_name)
+    versions = registry.versions(collection_name)
     try:
-        indexer.upsert_documents(
-            documents=[{k: v for k, v in d.items()} for d in data],
-            text_fields=text_fields,
-            payload_fields=payload_fields
+        keyed, changed, removed = live.plan_sync(
+            data, text_fields, payload_fields,
+            registry.indexing_params.get("encode_batch_size", 64),
         )
-        print(f"✅ {collection_name} indexed successfully")
+        current = versions.live()
+        report: Dict[str, Any] = {
+            "documents": len(keyed),
+            "changed": len(changed),
+            "removed": len(removed),
+            "version": current or collection_name,
+            "rebuilt": False,
+        }
+        if current is not None and live.backend.count(current) == 0:
+            # Nothing has been served from this version yet; fill it in place
+            report["sync"] = live.sync_documents(
+                documents=data,
+                text_fields=text_fields,
+                payload_fields=payload_fields,
+                plan=(keyed, changed, removed),
+                **registry.upload_params,
+            )
+        elif changed or removed or force:
+            target = versions.next_name()
+            staged = registry.open_version(collection_name, target)
+            try:
+                # A new version starts empty: every document goes in, nothing to delete
+                report["sync"] = staged.sync_documents(
+                    documents=data,
+                    text_fields=text_fields,
+                    payload_fields=payload_fields,
+                    plan=(keyed, keyed, []),
+                    **registry.upload_params,
+                )
+                validate_collection(staged, data, text_fields, len(keyed))
+            except Exception:
+                versions.drop(target)
+                raise
+            versions.promote(target)
+            report.update(
+                version=target,
+                previous=current,
+                rebuilt=True,
+                collected=versions.collect_garbage(registry.keep_versions),
+            )
+        print(f"✅ {collection_name} indexed successfully ({report['version']})")
     except Exception as e:
         print(f"Error indexing {collection_name}: {e}")
-        return False
-    return True
+        return None
+    return report
+
 
+def content_changed(report: Dict[str, Any]) -> bool:
+    return bool(report.get("changed") or report.get("removed") or report.get("rebuilt"))
 
-async def index_documents(app: FastAPI) -> List[str]:
-    kb_data = fetch_kb_data()
-    guide_data = fetch_guide_data()
+
+async def _timed(stage: str, timings: Dict[str, float], func, *args):
+    """Run blocking `func` in a worker thread and record how long it took."""
+    start = time.perf_counter()
+    try:
+        return await asyncio.to_thread(func, *args)
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 3)
+
+
+def pre_embed(sources: List[Tuple[List[Dict], List[str]]]) -> Optional[Dict[str, Any]]:
+    """Encode every document text missing from the embedding store on a process pool."""
+    registry = get_vector_registry()
+    store = registry.get_embedding_store()
+    if store is None:
+        return None
+    params = registry.indexing_params
+    texts = [document_text(doc, fields) for data, fields in sources for doc in data]
+    try:
+        return embed_in_processes(
+            store,
+            registry.default_model,
+            registry.encoder_config,
+            texts,
+            workers=params.get("embed_workers", 2),
+            batch_size=params.get("encode_batch_size", 64),
+            min_texts_per_worker=params.get("min_texts_per_worker", 256),
+        )
+    except Exception as e:
+        # Whatever is still missing gets encoded in-process by the index stage
+        print(f"Parallel embedding failed, falling back to in-process encoding: {e}")
+        return None
+
+
+async def index_documents(
+    app: FastAPI, state: Optional[Any] = None, force: bool = False
+) -> List[str]:
+    """
+    Fetch KB and guide data concurrently, then sync both collections in
+    parallel. Blocking work runs in worker threads (and new embeddings on a
+    process pool) so the event loop keeps serving; progress and per-stage
+    timings are reported to `state` (see app/services/startup.py) when given.
+    `force` rebuilds both collections even if nothing changed.
+    """
+    enter = state.enter if state is not None else lambda stage: None
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    enter("fetching KB and guide data")
+    kb_data, guide_data = await asyncio.gather(
+        _timed("fetch kb", timings, fetch_kb_data),
+        _timed("fetch guide", timings, fetch_guide_data),
+    )
 
     if not kb_data and not guide_data:
         return []
 
-    embedding = load_yaml("embedding.yaml")
+    # Exact-match fast path over issue codes and KB questions / guide issues
+    keyword_index.build("kb_collection", kb_data, "question", KB_PAYLOAD_FIELDS)
+    keyword_index.build("guide_collection", guide_data, "issue", GUIDE_PAYLOAD_FIELDS)
 
-    # Index KB
-    if kb_data:
-        index_collection(
-            collection_name="kb_collection",
-            data=kb_data,
-            text_fields=["question", "answer"],
-            payload_fields=["category", "issue_code", "answer", "question"],
-            embedding=embedding
-        )
+    sources = [
+        ("kb_collection", kb_data, KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS),
+        ("guide_collection", guide_data, GUIDE_TEXT_FIELDS, GUIDE_PAYLOAD_FIELDS),
+    ]
+    sources = [source for source in sources if source[1]]
 
-    # Index Guides
-    if guide_data:
-        index_collection(
-            collection_name="guide_collection",
-            data=guide_data,
-            text_fields=["issue", "resolution_steps"],
-            payload_fields=[
-                "category",
-                "issue_code",
-                "issue",
-                "troubleshooting_steps",
-                "quick_fixes",
-                "escalation_criteria",
-                "diagnostic_questions",
-            ],
-            embedding=embedding
+    enter("embedding new documents")
+    await _timed(
+        "embed", timings, pre_embed, [(data, fields) for _, data, fields, _ in sources]
+    )
+
+    enter("indexing collections")
+    reports = await asyncio.gather(*[
+        _timed(
+            f"index {collection_name}", timings, index_collection,
+            collection_name, data, text_fields, payload_fields, force,
         )
+        for collection_name, data, text_fields, payload_fields in sources
+    ])
+    for (collection_name, *_), report in zip(sources, reports):
+        if report is None:
+            raise RuntimeError(f"Indexing {collection_name} failed")
+        if state is not None:
+            state.collection_done(collection_name, report)
+    if any(content_changed(report) for report in reports):
+        # Cached answers were built on the previous KB / guide content
+        answer_cache.invalidate()
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    if state is not None:
+        for stage, seconds in timings.items():
+            state.record(stage, seconds)
+    print("Indexing stages: " + ", ".join(f"{k} {v}s" for k, v in timings.items()))
 
     # Return combined unique categories
     kb_categories = {item["category"] for item in kb_data}
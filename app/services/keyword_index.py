@@ -0,0 +1,137 @@
+"""
+Exact-match fast path in front of dense retrieval.
+
+An in-memory inverted index over `issue_code` values and the normalized KB
+questions / guide issues. When a query names an issue code, or contains one of
+those phrases word for word, the matching entries are returned immediately
+without encoding the query or calling the vector store.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from qdrant_client.models import ScoredPoint
+
+ISSUE_CODE_PATTERN = re.compile(r"\b[A-Za-z]{2,4}-\d{2,4}\b")
+# Phrases shorter than this are too generic to count as an exact match
+MIN_PHRASE_TOKENS = 3
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class KeywordIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # collection -> issue code -> entry ids
+        self._codes: Dict[str, Dict[str, Set[int]]] = {}
+        # collection -> token -> entry ids
+        self._tokens: Dict[str, Dict[str, Set[int]]] = {}
+        # collection -> entry id -> (normalized phrase, token count, payload)
+        self._entries: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        self._lookups = 0
+        self._bypasses = 0
+        self._lookup_seconds = 0.0
+        self._fallback_seconds = 0.0
+
+    def build(
+        self,
+        collection_name: str,
+        documents: Iterable[Dict],
+        phrase_field: str,
+        payload_fields: List[str],
+    ) -> None:
+        """(Re)build the index for one collection from its source documents."""
+        codes: Dict[str, Set[int]] = defaultdict(set)
+        tokens: Dict[str, Set[int]] = defaultdict(set)
+        entries: List[Tuple[str, int, Dict[str, Any]]] = []
+        for doc in documents:
+            entry_id = len(entries)
+            phrase = normalize(str(doc.get(phrase_field, "")))
+            phrase_tokens = set(phrase.split())
+            entries.append((
+                phrase,
+                len(phrase_tokens),
+                {k: doc[k] for k in payload_fields if k in doc},
+            ))
+            if doc.get("issue_code"):
+                codes[str(doc["issue_code"]).upper()].add(entry_id)
+            if len(phrase_tokens) >= MIN_PHRASE_TOKENS:
+                for token in phrase_tokens:
+                    tokens[token].add(entry_id)
+        with self._lock:
+            self._codes[collection_name] = dict(codes)
+            self._tokens[collection_name] = dict(tokens)
+            self._entries[collection_name] = entries
+
+    def _match(self, collection_name: str, query: str) -> List[int]:
+        entries = self._entries.get(collection_name, [])
+        codes = self._codes.get(collection_name, {})
+        matched: List[int] = []
+        for code in ISSUE_CODE_PATTERN.findall(query):
+            matched.extend(sorted(codes.get(code.upper(), ())))
+        if matched:
+            return matched
+
+        # An entry matches when every one of its tokens is in the query and the
+        # phrase appears verbatim in the normalized query
+        normalized = normalize(query)
+        postings = self._tokens.get(collection_name, {})
+        counts: Dict[int, int] = defaultdict(int)
+        for token in set(normalized.split()):
+            for entry_id in postings.get(token, ()):
+                counts[entry_id] += 1
+        padded = f" {normalized} "
+        return [
+            entry_id for entry_id, hits in counts.items()
+            if hits == entries[entry_id][1] and f" {entries[entry_id][0]} " in padded
+        ]
+
+    def lookup(
+        self,
+        collection_name: str,
+        query: str,
+        limit: int,
+        metadata_key: str = "category",
+        metadata_value: Optional[str] = None,
+    ) -> Optional[List[ScoredPoint]]:
+        """Return exact matches as score-1.0 hits, or None to fall back to dense search."""
+        start = time.perf_counter()
+        with self._lock:
+            entries = self._entries.get(collection_name, [])
+            hits = [
+                ScoredPoint(id=entry_id, version=0, score=1.0, payload=entries[entry_id][2])
+                for entry_id in self._match(collection_name, query)
+                if metadata_value is None
+                or entries[entry_id][2].get(metadata_key) == metadata_value
+            ][:limit]
+            self._lookups += 1
+            self._bypasses += bool(hits)
+            self._lookup_seconds += time.perf_counter() - start
+        return hits or None
+
+    def record_fallback(self, seconds: float) -> None:
+        """Record the latency of a dense search that ran after a fast-path miss."""
+        with self._lock:
+            self._fallback_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            fallbacks = self._lookups - self._bypasses
+            return {
+                "collections": {name: len(e) for name, e in self._entries.items()},
+                "lookups": self._lookups,
+                "bypasses": self._bypasses,
+                "bypass_rate": round(self._bypasses / self._lookups, 4) if self._lookups else 0.0,
+                "avg_lookup_ms": round(1000 * self._lookup_seconds / self._lookups, 3)
+                if self._lookups else 0.0,
+                "avg_dense_fallback_ms": round(1000 * self._fallback_seconds / fallbacks, 3)
+                if fallbacks else 0.0,
+            }
+
+
+keyword_index = KeywordIndex()
@@ -0,0 +1,96 @@
+"""
+Pre-embed documents on a process pool before indexing.
+
+Each worker loads its own copy of the encoder, encodes one shard of the texts
+that are missing from the on-disk embedding store and appends them to it (the
+store serialises writers with flock). The upsert stage in the app process then
+finds every vector in the store. Only used when the embedding store is enabled.
+
+Peak memory grows by one full encoder per worker (roughly 0.5-1.5 GB for common
+sentence-transformers models), hence the small `embed_workers` default.
+
+Kept free of app imports beyond the store and encoder so spawned workers start
+quickly.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.db.embedding_store import EmbeddingStore
+from app.db.encoders import load_encoder
+
+
+def _encode_shard(
+    loader: Callable[[str, Dict[str, Any]], Any],
+    model_name: str,
+    encoder_config: Dict[str, Any],
+    store_root: str,
+    store_key: str,
+    dim: int,
+    dtype: str,
+    texts: List[str],
+    batch_size: int,
+    threads: int,
+) -> int:
+    """Worker: encode `texts` into the shared store; returns the number encoded."""
+    model = loader(model_name, {**encoder_config, "num_threads": threads})
+    store = EmbeddingStore(Path(store_root), store_key, dim, dtype=dtype)
+    store.encode_many(
+        texts,
+        lambda batch, batch_size: model.encode(
+            batch, batch_size=batch_size, show_progress_bar=False
+        ),
+        batch_size=batch_size,
+    )
+    return len(texts)
+
+
+def worker_count(configured: Any, missing: int, min_texts_per_worker: int) -> int:
+    """Workers worth starting: at most the CPU count and one per `min_texts_per_worker`."""
+    cpus = os.cpu_count() or 1
+    limit = cpus if configured in (None, "auto") else int(configured)
+    return max(0, min(limit, cpus, math.ceil(missing / max(min_texts_per_worker, 1))))
+
+
+def embed_in_processes(
+    store: EmbeddingStore,
+    model_name: str,
+    encoder_config: Dict[str, Any],
+    texts: List[str],
+    workers: Any = "auto",
+    batch_size: int = 64,
+    min_texts_per_worker: int = 256,
+    loader: Callable[[str, Dict[str, Any]], Any] = load_encoder,
+) -> Optional[Dict[str, Any]]:
+    """
+    Encode the texts missing from `store` on a process pool. Returns a report,
+    or None when there are too few texts to be worth more than one process
+    (the caller then encodes in-process as usual). `loader` builds the encoder
+    in each worker and must be a picklable module-level function.
+    """
+    missing = store.missing(texts)
+    count = worker_count(workers, len(missing), min_texts_per_worker)
+    if count < 2:
+        return None
+
+    start = time.perf_counter()
+    threads = max(1, (os.cpu_count() or 1) // count)
+    shards = [missing[i::count] for i in range(count)]
+    # spawn: forking a process that already runs torch threads can deadlock
+    with ProcessPoolExecutor(max_workers=count, mp_context=get_context("spawn")) as pool:
+        encoded = sum(pool.map(
+            _encode_shard,
+            *zip(*[
+                (loader, model_name, encoder_config, str(store.directory.parent), store.model_name,
+                 store.dim, store.dtype.name, shard, batch_size, threads)
+                for shard in shards
+            ]),
+        ))
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {encoded} texts on {count} processes in {elapsed:.2f}s")
+    return {"workers": count, "encoded": encoded, "seconds": round(elapsed, 3)}
@@ -1,43 +1,67 @@
 # app/services/prompt.py
 from app.utils.yaml_loader import load_yaml
 from app.db.database_client import fetch_tickets
+from app.services.prompt_budget import PromptReport, prompt_budget
 
 
 prompts = load_yaml("prompt.yaml")
 
-def build_prompt(messages: list[dict[str, str]], user_id: str, categories: list[str]) -> str:
+def load_tickets(user_id: str):
     tickets = fetch_tickets(user_id)
     print("tickets", tickets)
-    
+    return tickets
+
+
+def format_tickets(tickets) -> str:
     # Handle different return types from get_tickets_by_user
     if isinstance(tickets, dict) and "error" in tickets:
         # Error response - no tickets found
-        formatted_tickets = "No tickets found"
+        return "No tickets found"
     elif isinstance(tickets, list) and len(tickets) > 0:
         # Success response with tickets
-        formatted_tickets = "\n".join([f"Ticket ID: {ticket['id']}\nTicket Description: {ticket['description']}\nTicket Status: {ticket['status']}" for ticket in tickets])
-    else:
-        # Empty list or other case
-        formatted_tickets = "No tickets found"
+        return "\n".join([f"Ticket ID: {ticket['id']}\nTicket Description: {ticket['description']}\nTicket Status: {ticket['status']}" for ticket in tickets])
+    # Empty list or other case
+    return "No tickets found"
 
-    system = prompts["system_prompt"]
-    workflow = prompts["workflow_instructions"].format(categories=", ".join(categories), tickets=formatted_tickets)
 
-    convo = []
+def prepare_history(messages: list[dict[str, str]]) -> tuple[str, list[tuple[str, str]]]:
+    """Split messages into the system prompt (default or overridden) and (ROLE, content) turns."""
+    system = prompts["system_prompt"]
+    turns = []
     for m in messages:
         role = m.get("role", "user").upper()
         content = m.get("content", "")
         if role == "SYSTEM":
             system = content
         else:
-            convo.append(f"{role}: {content}")
-    
-    prompt_text = (
-        f"<SYSTEM>\n{system}\n{workflow}\n</SYSTEM>\n\n"
-        f"{convo}\nASSISTANT:"
-    )
-    print("prompt_text", prompt_text)
-    return prompt_text
+            turns.append((role, content))
+    return system, turns
 
 
+def assemble_prompt(
+    messages: list[dict[str, str]], user_id: str, categories: list[str], tickets=None, history=None
+) -> tuple[str, PromptReport]:
+    """
+    Build the prompt within the token budget; returns it with its token report.
+    `history` is a ready `prepare_history` result for `messages`.
+    """
+    if tickets is None:
+        tickets = load_tickets(user_id)
+
+    system, turns = history if history is not None else prepare_history(messages)
+    workflow = prompts["workflow_instructions"].format(categories=", ".join(categories), tickets=format_tickets(tickets))
+
+    def render(lines: list[str]) -> str:
+        convo = "\n".join(lines)
+        return f"<SYSTEM>\n{system}\n{workflow}\n</SYSTEM>\n\n{convo}\nASSISTANT:"
+
+    prompt_text, report = prompt_budget.fit(turns, render)
+    print("prompt_text", prompt_text)
+    print(f"Prompt tokens: {report.tokens}/{report.budget} (saved {report.tokens_saved})")
+    return prompt_text, report
+
 
+def build_prompt(
+    messages: list[dict[str, str]], user_id: str, categories: list[str], tickets=None, history=None
+) -> str:
+    return assemble_prompt(messages, user_id, categories, tickets, history)[0]
@@ -0,0 +1,183 @@
+"""
+Token budget for the chat prompt.
+
+The system prompt, workflow instructions and tickets are always sent. The
+conversation is sent verbatim while the whole prompt fits in
+`max_prompt_tokens`. Past that, it is compacted in steps until it fits:
+
+1. earlier `tool-call-output` blocks (all but the latest) become one-line summaries;
+2. turns older than the last `keep_recent_messages` become one-line summaries;
+3. the oldest summaries are dropped and replaced by a count.
+
+The most recent messages are never compacted. Tokens are counted with the
+model tokenizer once it is loaded (see `TokenCounter.load`, called during
+startup warmup); until then, or if it cannot be loaded, a characters-per-token
+estimate is used.
+"""
+
+import math
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.utils.yaml_loader import load_yaml
+
+# Rough average for English text with BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    def __init__(self, tokenizer_name: Optional[str] = None):
+        self.tokenizer_name = tokenizer_name
+        self._tokenizer: Any = None
+        self._lock = threading.Lock()
+        self.error: Optional[str] = None
+
+    @property
+    def exact(self) -> bool:
+        return self._tokenizer is not None
+
+    def load(self) -> bool:
+        """Load the model tokenizer (blocking); failures keep the estimate."""
+        if self._tokenizer is not None or not self.tokenizer_name:
+            return self.exact
+        with self._lock:
+            try:
+                from transformers import AutoTokenizer
+
+                self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                print(f"Prompt tokenizer loaded ({self.tokenizer_name})")
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"Prompt tokenizer unavailable, estimating tokens: {e}")
+        return self.exact
+
+    def count(self, text: str) -> int:
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PromptReport:
+    tokens: int
+    uncompacted_tokens: int
+    budget: int
+    compacted_messages: int = 0
+    dropped_messages: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.uncompacted_tokens - self.tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "tokens_saved": self.tokens_saved}
+
+
+class PromptBudget:
+    def __init__(
+        self,
+        max_prompt_tokens: int = 6000,
+        keep_recent_messages: int = 6,
+        summary_chars: int = 160,
+        counter: Optional[TokenCounter] = None,
+        history: int = 50,
+    ):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.keep_recent_messages = keep_recent_messages
+        self.summary_chars = summary_chars
+        self.counter = counter or TokenCounter()
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._prompts = 0
+        self._compacted = 0
+        self._tokens = 0
+        self._tokens_saved = 0
+
+    @classmethod
+    def from_config(cls) -> "PromptBudget":
+        config = load_yaml("prompt.yaml").get("budget", {})
+        tokenizer = config.get("tokenizer") or load_yaml("llm.yaml")["llm"].get("default_model")
+        return cls(
+            max_prompt_tokens=config.get("max_prompt_tokens", 6000),
+            keep_recent_messages=config.get("keep_recent_messages", 6),
+            summary_chars=config.get("summary_chars", 160),
+            counter=TokenCounter(tokenizer),
+        )
+
+    def summarize(self, role: str, content: str) -> str:
+        text = " ".join(content.split())
+        if len(text) > self.summary_chars:
+            text = text[: self.summary_chars].rstrip() + "…"
+        if role == "TOOL-CALL-OUTPUT":
+            return f"{role} (earlier result, summarized): {text}"
+        return f"{role} (summarized): {text}"
+
+    def fit(
+        self, turns: List[Tuple[str, str]], render: Callable[[List[str]], str]
+    ) -> Tuple[str, PromptReport]:
+        """
+        Render `turns` ([(ROLE, content)]) within the budget. `render` turns the
+        conversation lines into the full prompt text.
+        """
+        lines = [f"{role}: {content}" for role, content in turns]
+        prompt = render(lines)
+        uncompacted = self.counter.count(prompt)
+        report = PromptReport(tokens=uncompacted, uncompacted_tokens=uncompacted,
+                              budget=self.max_prompt_tokens)
+
+        if uncompacted > self.max_prompt_tokens:
+            recent_start = max(len(turns) - self.keep_recent_messages, 0)
+            outputs = [i for i, (role, _) in enumerate(turns) if role == "TOOL-CALL-OUTPUT"]
+            # Step 1: earlier tool outputs, then step 2: older turns
+            steps = [outputs[:-1], list(range(recent_start))]
+            compacted = set()
+            for step in steps:
+                for i in step:
+                    if i not in compacted:
+                        lines[i] = self.summarize(*turns[i])
+                        compacted.add(i)
+                prompt = render(lines)
+                report.tokens = self.counter.count(prompt)
+                if report.tokens <= self.max_prompt_tokens:
+                    break
+            report.compacted_messages = len(compacted)
+
+            # Step 3: drop the oldest summaries
+            dropped = 0
+            while report.tokens > self.max_prompt_tokens and dropped < recent_start:
+                dropped += 1
+                kept = [f"[{dropped} earlier messages omitted]"] + lines[dropped:]
+                prompt = render(kept)
+                report.tokens = self.counter.count(prompt)
+            report.dropped_messages = dropped
+            if report.tokens > self.max_prompt_tokens:
+                print(f"Prompt still over budget after compaction: {report.tokens} tokens")
+
+        self.record(report)
+        return prompt, report
+
+    def record(self, report: PromptReport) -> None:
+        with self._lock:
+            self._prompts += 1
+            self._compacted += report.tokens_saved > 0
+            self._tokens += report.tokens
+            self._tokens_saved += report.tokens_saved
+            self._recent.append(report.to_dict())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "exact_token_counts": self.counter.exact,
+                "prompts": self._prompts,
+                "compacted_prompts": self._compacted,
+                "avg_prompt_tokens": round(self._tokens / self._prompts, 1) if self._prompts else 0.0,
+                "tokens_saved": self._tokens_saved,
+                # Per-request reports, newest last
+                "recent": list(self._recent),
+            }
+
+
+prompt_budget = PromptBudget.from_config()
@@ -0,0 +1,199 @@
+"""
+Background startup: warmup and indexing run after the app starts serving.
+
+`lifespan` only checks the vector schema and then schedules `run_startup`, so
+`/health` answers immediately. `/ready` reports `startup_state` and turns green
+once categories are loaded and both collections are in sync. Rebuilds triggered
+later through `/admin/reindex` run `run_reindex` and report to `reindex_state`.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+
+from app.db.vector_registry import get_vector_registry
+from app.utils.yaml_loader import load_yaml
+
+PENDING, RUNNING, READY, FAILED = "pending", "running", "ready", "failed"
+
+
+class StartupState:
+    """Progress of the background startup, shared with the readiness probe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.status = PENDING
+            self.stage: Optional[str] = None
+            self.error: Optional[str] = None
+            self.started_at: Optional[float] = None
+            self.finished_at: Optional[float] = None
+            self.categories: List[str] = []
+            self.collections: Dict[str, Any] = {}
+            self.stage_seconds: Dict[str, float] = {}
+            self._stage_started: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def start(self) -> None:
+        with self._lock:
+            self.status = RUNNING
+            self.started_at = time.time()
+
+    def enter(self, stage: str) -> None:
+        """Mark the start of `stage`, closing the timer of the previous one."""
+        with self._lock:
+            self._close_stage()
+            self.stage = stage
+            self._stage_started = time.perf_counter()
+            print(f"Startup: {stage}")
+
+    def _close_stage(self) -> None:
+        if self.stage is not None and self._stage_started is not None:
+            self.stage_seconds[self.stage] = round(time.perf_counter() - self._stage_started, 3)
+            self._stage_started = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage that ran concurrently with others."""
+        with self._lock:
+            self.stage_seconds[stage] = round(seconds, 3)
+
+    def collection_done(self, collection_name: str, report: Any) -> None:
+        with self._lock:
+            self.collections[collection_name] = report
+
+    def finish(self, categories: List[str]) -> None:
+        with self._lock:
+            self._close_stage()
+            self.status = READY
+            self.stage = None
+            self.categories = categories
+            self.finished_at = time.time()
+
+    def fail(self, error: BaseException) -> None:
+        with self._lock:
+            self._close_stage()
+            self.status = FAILED
+            self.error = f"{type(error).__name__}: {error}"
+            self.finished_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "status": self.status,
+                "stage": self.stage,
+                "error": self.error,
+                "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+                "categories": len(self.categories),
+                "collections": dict(self.collections),
+                "stage_seconds": dict(self.stage_seconds),
+            }
+
+
+startup_state = StartupState()
+reindex_state = StartupState()
+
+
+def warmup_embedding_model() -> None:
+    """Load the encoder and run one query so the first request skips cold start."""
+    registry = get_vector_registry()
+    wrappers = [registry.get_collection(name) for name in registry.collections_config]
+    if wrappers:
+        wrappers[0].encode_query("warmup")
+    print(f"Embedding model warm ({registry.default_model})")
+
+
+async def warmup_llm() -> None:
+    """Open the LLM connection with a 1-token request; failures are only logged."""
+    if not load_yaml("llm.yaml").get("llm", {}).get("warmup", True):
+        return
+    from app.services.chat_service import llm_client, model
+
+    try:
+        start = time.perf_counter()
+        await llm_client.warmup(model)
+        print(f"LLM connection warm in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"LLM warmup failed (first request will pay the cold start): {e}")
+
+
+def warmup_tokenizer() -> None:
+    """Load the prompt tokenizer; prompts use a token estimate until it is ready."""
+    from app.services.prompt_budget import prompt_budget
+
+    prompt_budget.counter.load()
+
+
+async def run_startup(app: FastAPI, state: StartupState = startup_state) -> None:
+    """Warm up models and index documents without blocking request handling."""
+    from app.services.indexer import index_documents
+
+    state.start()
+    try:
+        state.enter("warming up embedding model")
+        await asyncio.to_thread(warmup_embedding_model)
+        state.enter("warming up LLM connection")
+        await warmup_llm()
+        state.enter("loading prompt tokenizer")
+        await asyncio.to_thread(warmup_tokenizer)
+        categories = await index_documents(app=app, state=state)
+        if not categories:
+            raise RuntimeError("No KB or guide data fetched; nothing to serve")
+        app.state.all_categories = categories
+        state.finish(categories)
+        print(f"Startup complete: {len(categories)} categories, ready for traffic")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        state.fail(e)
+        print(f"Startup failed: {e}")
+
+
+async def run_reindex(
+    app: FastAPI, force: bool = False, state: StartupState = reindex_state
+) -> None:
+    """Rebuild changed collections behind their aliases while serving traffic."""
+    from app.services.indexer import index_documents
+
+    if state.status != RUNNING:
+        state.reset()
+        state.start()
+    try:
+        categories = await index_documents(app=app, state=state, force=force)
+        if not categories:
+            raise RuntimeError("No KB or guide data fetched; kept the current collections")
+        app.state.all_categories = categories
+        state.finish(categories)
+        print(f"Reindex complete: {len(categories)} categories")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        state.fail(e)
+        print(f"Reindex failed: {e}")
+
+
+def start_reindex(app: FastAPI, force: bool = False) -> "asyncio.Task[None]":
+    """
+    Schedule `run_reindex`; raises RuntimeError if a reindex or the startup
+    indexing is already running (both write the same collection versions).
+    """
+    if startup_state.status == RUNNING:
+        raise RuntimeError("Startup indexing is still running")
+    if reindex_state.status == RUNNING:
+        raise RuntimeError("A reindex is already running")
+    # Mark the state before the task starts so concurrent callers see it
+    reindex_state.reset()
+    reindex_state.start()
+    task = asyncio.create_task(run_reindex(app, force=force))
+    # Keep a reference so the task is not garbage-collected mid-run
+    app.state.reindex_task = task
+    return task
@@ -1,6 +1,7 @@
 import json
 from app.services.tool_handlers import knowledge_base, guide_issue, ticket
 from app.schemas.chat import Message
+from app.services.chat_stream import emit
 from typing import Optional, List
 
 
@@ -19,6 +20,7 @@ async def handle_tool_call(req, categories:Optional[List[str]], tool_calls, atte
 
     if fn not in handlers:
         raise ValueError(f"Unsupported tool: {fn}")
+    emit("status", {"stage": "tool", "tool": fn, "arguments": args})
 
     if fn == "manage_ticket":
         return await handlers[fn](req, args)
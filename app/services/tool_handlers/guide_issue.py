@@ -13,7 +13,7 @@ async def handle_issue_guide(req, categories, args, attempts):
     query = args.get("query")
     type_issue = args.get("type_issue")
 
-    results = query_guide_issue(query=query, max_results=3, type_issue=type_issue)
+    results = await query_guide_issue(query=query, max_results=3, type_issue=type_issue)
 
     if len(results) == 0:
         output = "I couldn’t find a relevant guide. Would you like me to escalate this issue?"
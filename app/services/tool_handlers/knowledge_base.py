@@ -1,4 +1,4 @@
-from app.services.tools import query_knowledge_base
+from app.services.tools import query_support_content
 from app.schemas.chat import ChatResponse, Message
 from app.services.response_formatter import format_kb_results
 
@@ -13,20 +13,24 @@ async def handle_knowledge_base(req, categories, args, attempts):
     query = args.get("query")
     type_issue = args.get("type_issue")
 
-    results = query_knowledge_base(query=query, max_results=3, type_issue=type_issue)
+    # Fetch KB and guide hits together so a KB miss already knows whether the guide can help
+    support_results = await query_support_content(query=query, max_results=3, type_issue=type_issue)
+    results = support_results["kb_collection"]
+    guide_matches = sum(1 for r in support_results["guide_collection"] if r.score > 0.2)
+    guide_note = f" {guide_matches} relevant issue guide entries are available." if guide_matches else ""
     print(results)
 
     if len(results) == 0:
         output = "I couldn’t find a relevant case. Would you like me to search the guide issue instructions instead?"
         req.messages.append(Message(role="assistant", content=output))
-        req.messages.append(Message(role="tool-call-output", content="No results were retrieved from the knowledge base."))
+        req.messages.append(Message(role="tool-call-output", content="No results were retrieved from the knowledge base." + guide_note))
         return ChatResponse(user_id=req.user_id, messages=req.messages)
 
         
     if max(r.score for r in results) <= 0.2:
         output = "I couldn’t find a relevant case. Would you like me to search the guide issue instructions instead?"
         req.messages.append(Message(role="assistant", content=output))
-        req.messages.append(Message(role="tool-call-output", content="The retrieved knowledge base results are not relevant enough."))
+        req.messages.append(Message(role="tool-call-output", content="The retrieved knowledge base results are not relevant enough." + guide_note))
         return ChatResponse(user_id=req.user_id, messages=req.messages)
     filtered_results = [r for r in results if r.score > 0.2]
     mapped = [
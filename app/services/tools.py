@@ -1,10 +1,20 @@
 from app.utils.yaml_loader import load_yaml
-from app.db.qdrant_client import QdrantWrapper
+from app.db.vector_registry import VectorSearch, get_vector_registry
+from app.services.keyword_index import keyword_index
+import copy
+import time
+from functools import lru_cache
 
 tools_config = load_yaml("tools.yaml")
 
 def get_tools(categories: list[str]):
-    tools = tools_config.get("tools", [])
+    """Tool schemas with the categories injected into `type_issue` (built once per category set)."""
+    return _resolve_tools(tuple(categories))
+
+
+@lru_cache(maxsize=16)
+def _resolve_tools(categories: tuple):
+    tools = copy.deepcopy(tools_config.get("tools", []))
 
     for tool in tools:
         if "function" not in tool:
@@ -18,22 +28,37 @@ def get_tools(categories: list[str]):
 
         # inject categories into type_issue
         if "type_issue" in props:
-            props["type_issue"]["enum"] = categories
+            props["type_issue"]["enum"] = list(categories)
 
     return tools
-def query_knowledge_base(query:str,max_results:int,type_issue:str):
-    embedding = load_yaml("embedding.yaml")
-    kb_vector_search = QdrantWrapper(collection_name="kb_collection",
-                               embedding_model=embedding.get('embedding_model').get('default_model'), 
-                               embedding_dim=embedding.get("embedding_model", {}).get("params", {}).get("embedding_dim"))
-    results = kb_vector_search.query(query=query,max_results=max_results,metadata_key="category",metadata_value=type_issue)
+async def _search(collection_name:str,query:str,max_results:int,type_issue:str):
+    # Exact issue-code / phrase matches skip encoding and the vector store entirely
+    exact = keyword_index.lookup(collection_name, query, max_results, metadata_value=type_issue)
+    if exact is not None:
+        return exact
+    start = time.perf_counter()
+    vector_search = get_vector_registry().get_async_collection(collection_name)
+    results = await vector_search.query(query=query,max_results=max_results,metadata_key="category",metadata_value=type_issue)
+    keyword_index.record_fallback(time.perf_counter() - start)
     return results
-def query_guide_issue(query:str,max_results:int,type_issue:str):
-    embedding = load_yaml("embedding.yaml")
-    kb_vector_search = QdrantWrapper(collection_name="guide_collection",
-                               embedding_model=embedding.get('embedding_model').get('default_model'), 
-                               embedding_dim=embedding.get("embedding_model", {}).get("params", {}).get("embedding_dim"))
-    results = kb_vector_search.query(query=query,max_results=max_results,metadata_key="category",metadata_value=type_issue)
+async def query_knowledge_base(query:str,max_results:int,type_issue:str):
+    return await _search("kb_collection", query, max_results, type_issue)
+async def query_guide_issue(query:str,max_results:int,type_issue:str):
+    return await _search("guide_collection", query, max_results, type_issue)
+async def query_support_content(query:str,max_results:int,type_issue:str):
+    """Search the KB and the issue guide with one encode and one batched call."""
+    results = {}
+    searches = []
+    for collection_name in ("kb_collection", "guide_collection"):
+        exact = keyword_index.lookup(collection_name, query, max_results, metadata_value=type_issue)
+        if exact is not None:
+            results[collection_name] = exact
+        else:
+            searches.append(VectorSearch(collection_name, type_issue, max_results))
+    if searches:
+        start = time.perf_counter()
+        results.update(await get_vector_registry().search_many(query, searches))
+        keyword_index.record_fallback(time.perf_counter() - start)
     return results
 def manage_ticket(issue_code: str, issue_description: str, status: str, user: str = "user-123"):
     from app.db.database_client import create_ticket
@@ -0,0 +1,139 @@
+"""
+Content-addressed cache of LLM completions.
+
+The key is a hash of everything that determines the completion: the provider
+(name and endpoint) and the request body it sends, i.e. the model, the fully
+built prompt, the tools schema and the decoding params as mapped for that
+provider. Params a provider drops do not split the cache. Entries live in
+an in-memory LRU and, when `path` is set, in a local SQLite file so they
+survive restarts and are shared by workers on the same host. Both tiers expire
+entries after `ttl_seconds`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.lru_cache import LRUCache
+
+
+def completion_key(provider: str, body: Dict[str, Any]) -> str:
+    """Key of a completion: the provider identity and the request body exactly as sent."""
+    payload = json.dumps({"provider": provider, "body": body}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier (memory LRU, optional SQLite) TTL cache of completion JSON."""
+
+    def __init__(
+        self,
+        capacity: int = 512,
+        ttl_seconds: float = 3600,
+        path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._entries = LRUCache(capacity)
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "seconds REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM completions WHERE expires_at <= ?", (self._clock(),))
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._bypassed = 0
+        self._llm_seconds = 0.0
+        self._llm_seconds_saved = 0.0
+
+    def _disk_get(self, key: str, count_expired: bool) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, seconds, expires_at FROM completions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, seconds, expires_at = row
+        if expires_at <= self._clock():
+            self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._expired += count_expired
+            return None
+        return {"value": json.loads(value), "seconds": seconds, "expires_at": expires_at}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached completion dict or None, counting the lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = entry is not None and entry["expires_at"] <= self._clock()
+            if expired:
+                del self._entries[key]
+                self._expired += 1
+                entry = None
+            if entry is not None:
+                self._memory_hits += 1
+            else:
+                # Another worker may have written a fresher entry to disk
+                entry = self._disk_get(key, count_expired=not expired)
+                if entry is None:
+                    self._misses += 1
+                    return None
+                self._disk_hits += 1
+                self._entries.put(key, entry)
+            self._llm_seconds_saved += entry["seconds"]
+            return entry["value"]
+
+    def put(self, key: str, value: Dict[str, Any], seconds: float) -> None:
+        entry = {"value": value, "seconds": seconds, "expires_at": self._clock() + self._ttl}
+        with self._lock:
+            self._llm_seconds += seconds
+            self._entries.put(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, seconds, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), seconds, entry["expires_at"]),
+                )
+
+    def bypass(self) -> None:
+        """Count a request that opted out of the cache."""
+        with self._lock:
+            self._bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "size": len(self._entries),
+                "persistent": self._db is not None,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "bypassed": self._bypassed,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "llm_seconds": round(self._llm_seconds, 3),
+                "llm_seconds_saved": round(self._llm_seconds_saved, 3),
+            }
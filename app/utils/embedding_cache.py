@@ -0,0 +1,96 @@
+"""
+Bounded TTL cache for query embeddings.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from app.utils.lru_cache import LRUCache
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query vectors keyed by model name and normalized query text.
+
+    Entries expire after `ttl_seconds`. All bookkeeping happens under a lock so
+    the cache can be shared by the event loop and encoder worker threads;
+    encoding itself runs outside the lock.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._entries = LRUCache(capacity)
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._encode_seconds = 0.0
+        self._encode_seconds_saved = 0.0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _key(self, model_name: str, text: str) -> str:
+        return f"{model_name}\x00{self.normalize(text)}"
+
+    def get(self, model_name: str, text: str) -> Any:
+        """Return the cached vector or None, counting the lookup."""
+        key = self._key(model_name, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] <= self._clock():
+                del self._entries[key]
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._encode_seconds_saved += entry["encode_seconds"]
+            return entry["vector"]
+
+    def put(self, model_name: str, text: str, vector: Any, encode_seconds: float) -> None:
+        key = self._key(model_name, text)
+        with self._lock:
+            self._encode_seconds += encode_seconds
+            self._entries.put(key, {
+                "vector": vector,
+                "encode_seconds": encode_seconds,
+                "expires_at": self._clock() + self._ttl,
+            })
+
+    def get_or_encode(
+        self, model_name: str, text: str, encode: Callable[[str], Any]
+    ) -> Any:
+        vector = self.get(model_name, text)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = encode(text)
+        self.put(model_name, text, vector, time.perf_counter() - start)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "encode_seconds": round(self._encode_seconds, 4),
+                "encode_seconds_saved": round(self._encode_seconds_saved, 4),
+            }
@@ -2,13 +2,17 @@
 FastAPI application main entry point.
 """
 
+import asyncio
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.admin import router as admin_router
 from app.api.auth import router as auth_router
 from app.api.health import router as health_router
 from app.api.chat import router as chat_router
+from app.api.metrics import router as metrics_router
 
 from app.core.config import settings
 from typing import AsyncGenerator
@@ -23,15 +27,24 @@ if not hasattr(bcrypt, "__about__"):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    from app.services.indexer import index_documents
+    from app.services.startup import run_startup
+    from app.db.vector_registry import init_vector_registry
 
     """
     Function that handles startup and shutdown events.
     To understand more, read https://fastapi.tiangolo.com/advanced/events/
     """
-    all_categories = await index_documents(app=app)  
-    app.state.all_categories = all_categories
+    # Fails fast if Qdrant collections don't match embedding.yaml
+    registry = init_vector_registry()
+    registry.reconcile_schema()
+    # Warmup and indexing continue in the background; /ready reports progress
+    app.state.all_categories = []
+    startup_task = asyncio.create_task(run_startup(app))
     yield
+    startup_task.cancel()
+    registry.close()
+    from app.services.chat_service import llm_client
+    await llm_client.aclose()
     if sessionmanager._engine is not None:
         # Close the DB connection
         await sessionmanager.close()
@@ -58,8 +71,10 @@ app.add_middleware(
 
 # Include routers
 app.include_router(health_router, tags=["system"])
+app.include_router(metrics_router, tags=["system"])
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 app.include_router(chat_router)
+app.include_router(admin_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
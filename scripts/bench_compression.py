@@ -0,0 +1,158 @@
+"""
+Compare vector compression modes against the full-precision baseline.
+
+Usage:
+    python -m scripts.bench_compression [--points 5000] [--queries 500] [--reduced-dim 256]
+    python -m scripts.bench_compression --backend qdrant [--qdrant-url URL]
+
+For every mode (int8 with and without rescoring, truncation, PCA and PCA + int8)
+this reports vector memory, p50/p99 search latency and recall@k against exact
+float32 search. Vectors are synthetic but shaped like sentence embeddings: points
+cluster around topic centroids and the variance decays across a randomly rotated
+basis, so truncation and PCA lose information the way they do on real models.
+
+With the numpy backend memory is measured from the stored arrays; Qdrant does not
+expose it, so the qdrant rows show the expected RAM footprint instead. Qdrant's
+local mode ignores quantization, so use --qdrant-url for meaningful qdrant rows.
+"""
+
+import argparse
+import os
+import statistics
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.db.compression import CompressionConfig, DimensionReducer
+from app.db.vector_backends import NumpyBackend, QdrantBackend, VectorBackend
+
+COLLECTION = "bench_compression"
+
+
+def make_vectors(args, rng: np.random.Generator):
+    """Clustered, anisotropic unit vectors plus noisy copies of some of them as queries."""
+    spectrum = 1.0 / np.sqrt(1.0 + np.arange(args.dim) / 16.0)
+    rotation, _ = np.linalg.qr(rng.normal(size=(args.dim, args.dim)))
+    centroids = rng.normal(size=(args.topics, args.dim)) * spectrum
+    topics = rng.integers(0, args.topics, size=args.points)
+    vectors = centroids[topics] + 0.6 * rng.normal(size=(args.points, args.dim)) * spectrum
+    vectors = (vectors @ rotation).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    sources = rng.integers(0, args.points, size=args.queries)
+    queries = vectors[sources] + 0.04 * rng.normal(size=(args.queries, args.dim))
+    return vectors, queries.astype(np.float32)
+
+
+def modes(reduced_dim: int) -> Dict[str, CompressionConfig]:
+    return {
+        "float32 (baseline)": CompressionConfig(),
+        "int8 + rescore": CompressionConfig(quantization="int8"),
+        "int8, no rescore": CompressionConfig(quantization="int8", rescore=False),
+        f"truncate {reduced_dim}": CompressionConfig(reduction="truncate", reduced_dim=reduced_dim),
+        f"pca {reduced_dim}": CompressionConfig(reduction="pca", reduced_dim=reduced_dim),
+        f"pca {reduced_dim} + int8": CompressionConfig(
+            quantization="int8", reduction="pca", reduced_dim=reduced_dim
+        ),
+    }
+
+
+def expected_ram_bytes(config: CompressionConfig, points: int, dim: int) -> int:
+    """RAM Qdrant needs for the vectors of one collection in this mode."""
+    originals = 0 if config.on_disk else points * dim * 4
+    quantized = points * dim if config.quantized and config.always_ram else 0
+    return originals + quantized
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--reduced-dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--backend", choices=["numpy", "qdrant"], default="numpy")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL"))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors, queries = make_vectors(args, rng)
+    categories = [f"cat-{i}" for i in range(args.categories)]
+    labels = np.array([categories[i % len(categories)] for i in range(args.points)])
+    ids = [str(uuid.uuid4()) for _ in range(args.points)]
+    query_categories = [categories[i % len(categories)] for i in range(args.queries)]
+
+    # Exact full-precision ground truth per query
+    truth = []
+    for query, category in zip(queries, query_categories):
+        members = np.flatnonzero(labels == category)
+        scores = vectors[members] @ (query / np.linalg.norm(query))
+        truth.append({ids[j] for j in members[np.argsort(-scores)[: args.k]]})
+
+    client: Optional[QdrantClient] = None
+    if args.backend == "qdrant":
+        client = (
+            QdrantClient(url=args.qdrant_url, api_key=os.getenv("QDRANT_API_KEY"))
+            if args.qdrant_url else QdrantClient(location=":memory:")
+        )
+
+    print(f"{args.points} points, dim {args.dim}, {args.categories} categories, "
+          f"{args.queries} queries, recall@{args.k}, backend {args.backend}")
+    print(f"{'mode':<22}{'dim':>5}{'vec MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'recall':>8}")
+    for name, config in modes(args.reduced_dim).items():
+        dim = config.stored_dim(args.dim)
+        reducer = (
+            DimensionReducer(config.reduction, args.dim, dim)
+            if config.reduction != "none" else None
+        )
+        stored = vectors
+        if reducer is not None:
+            reducer.fit(vectors)
+            stored = reducer.transform(vectors)
+
+        backend: VectorBackend
+        if client is not None:
+            if client.collection_exists(COLLECTION):
+                client.delete_collection(COLLECTION)
+            backend = QdrantBackend(client, compression=config)
+        else:
+            backend = NumpyBackend(config)
+        backend.create_collection(COLLECTION, dim, "COSINE")
+        backend.create_index(COLLECTION, "category")
+        for offset in range(0, args.points, 256):
+            backend.upsert(COLLECTION, [
+                PointStruct(id=ids[i], vector=stored[i].tolist(), payload={"category": labels[i]})
+                for i in range(offset, min(offset + 256, args.points))
+            ])
+
+        latencies: List[float] = []
+        recalls: List[float] = []
+        for i, (query, category) in enumerate(zip(queries, query_categories)):
+            start = time.perf_counter()
+            vector = reducer.transform(query) if reducer is not None else query
+            hits = backend.query(COLLECTION, vector, args.k, "category", category)
+            elapsed = (time.perf_counter() - start) * 1000
+            if i >= 10:  # the first queries build partitions / warm caches
+                latencies.append(elapsed)
+            recalls.append(len(truth[i] & {str(h.id) for h in hits}) / args.k)
+
+        memory = (
+            backend.memory_bytes(COLLECTION) if isinstance(backend, NumpyBackend)
+            else expected_ram_bytes(config, args.points, dim)
+        )
+        print(f"{name:<22}{dim:>5}{memory / 2**20:>9.2f}"
+              f"{float(np.percentile(latencies, 50)):>9.3f}"
+              f"{float(np.percentile(latencies, 99)):>9.3f}"
+              f"{statistics.mean(recalls):>8.3f}")
+        if client is not None:
+            client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare encoder backends (torch, torch_int8) for the embedding model.
+
+Usage:
+    python -m scripts.bench_encoders [--backends torch,torch_int8] [--queries 200]
+
+Reports load time, single-query encode p50/p99, batched throughput and cosine
+agreement with the float32 torch model on the same texts. Backends that cannot be
+loaded here are reported and skipped.
+"""
+
+import argparse
+import statistics
+import time
+from typing import List
+
+import numpy as np
+
+from app.db.encoders import load_encoder
+from app.utils.yaml_loader import load_yaml
+
+SUBJECTS = [
+    "my laptop", "the office printer", "Outlook", "the VPN client", "my monitor",
+    "the wifi", "Teams", "my password", "the shared drive", "the docking station",
+]
+PROBLEMS = [
+    "does not turn on", "keeps disconnecting every few minutes", "shows an error on startup",
+    "is very slow since the last update", "asks me to sign in again and again",
+    "stopped working after I changed my password", "is not detected",
+    "freezes when I open large files",
+]
+
+
+def sample_texts(count: int) -> List[str]:
+    texts = [f"{s} {p}" for s in SUBJECTS for p in PROBLEMS]
+    return [f"Hi, {texts[i % len(texts)]} ({i})" for i in range(count)]
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=None, help="defaults to embedding.yaml")
+    parser.add_argument("--backends", default="torch,torch_int8")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--num-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    model_name = args.model or load_yaml("embedding.yaml")["embedding_model"]["default_model"]
+    texts = sample_texts(args.queries)
+    print(f"{model_name}: {len(texts)} texts, batch size {args.batch_size}")
+    print(f"{'backend':<12}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'batch/s':>10}{'cos mean':>10}{'cos min':>9}")
+
+    reference = None
+    for backend in ["torch"] + [b for b in args.backends.split(",") if b != "torch"]:
+        config = {"backend": backend, "num_threads": args.num_threads}
+        start = time.perf_counter()
+        try:
+            model = load_encoder(model_name, config)
+        except Exception as e:
+            if backend == "torch":
+                raise SystemExit(f"Cannot load the torch reference model: {e}")
+            print(f"{backend:<12}skipped: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        for text in texts[:5]:  # warm up
+            model.encode(text)
+        latencies = []
+        for text in texts:
+            start = time.perf_counter()
+            model.encode(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        vectors = normalize(model.encode(texts, batch_size=args.batch_size))
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        if reference is None:
+            reference = vectors
+        agreement = np.sum(vectors * reference, axis=1)
+        print(f"{backend:<12}{load_seconds:>8.2f}{float(np.percentile(latencies, 50)):>9.2f}"
+              f"{float(np.percentile(latencies, 99)):>9.2f}{throughput:>10.1f}"
+              f"{statistics.mean(agreement.tolist()):>10.4f}{float(agreement.min()):>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
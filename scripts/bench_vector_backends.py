@@ -0,0 +1,109 @@
+"""
+Compare search latency and recall of the Qdrant and in-process NumPy backends.
+
+Usage:
+    python -m scripts.bench_vector_backends [--points 5000] [--queries 500] [--qdrant-url URL]
+
+Vectors are synthetic (normalized Gaussian, `--dim` wide, spread over
+`--categories` categories). Recall@k is measured against exact brute-force
+results. Without --qdrant-url (or QDRANT_URL) Qdrant runs in local mode, which
+does not include network latency.
+"""
+
+import argparse
+import os
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.db.vector_backends import NumpyBackend, QdrantBackend, VectorBackend
+
+COLLECTION = "bench_vector_backends"
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q))
+
+
+def run(backend: VectorBackend, queries: np.ndarray, categories: List[str], k: int):
+    latencies, results = [], []
+    for i, query in enumerate(queries):
+        category = categories[i % len(categories)]
+        start = time.perf_counter()
+        hits = backend.query(COLLECTION, query, k, "category", category)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([str(h.id) for h in hits])
+    return latencies, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL"))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(args.points, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    categories = [f"cat-{i}" for i in range(args.categories)]
+    ids = [str(uuid.uuid4()) for _ in range(args.points)]
+    labels = [categories[i % len(categories)] for i in range(args.points)]
+    points = [
+        PointStruct(id=ids[i], vector=vectors[i].tolist(), payload={"category": labels[i]})
+        for i in range(args.points)
+    ]
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    # Exact ground truth per query
+    truth = []
+    label_array = np.array(labels)
+    for i, query in enumerate(queries):
+        mask = np.flatnonzero(label_array == categories[i % len(categories)])
+        scores = vectors[mask] @ (query / np.linalg.norm(query))
+        truth.append({ids[j] for j in mask[np.argsort(-scores)[: args.k]]})
+
+    client = (
+        QdrantClient(url=args.qdrant_url, api_key=os.getenv("QDRANT_API_KEY"))
+        if args.qdrant_url else QdrantClient(location=":memory:")
+    )
+    backends: Dict[str, VectorBackend] = {
+        "qdrant" + ("" if args.qdrant_url else " (local mode)"): QdrantBackend(client),
+        "numpy": NumpyBackend(),
+    }
+
+    print(f"{args.points} points, dim {args.dim}, {args.categories} categories, "
+          f"{args.queries} queries, recall@{args.k}")
+    print(f"{'backend':<22}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'recall':>8}")
+    for name, backend in backends.items():
+        if isinstance(backend, QdrantBackend) and client.collection_exists(COLLECTION):
+            client.delete_collection(COLLECTION)
+        start = time.perf_counter()
+        backend.create_collection(COLLECTION, args.dim, "COSINE")
+        backend.create_index(COLLECTION, "category")
+        for offset in range(0, len(points), 256):
+            backend.upsert(COLLECTION, points[offset:offset + 256])
+        load_seconds = time.perf_counter() - start
+
+        run(backend, queries[:10], categories, args.k)  # warm up
+        latencies, results = run(backend, queries, categories, args.k)
+        recall = statistics.mean(
+            len(truth[i] & set(r)) / args.k for i, r in enumerate(results)
+        )
+        print(f"{name:<22}{load_seconds:>8.2f}{percentile(latencies, 50):>9.3f}"
+              f"{percentile(latencies, 99):>9.3f}{statistics.mean(latencies):>9.3f}"
+              f"{recall:>8.3f}")
+        if isinstance(backend, QdrantBackend):
+            client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Prewarm (and optionally compact) the on-disk embedding store.
+
+Usage:
+    python -m scripts.prewarm_embeddings            # embed KB and guide rows not stored yet
+    python -m scripts.prewarm_embeddings --compact  # also drop rows no longer in the source data
+"""
+
+import argparse
+import time
+
+from app.db.database_client import fetch_guide_data, fetch_kb_data
+from app.db.embedding_store import text_hash
+from app.db.qdrant_client import document_text
+from app.db.vector_registry import init_vector_registry
+from app.services.indexer import GUIDE_TEXT_FIELDS, KB_TEXT_FIELDS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--compact", action="store_true", help="drop stale rows afterwards")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    registry = init_vector_registry()
+    store = registry.get_embedding_store()
+    if store is None:
+        raise SystemExit("embedding_store.enabled is false in embedding.yaml")
+    model = registry.get_model()
+    batch_size = args.batch_size or registry.indexing_params.get("encode_batch_size", 64)
+    encode = lambda texts, batch_size: model.encode(
+        texts, batch_size=batch_size, show_progress_bar=True
+    )
+
+    texts = [document_text(doc, KB_TEXT_FIELDS) for doc in fetch_kb_data()]
+    texts += [document_text(doc, GUIDE_TEXT_FIELDS) for doc in fetch_guide_data()]
+    if not texts:
+        raise SystemExit("No KB or guide data fetched; nothing to prewarm.")
+
+    start = time.perf_counter()
+    before = store.stats()["rows"]
+    store.encode_many(texts, encode, batch_size=batch_size)
+    after = store.stats()["rows"]
+    print(
+        f"Prewarmed {after - before} new embeddings "
+        f"({len(texts)} texts, {time.perf_counter() - start:.1f}s)"
+    )
+
+    if args.compact:
+        removed = store.compact(text_hash(t) for t in texts)
+        print(f"Compacted embedding store: removed {removed} stale rows")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
-from typing import AsyncGenerator
+import secrets
+from typing import AsyncGenerator, cast
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
 
 from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
 from app.db.base import Base
 
 # Import all models here for autogenerate support
 from app.db.session import AsyncSession, DatabaseSessionManager, get_db
+from app.llm.admission import AdmissionController
+from app.services.answer_cache import SemanticAnswerCache
+from app.utils.completion_cache import CompletionCache
 
 # DONT REMOVE
 from app.models.user import APIToken, User
@@ -35,6 +42,31 @@ async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
 app.dependency_overrides[get_db] = override_get_db
 
 
+@pytest.fixture(autouse=True)
+def fresh_completion_cache(monkeypatch: pytest.MonkeyPatch) -> CompletionCache:
+    """Memory-only completion cache per test, so cached answers never leak between tests."""
+    cache = CompletionCache()
+    monkeypatch.setattr("app.services.chat_service.completion_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_answer_cache(monkeypatch: pytest.MonkeyPatch) -> SemanticAnswerCache:
+    """Disabled semantic answer cache per test; tests of the cache enable it."""
+    cache = SemanticAnswerCache(enabled=False)
+    monkeypatch.setattr("app.services.chat_service.answer_cache", cache)
+    monkeypatch.setattr("app.services.indexer.answer_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_admission(monkeypatch: pytest.MonkeyPatch) -> AdmissionController:
+    """Admission controller per test (its semaphore binds to one event loop)."""
+    controller = AdmissionController()
+    monkeypatch.setattr("app.services.chat_service.admission", controller)
+    return controller
+
+
 @pytest_asyncio.fixture
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
     transport = ASGITransport(app=app)
@@ -46,3 +78,32 @@ async def async_client() -> AsyncGenerator[AsyncClient, None]:
 async def session() -> AsyncGenerator[AsyncSession, None]:
     async with test_db.session() as session:
         yield session
+
+
+@pytest_asyncio.fixture
+async def test_user(session: AsyncSession) -> User:
+    result = await session.execute(select(User).where(User.username == "testuser"))
+    user = result.scalar_one_or_none()
+    if user:
+        return cast(User, user)
+
+    user = User(username="testuser", hashed_password=get_password_hash("secret123"))
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return cast(User, user)
+
+
+@pytest_asyncio.fixture
+async def jwt_token(test_user: User) -> str:
+    token = create_access_token("test", test_user.id)
+    return f"Bearer {token}"
+
+
+@pytest_asyncio.fixture
+async def api_token(test_user: User, session: AsyncSession) -> str:
+    token_str = secrets.token_hex(32)
+    token = APIToken(token=token_str, user_id=test_user.id)
+    session.add(token)
+    await session.commit()
+    return token_str
@@ -0,0 +1,24 @@
+"""
+Encoder stand-in for tests that spawn worker processes. Kept in its own module
+with no app imports so spawned workers can unpickle `load_fake_encoder` quickly.
+"""
+
+import zlib
+
+import numpy as np
+
+DIM = 2
+
+
+class HashEncoder:
+    """Deterministic 2-dim vectors derived from the text."""
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(t.encode())).random(DIM, dtype=np.float32)
+            for t in texts
+        ])
+
+
+def load_fake_encoder(model_name: str, encoder_config: dict) -> HashEncoder:
+    return HashEncoder()
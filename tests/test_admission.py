@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.llm.admission import AdmissionController, AdmissionRejected
+from app.llm.providers import OpenAICompatibleProvider
+from app.llm.stub_server import create_stub_app
+
+
+@pytest.mark.asyncio
+async def test_queue_full_and_queue_timeout() -> None:
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=0.1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+
+    with pytest.raises(AdmissionRejected) as full:
+        async with controller.slot():
+            pass
+    assert full.value.status_code == 429
+    assert full.value.retry_after >= 1
+
+    with pytest.raises(AdmissionRejected) as timeout:
+        await waiter
+    assert timeout.value.status_code == 503
+
+    release.set()
+    await holder
+    async with controller.slot():
+        pass
+    stats = controller.stats()
+    assert (stats["admitted"], stats["rejected_queue_full"], stats["rejected_queue_timeout"]) == (2, 1, 1)
+    assert (stats["in_flight"], stats["queue_depth"], stats["max_queue_depth"]) == (0, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_saturated_chat_returns_retry_after(async_client, monkeypatch) -> None:
+    stub = create_stub_app(latency_ms=300)
+    provider = OpenAICompatibleProvider(base_url="http://stub/v1", transport=httpx.ASGITransport(app=stub))
+    monkeypatch.setattr("app.services.chat_service.llm_client", provider)
+    monkeypatch.setattr("app.services.chat_service.admission",
+                        AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=5))
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+    from main import app
+    app.state.all_categories = ["Hardware"]
+
+    responses = await asyncio.gather(*[
+        async_client.post("/chat", json={
+            "user_id": "user-123", "messages": [{"role": "user", "content": f"issue {i}"}],
+        })
+        for i in range(4)
+    ])
+    await provider.aclose()
+
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 200, 429, 429]
+    for rejected in (r for r in responses if r.status_code == 429):
+        assert int(rejected.headers["Retry-After"]) >= 1
+
+    metrics = (await async_client.get("/metrics")).json()["llm_admission"]
+    assert metrics["rejected_queue_full"] == 2
+    assert metrics["queue_wait_ms"]["p99"] > 0
@@ -0,0 +1,130 @@
+import json
+from typing import Any
+
+import pytest
+from huggingface_hub import ChatCompletionOutput
+from qdrant_client.models import ScoredPoint
+
+from app.llm.providers import OpenAICompatibleProvider
+from app.schemas.chat import ChatRequest
+from app.services import chat_service, indexer
+from app.services.answer_cache import SemanticAnswerCache, ticket_state
+
+CATEGORIES = ["Hardware", "Network"]
+VECTORS = {
+    "printer says paper jam but there's none": [1.0, 0.0, 0.0],
+    "my printer reports a paper jam, but nothing is stuck": [0.98, 0.15, 0.0],
+    "vpn keeps disconnecting": [0.0, 0.0, 1.0],
+}
+ANSWER = [{"role": "assistant", "content": "Open tray 2 and reseat the rollers."}]
+
+
+def completion(message: dict) -> ChatCompletionOutput:
+    return ChatCompletionOutput.parse_obj_as_instance({
+        "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+    })
+
+
+class StubLLM(OpenAICompatibleProvider):
+    """Calls the KB tool on the first turn, then answers from its output."""
+
+    def __init__(self) -> None:
+        super().__init__("http://stub/v1")
+        self.calls = 0
+
+    async def generate(self, model: str, prompt: str, params: dict, tools: Any) -> Any:
+        self.calls += 1
+        if "TOOL-CALL-OUTPUT" in prompt:
+            return completion({"role": "assistant", "content": "Open tray 2 and reseat the rollers."})
+        arguments = json.dumps({"query": "paper jam", "type_issue": "Hardware"})
+        return completion({"role": "assistant", "content": None, "tool_calls": [{
+            "id": "call-0", "type": "function",
+            "function": {"name": "query_knowledge_base", "arguments": arguments},
+        }]})
+
+
+def test_lookup_threshold_and_ticket_state() -> None:
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    cache.store("printer says paper jam but there's none",
+                VECTORS["printer says paper jam but there's none"], "none", "Hardware", ANSWER)
+
+    hit = cache.lookup(VECTORS["my printer reports a paper jam, but nothing is stuck"], "none", CATEGORIES)
+    assert hit["messages"] == ANSWER
+    assert hit["similarity"] > 0.95
+    # Below the threshold, another ticket state, or a category that no longer exists
+    assert cache.lookup(VECTORS["vpn keeps disconnecting"], "none", CATEGORIES) is None
+    assert cache.lookup(VECTORS["printer says paper jam but there's none"], "open", CATEGORIES) is None
+    assert cache.lookup(VECTORS["printer says paper jam but there's none"], "none", ["Network"]) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["llm_calls_saved"]) == (1, 3, 2)
+
+    cache.invalidate()
+    assert cache.lookup(VECTORS["printer says paper jam but there's none"], "none", CATEGORIES) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_ticket_state() -> None:
+    assert ticket_state([]) == "none"
+    assert ticket_state({"error": "not found"}) == "none"
+    assert ticket_state([{"status": "closed"}, {"status": "Open"}]) == "open"
+    assert ticket_state([{"status": "closed"}]) == "closed"
+
+
+@pytest.mark.asyncio
+async def test_paraphrase_skips_both_llm_calls(monkeypatch, fresh_answer_cache) -> None:
+    fresh_answer_cache.enabled = True
+    llm = StubLLM()
+    tickets = []
+
+    async def embed_opening(text: str):
+        return VECTORS[text]
+
+    async def query_support_content(query, max_results, type_issue):
+        hit = ScoredPoint(id=1, version=0, score=0.9,
+                          payload={"question": "Paper jam", "answer": "Reseat the rollers."})
+        return {"kb_collection": [hit], "guide_collection": []}
+
+    monkeypatch.setattr(chat_service, "llm_client", llm)
+    monkeypatch.setattr(chat_service, "embed_opening", embed_opening)
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: tickets)
+    monkeypatch.setattr(
+        "app.services.tool_handlers.knowledge_base.query_support_content", query_support_content
+    )
+
+    def ask(text: str) -> ChatRequest:
+        return ChatRequest(user_id="user-1", messages=[{"role": "user", "content": text}])
+
+    first = await chat_service.process_chat(ask("printer says paper jam but there's none"), CATEGORIES)
+    assert llm.calls == 2
+    assert fresh_answer_cache.stats()["stores"] == 1
+
+    second = await chat_service.process_chat(
+        ask("my printer reports a paper jam, but nothing is stuck"), CATEGORIES
+    )
+    assert llm.calls == 2
+    assert second.messages[1:] == first.messages[1:]
+    assert second.messages[0].content == "my printer reports a paper jam, but nothing is stuck"
+
+    # A user with an open ticket gets a fresh answer
+    tickets.append({"id": 1, "description": "printer", "status": "open"})
+    await chat_service.process_chat(ask("printer says paper jam but there's none"), CATEGORIES)
+    assert llm.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_reindex_with_changes_invalidates(monkeypatch, fresh_answer_cache) -> None:
+    fresh_answer_cache.store("printer jam", [1.0, 0.0], "none", "Hardware", ANSWER)
+    reports = {"kb_collection": {"changed": 0, "removed": 0, "rebuilt": False}}
+
+    monkeypatch.setattr(indexer, "fetch_kb_data", lambda: [{"category": "Hardware", "question": "q"}])
+    monkeypatch.setattr(indexer, "fetch_guide_data", lambda: [])
+    monkeypatch.setattr(indexer, "pre_embed", lambda sources: None)
+    monkeypatch.setattr(indexer, "index_collection", lambda name, *args: reports[name])
+
+    await indexer.index_documents(app=None)
+    assert fresh_answer_cache.stats()["size"] == 1
+
+    reports["kb_collection"] = {"changed": 3, "removed": 0, "rebuilt": True}
+    await indexer.index_documents(app=None)
+    assert fresh_answer_cache.stats()["size"] == 0
@@ -1,44 +1,10 @@
-import secrets
-from typing import cast, Optional, Any
+from typing import Optional, Any
 
 import pytest
-import pytest_asyncio
 from fastapi import status
 from httpx import AsyncClient
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, get_password_hash
-from app.models.user import APIToken, User
-
-
-@pytest_asyncio.fixture
-async def test_user(session: AsyncSession) -> User:
-    result = await session.execute(select(User).where(User.username == "testuser"))
-    user = result.scalar_one_or_none()
-    if user:
-        return cast(User, user)
-
-    user = User(username="testuser", hashed_password=get_password_hash("secret123"))
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return cast(User, user)
-
-
-@pytest_asyncio.fixture
-async def jwt_token(test_user: User) -> str:
-    token = create_access_token("test", test_user.id)
-    return f"Bearer {token}"
-
-
-@pytest_asyncio.fixture
-async def api_token(test_user: User, session: AsyncSession) -> str:
-    token_str = secrets.token_hex(32)
-    token = APIToken(token=token_str, user_id=test_user.id)
-    session.add(token)
-    await session.commit()
-    return token_str
+from app.models.user import User
 
 
 @pytest.mark.asyncio
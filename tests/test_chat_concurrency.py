@@ -2,8 +2,37 @@ import pytest
 import asyncio
 import time
 
+import httpx
+
+from app.llm.hf_client import HFInferenceProvider
+
+LLM_DELAY = 0.3
+
+
+async def slow_llm_endpoint(request: httpx.Request) -> httpx.Response:
+    """Stand-in for the LLM provider: answers after LLM_DELAY seconds."""
+    await asyncio.sleep(LLM_DELAY)
+    return httpx.Response(200, json={
+        "id": "stub",
+        "created": 0,
+        "model": "stub",
+        "system_fingerprint": "stub",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "Please restart the printer."},
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    })
+
+
 @pytest.mark.asyncio
-async def test_chat_concurrent_requests(async_client):
+async def test_chat_concurrent_requests(async_client, monkeypatch):
+    client = HFInferenceProvider(token="test", base_url="http://llm.stub/v1",
+                                 transport=httpx.MockTransport(slow_llm_endpoint))
+    monkeypatch.setattr("app.services.chat_service.llm_client", client)
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+
     payload = {
         "user_id": "user-123",
         "messages": [
@@ -25,6 +54,7 @@ async def test_chat_concurrent_requests(async_client):
     start = time.perf_counter()
     responses = await asyncio.gather(*[send_request() for _ in range(num_requests)])
     duration = time.perf_counter() - start
+    await client.aclose()
 
     # Validate all responses
     for res in responses:
@@ -32,8 +62,9 @@ async def test_chat_concurrent_requests(async_client):
         data = res.json()
         assert data["user_id"] == "user-123"
         assert isinstance(data["messages"], list)
+        assert data["messages"][-1]["content"] == "Please restart the printer."
 
-    # Optional: fail if concurrency is too slow (e.g., >15 seconds for 5 requests)
-    assert duration < 15, f"Concurrent chat requests took too long: {duration:.3f} seconds"
+    # Chats waiting on the LLM must overlap; serialized calls would take num_requests * LLM_DELAY
+    assert duration < 2 * LLM_DELAY, f"Concurrent chat requests did not overlap: {duration:.3f} seconds"
 
     print(f"{num_requests} concurrent requests completed in {duration:.3f} seconds")
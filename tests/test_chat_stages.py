@@ -0,0 +1,70 @@
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from huggingface_hub import ChatCompletionOutput
+
+from app.llm.providers import OpenAICompatibleProvider
+from app.schemas.chat import ChatRequest
+from app.services import chat_service, tools
+
+STAGE_SECONDS = 0.3
+
+
+class StubLLM(OpenAICompatibleProvider):
+    def __init__(self) -> None:
+        super().__init__("http://stub/v1")
+        self.prompts = []
+
+    async def generate(self, model: str, prompt: str, params: dict, tools: Any) -> Any:
+        self.prompts.append(prompt)
+        return ChatCompletionOutput.parse_obj_as_instance({
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "Reseat the cable."}}],
+        })
+
+
+@pytest.mark.asyncio
+async def test_pre_llm_stages_run_concurrently(monkeypatch, fresh_answer_cache, capsys) -> None:
+    fresh_answer_cache.enabled = True
+    llm = StubLLM()
+
+    def fetch_tickets(user_id: str):
+        time.sleep(STAGE_SECONDS)  # blocking HTTP call
+        return [{"id": 7, "description": "monitor flicker", "status": "open"}]
+
+    async def embed_opening(text: str):
+        await asyncio.sleep(STAGE_SECONDS)
+        return [1.0, 0.0]
+
+    monkeypatch.setattr(chat_service, "llm_client", llm)
+    monkeypatch.setattr(chat_service, "embed_opening", embed_opening)
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", fetch_tickets)
+
+    req = ChatRequest(user_id="user-1", messages=[{"role": "user", "content": "screen flickers"}])
+    start = time.perf_counter()
+    response = await chat_service.process_chat(req, ["Hardware"])
+    elapsed = time.perf_counter() - start
+
+    assert response.messages[-1].content == "Reseat the cable."
+    assert "monitor flicker" in llm.prompts[0] and "USER: screen flickers" in llm.prompts[0]
+    # Ticket fetch and embedding overlap instead of adding up
+    assert elapsed < 2 * STAGE_SECONDS
+
+    log = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Chat stages for user-1")]
+    assert len(log) == 1
+    for stage in ("tickets=", "embed_opening=", "tools=", "history=", "prompt=", "time_to_llm=", "llm="):
+        assert stage in log[0]
+
+
+def test_tool_schemas_are_resolved_once_per_category_set() -> None:
+    first = tools.get_tools(["Hardware", "Network"])
+    assert tools.get_tools(["Hardware", "Network"]) is first
+    other = tools.get_tools(["Software"])
+    enums = [t["function"]["parameters"]["properties"]["type_issue"]["enum"]
+             for t in other if "type_issue" in t["function"].get("parameters", {}).get("properties", {})]
+    assert enums and all(enum == ["Software"] for enum in enums)
+    # Resolving another category set leaves the first one untouched
+    assert all(t["function"]["parameters"]["properties"]["type_issue"]["enum"] == ["Hardware", "Network"]
+               for t in first if "type_issue" in t["function"].get("parameters", {}).get("properties", {}))
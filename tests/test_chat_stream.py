@@ -0,0 +1,90 @@
+import json
+from typing import List, Tuple
+
+import httpx
+import pytest
+
+from app.llm.hf_client import HFInferenceProvider
+from app.services.chat_stream import stream_stats
+
+
+def sse_body(deltas: List[dict]) -> bytes:
+    chunks = [{"choices": [{"index": 0, "delta": delta, "finish_reason": None}]} for delta in deltas]
+    lines = [f"data: {json.dumps(chunk)}\n\n" for chunk in chunks] + ["data: [DONE]\n\n"]
+    return "".join(lines).encode()
+
+
+def parse_events(text: str) -> List[Tuple[str, dict]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        event, data = frame.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def stub_client(deltas: List[dict]) -> HFInferenceProvider:
+    async def endpoint(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=sse_body(deltas),
+                              headers={"content-type": "text/event-stream"})
+
+    return HFInferenceProvider(token="test", base_url="http://llm.stub/v1",
+                         transport=httpx.MockTransport(endpoint))
+
+
+@pytest.fixture
+def chat_app(monkeypatch):
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+    from main import app
+    app.state.all_categories = ["Hardware", "Network", "Software"]
+    return app
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_tokens_then_final(async_client, chat_app, monkeypatch):
+    client = stub_client([{"role": "assistant", "content": "Restart "},
+                          {"content": "the "}, {"content": "printer."}])
+    monkeypatch.setattr("app.services.chat_service.llm_client", client)
+    streams_before = stream_stats.stats()["streams"]
+
+    payload = {"user_id": "user-123", "messages": [{"role": "user", "content": "printer jam"}]}
+    response = await async_client.post("/chat/stream", json=payload)
+    await client.aclose()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert events[0] == ("status", {"stage": "started"})
+    assert [data["content"] for event, data in events if event == "token"] == ["Restart ", "the ", "printer."]
+    event, final = events[-1]
+    assert event == "final"
+    assert final["user_id"] == "user-123"
+    assert final["messages"][-1] == {"role": "assistant", "content": "Restart the printer."}
+
+    metrics = (await async_client.get("/metrics")).json()["chat_stream"]
+    assert metrics["streams"] == streams_before + 1
+    assert metrics["ttft_ms"]["p50"] > 0
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_tool_calls(async_client, chat_app, monkeypatch):
+    arguments = json.dumps({"issue_code": "HW-1", "issue_description": "Broken screen", "status": "open"})
+    client = stub_client([
+        {"role": "assistant", "tool_calls": [{"index": 0, "id": "call-0", "type": "function",
+                                              "function": {"name": "manage_ticket", "arguments": ""}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": arguments[:20]}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": arguments[20:]}}]},
+    ])
+    monkeypatch.setattr("app.services.chat_service.llm_client", client)
+    monkeypatch.setattr("app.services.tool_handlers.ticket.manage_ticket", lambda **kwargs: {"id": 1})
+
+    payload = {"user_id": "user-123", "messages": [{"role": "user", "content": "open a ticket"}]}
+    response = await async_client.post("/chat/stream", json=payload)
+    await client.aclose()
+
+    events = parse_events(response.text)
+    status = [data for event, data in events if event == "status" and data["stage"] == "tool"]
+    assert status == [{"stage": "tool", "tool": "manage_ticket", "arguments": json.loads(arguments)}]
+    event, final = events[-1]
+    assert event == "final"
+    assert "ticket has been created" in final["messages"][-1]["content"]
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.db import vector_registry
+from app.db.vector_registry import VectorRegistry
+from app.services import indexer, startup
+from app.services.indexer import KB_PAYLOAD_FIELDS, KB_TEXT_FIELDS, index_collection
+
+from tests.test_vector_registry import FakeEncoder
+
+
+def kb_docs(answer: str, count: int = 4):
+    return [
+        {"issue_code": f"HW-{i:03d}", "category": "Hardware",
+         "question": f"question {i}", "answer": f"{answer} {i}"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def registry(monkeypatch) -> VectorRegistry:
+    registry = VectorRegistry(
+        {
+            "embedding_model": {"default_model": "fake-model", "params": {"embedding_dim": 4}},
+            "collections": {"kb_collection": {"payload_indexes": ["category"]}},
+            "vector_backend": "numpy",
+            "versioning": {"keep_versions": 2},
+        },
+        model_loader=FakeEncoder,
+    )
+    monkeypatch.setattr(vector_registry, "_registry", registry)
+    registry.reconcile_schema()
+    return registry
+
+
+def test_rebuild_swaps_alias_and_collects_old_versions(registry) -> None:
+    versions = registry.versions("kb_collection")
+    kb = registry.get_collection("kb_collection")
+
+    # The empty first version is filled in place
+    report = index_collection("kb_collection", kb_docs("a"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    assert (report["version"], report["rebuilt"]) == ("kb_collection_v1", False)
+
+    # Unchanged source: nothing is rebuilt
+    report = index_collection("kb_collection", kb_docs("a"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    assert (report["version"], report["rebuilt"], report["changed"]) == ("kb_collection_v1", False, 0)
+
+    report = index_collection("kb_collection", kb_docs("b"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    assert report["rebuilt"] and report["version"] == "kb_collection_v2"
+    assert versions.live() == "kb_collection_v2"
+    hits = kb.query("question 1", "category", "Hardware", 4)
+    assert {h.payload["answer"] for h in hits} == {f"b {i}" for i in range(4)}
+
+    report = index_collection(
+        "kb_collection", kb_docs("c", count=3), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS
+    )
+    assert report["version"] == "kb_collection_v3"
+    assert report["collected"] == ["kb_collection_v1"]
+    assert [name for _, name in versions.versions()] == ["kb_collection_v2", "kb_collection_v3"]
+    assert kb.backend.count("kb_collection") == 3
+
+
+def test_failed_validation_keeps_live_version(registry, monkeypatch) -> None:
+    index_collection("kb_collection", kb_docs("a"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+
+    def reject(*args, **kwargs):
+        raise ValueError("probe failed")
+
+    monkeypatch.setattr(indexer, "validate_collection", reject)
+    assert index_collection(
+        "kb_collection", kb_docs("b"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS
+    ) is None
+    versions = registry.versions("kb_collection")
+    assert versions.live() == "kb_collection_v1"
+    assert [name for _, name in versions.versions()] == ["kb_collection_v1"]
+
+
+@pytest.mark.asyncio
+async def test_admin_reindex_endpoint(
+    async_client: AsyncClient, jwt_token: str, monkeypatch
+) -> None:
+    calls = []
+    release = asyncio.Event()
+
+    async def fake_index_documents(app, state=None, force=False):
+        calls.append(force)
+        await release.wait()
+        return ["Hardware"]
+
+    monkeypatch.setattr(indexer, "index_documents", fake_index_documents)
+    monkeypatch.setattr(startup.startup_state, "status", startup.READY)
+    assert (await async_client.post("/admin/reindex")).status_code == 401
+
+    headers = {"Authorization": jwt_token}
+    # Authenticated but not an admin
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", "someone-else")
+    assert (await async_client.post("/admin/reindex", headers=headers)).status_code == 403
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", "someone-else, testuser")
+
+    # Refused while the startup indexing still runs
+    monkeypatch.setattr(startup.startup_state, "status", startup.RUNNING)
+    assert (await async_client.post("/admin/reindex", headers=headers)).status_code == 409
+    monkeypatch.setattr(startup.startup_state, "status", startup.READY)
+
+    response = await async_client.post("/admin/reindex?force=true", headers=headers)
+    assert response.status_code == 202
+    # A second request while the first is running is rejected
+    assert (await async_client.post("/admin/reindex", headers=headers)).status_code == 409
+
+    from main import app
+    release.set()
+    await app.state.reindex_task
+    response = await async_client.get("/admin/reindex", headers=headers)
+    assert response.json()["status"] == "ready"
+    assert calls == [True]
+    assert startup.reindex_state.categories == ["Hardware"]
+
+
+def test_rebuild_after_failed_build_recreates_dropped_version(registry, monkeypatch) -> None:
+    index_collection("kb_collection", kb_docs("a"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    validate = indexer.validate_collection
+
+    def reject(*args, **kwargs):
+        raise ValueError("probe failed")
+
+    monkeypatch.setattr(indexer, "validate_collection", reject)
+    assert index_collection("kb_collection", kb_docs("b"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS) is None
+    assert registry.schema.known("kb_collection_v2") is None
+
+    # The next build reuses the name v2; its collection must be created again
+    monkeypatch.setattr(indexer, "validate_collection", validate)
+    report = index_collection("kb_collection", kb_docs("b"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    assert report["rebuilt"] and report["version"] == "kb_collection_v2"
+    assert registry.versions("kb_collection").live() == "kb_collection_v2"
+
+
+def test_index_collection_scans_existing_points_once(registry, monkeypatch) -> None:
+    index_collection("kb_collection", kb_docs("a"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    backend = registry.get_collection("kb_collection").backend
+    scans = []
+    existing_hashes = backend.existing_hashes
+
+    def counting(collection_name):
+        scans.append(collection_name)
+        return existing_hashes(collection_name)
+
+    monkeypatch.setattr(backend, "existing_hashes", counting)
+    report = index_collection("kb_collection", kb_docs("b"), KB_TEXT_FIELDS, KB_PAYLOAD_FIELDS)
+    assert report["rebuilt"] and report["sync"]["updated"] == 4
+    assert scans == ["kb_collection"]
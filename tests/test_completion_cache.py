@@ -0,0 +1,89 @@
+import httpx
+import pytest
+
+from app.llm.hf_client import HFInferenceProvider
+from app.llm.providers import OpenAICompatibleProvider
+from app.utils.completion_cache import CompletionCache, completion_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_covers_provider_and_request_body() -> None:
+    provider = HFInferenceProvider(token="x")
+    other = OpenAICompatibleProvider("http://localhost:8081/v1")
+    tools = [{"name": "t"}]
+
+    def key(client, model="m", prompt="prompt", params=None, tools=tools):
+        body = client.request_body(model, prompt, params or {"temperature": 0.7}, tools)
+        return completion_key(client.identity, body)
+
+    base = key(provider)
+    assert base == key(provider)
+    assert base != key(provider, prompt="prompt ")
+    assert base != key(provider, tools=[{"name": "u"}])
+    assert base != key(provider, params={"temperature": 0.2})
+    assert base != key(provider, model="other")
+    assert base != key(other)
+    # Params the provider does not send do not change the key
+    assert base == key(provider, params={"temperature": 0.7, "return_full_text": False})
+
+
+def test_sqlite_tier_survives_restart_and_expires(tmp_path) -> None:
+    clock = FakeClock()
+    path = tmp_path / "completions.sqlite3"
+    cache = CompletionCache(capacity=1, ttl_seconds=60, path=path, clock=clock)
+    cache.put("a", {"choices": ["A"]}, seconds=2.0)
+    cache.put("b", {"choices": ["B"]}, seconds=3.0)
+
+    # "a" was evicted from the 1-entry LRU but is still on disk
+    assert cache.get("a") == {"choices": ["A"]}
+    restarted = CompletionCache(capacity=8, ttl_seconds=60, path=path, clock=clock)
+    assert restarted.get("b") == {"choices": ["B"]}
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["llm_seconds_saved"] == 3.0
+
+    clock.now += 61
+    assert restarted.get("b") is None
+    stats = restarted.stats()
+    assert stats["expired"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_skips_llm_unless_opted_out(async_client, monkeypatch, fresh_completion_cache):
+    calls = []
+
+    async def endpoint(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"choices": [{
+            "index": 0, "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "Please restart the printer."},
+        }]})
+
+    client = HFInferenceProvider(token="test", base_url="http://llm.stub/v1",
+                           transport=httpx.MockTransport(endpoint))
+    monkeypatch.setattr("app.services.chat_service.llm_client", client)
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+    from main import app
+    app.state.all_categories = ["Hardware"]
+
+    payload = {"user_id": "user-123", "messages": [{"role": "user", "content": "printer jam"}]}
+    first = await async_client.post("/chat", json=payload)
+    second = await async_client.post("/chat", json=payload)
+    assert len(calls) == 1
+    assert first.json() == second.json()
+
+    await async_client.post("/chat", json={**payload, "use_cache": False})
+    assert len(calls) == 2
+    await client.aclose()
+
+    stats = (await async_client.get("/metrics")).json()["completion_cache"]
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bypassed"] == 1
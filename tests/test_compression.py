@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from app.db.compression import CompressionConfig, DimensionReducer
+from app.db.vector_registry import VectorRegistry
+
+from tests.test_vector_registry import FakeEncoder
+
+
+def test_pca_basis_is_persisted(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    path = tmp_path / "kb-pca3.npz"
+
+    reducer = DimensionReducer("pca", 8, 3, path=path)
+    assert not reducer.fitted
+    with pytest.raises(RuntimeError):
+        reducer.transform(vectors[0])
+    reducer.fit(vectors)
+
+    reloaded = DimensionReducer("pca", 8, 3, path=path)
+    assert reloaded.fitted
+    assert reloaded.signature == reducer.signature
+    assert reloaded.transform(vectors).shape == (50, 3)
+    np.testing.assert_allclose(reloaded.transform(vectors[0]), reducer.transform(vectors[0]))
+
+    with pytest.raises(ValueError, match="at least 10 documents"):
+        DimensionReducer("pca", 8, 10).fit(vectors[:5])
+
+
+def test_invalid_compression_config() -> None:
+    with pytest.raises(ValueError):
+        CompressionConfig.from_config({"quantization": "binary"})
+    with pytest.raises(ValueError):
+        CompressionConfig.from_config({"reduction": "pca"})
+    with pytest.raises(ValueError):
+        CompressionConfig(reduction="truncate", reduced_dim=16).stored_dim(8)
+
+
+def test_registry_applies_reduction_and_quantization() -> None:
+    registry = VectorRegistry(
+        {
+            "embedding_model": {"default_model": "fake-model", "params": {"embedding_dim": 4}},
+            "vector_backend": "numpy",
+            "compression": {"quantization": "int8", "reduction": "truncate", "reduced_dim": 2},
+        },
+        model_loader=FakeEncoder,
+    )
+    kb = registry.get_collection("kb_collection")
+    docs = [{"question": f"question {i}", "category": "Printer"} for i in range(10)]
+    kb.upsert_documents(docs, ["question"], ["category"])
+
+    schema = kb.backend.describe_collection("kb_collection")
+    assert (schema.dim, schema.quantization) == (2, "int8")
+    hits = kb.query("question 3", "category", "Printer", 3)
+    assert len(hits) == 3
+    assert registry.stats()["compression"]["collection_dim"] == 2
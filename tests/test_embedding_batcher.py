@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.db.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encodes a text as [len(text)] and records every batch it receives."""
+
+    def __init__(self, seconds: float = 0.02):
+        self.seconds = seconds
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts, **kwargs):
+        with self._lock:
+            self.batches.append(list(texts))
+        time.sleep(self.seconds)
+        return np.array([[float(len(t))] for t in texts])
+
+
+def test_concurrent_encodes_share_batches() -> None:
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=20)
+    texts = ["x" * i for i in range(1, 25)]
+
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        vectors = list(pool.map(batcher.encode, texts))
+    batcher.close()
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    assert len(encoder.batches) < len(texts)
+    assert max(len(b) for b in encoder.batches) <= 8
+
+    stats = batcher.stats()
+    assert stats["items"] == 24
+    assert sum(stats["batch_size_histogram"].values()) == stats["batches"]
+    assert stats["queue_wait_ms"]["p99"] >= stats["queue_wait_ms"]["p50"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_aencode_and_errors_resolve_every_caller() -> None:
+    batcher = EmbeddingBatcher(RecordingEncoder(seconds=0), max_wait_ms=5)
+    vectors = await asyncio.gather(*[batcher.aencode("ab"), batcher.aencode("abc")])
+    assert [v[0] for v in vectors] == [2.0, 3.0]
+
+    class Failing:
+        def encode(self, texts, **kwargs):
+            raise RuntimeError("model crashed")
+
+    failing = EmbeddingBatcher(Failing(), max_wait_ms=5)
+    results = await asyncio.gather(
+        failing.aencode("a"), failing.aencode("b"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert failing.stats()["failures"] >= 1
+
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.utils.embedding_cache import QueryEmbeddingCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_normalizes_and_expires() -> None:
+    clock = FakeClock()
+    cache = QueryEmbeddingCache(capacity=2, ttl_seconds=10, clock=clock)
+    encoded = []
+
+    def encode(text: str) -> list:
+        encoded.append(text)
+        return [float(len(text))]
+
+    cache.get_or_encode("m", "Printer paper jam", encode)
+    cache.get_or_encode("m", "  printer   PAPER jam ", encode)
+    cache.get_or_encode("other-model", "printer paper jam", encode)
+    assert len(encoded) == 2
+
+    clock.now = 11
+    cache.get_or_encode("m", "printer paper jam", encode)
+    assert len(encoded) == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["expired"] == 1
+    assert stats["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_is_consistent_under_concurrent_requests() -> None:
+    cache = QueryEmbeddingCache(capacity=8)
+    queries = ["vpn won't connect", "printer paper jam"] * 50
+
+    await asyncio.gather(*[
+        asyncio.to_thread(cache.get_or_encode, "m", q, lambda text: [1.0])
+        for q in queries
+    ])
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == len(queries)
+    assert stats["size"] == 2
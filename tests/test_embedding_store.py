@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.db.embedding_store import EmbeddingStore, text_hash
+
+
+def fake_encode(texts, batch_size: int = 32):
+    fake_encode.calls += len(texts)
+    return np.array([[len(t), 1.0, 0.0, 0.5] for t in texts], dtype=np.float32)
+
+
+fake_encode.calls = 0
+
+
+def test_store_reuses_vectors_across_instances(tmp_path) -> None:
+    texts = ["printer jam", "vpn down", "printer jam"]
+    store = EmbeddingStore(tmp_path, "sentence-transformers/fake", dim=4)
+
+    first = store.encode_many(texts, fake_encode)
+    assert fake_encode.calls == 2
+
+    # A second process/worker opening the same directory sees the rows
+    other = EmbeddingStore(tmp_path, "sentence-transformers/fake", dim=4)
+    second = other.encode_many(texts + ["wifi slow"], fake_encode)
+    assert fake_encode.calls == 3
+    np.testing.assert_allclose(second[:3], first)
+    assert other.stats()["rows"] == 3
+
+
+def test_compact_drops_stale_rows(tmp_path) -> None:
+    store = EmbeddingStore(tmp_path, "fake", dim=4, dtype="float32")
+    store.encode_many(["a", "bb", "ccc"], fake_encode)
+
+    removed = store.compact([text_hash("bb")])
+
+    assert removed == 2
+    assert store.stats() == {**store.stats(), "rows": 1, "stale_rows": 0}
+    np.testing.assert_allclose(store.get_many([text_hash("bb")])[text_hash("bb")][0], 2.0)
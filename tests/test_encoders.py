@@ -0,0 +1,40 @@
+import pytest
+import torch
+
+from app.db.encoders import load_encoder, variant_name
+
+
+class TinyEncoder(torch.nn.Module):
+    """SentenceTransformer-shaped module: an nn.Module with `encode`."""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.proj = torch.nn.Linear(16, 8)
+
+    def encode(self, texts, **kwargs):
+        with torch.no_grad():
+            return self.proj(torch.ones(len(texts), 16)).numpy()
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning", "ignore::UserWarning")
+def test_torch_int8_quantizes_linear_layers() -> None:
+    model = load_encoder("tiny", {"backend": "torch_int8"}, loader=TinyEncoder)
+    assert isinstance(model.proj, torch.ao.nn.quantized.dynamic.Linear)
+    assert model.encode(["paper jam"]).shape == (1, 8)
+
+    plain = load_encoder("tiny", {}, loader=TinyEncoder)
+    assert isinstance(plain.proj, torch.nn.Linear)
+
+
+def test_unknown_backend_is_rejected() -> None:
+    # onnx needs sentence-transformers>=3.2, newer than the pinned version
+    for backend in ("onnx", "tensorrt"):
+        with pytest.raises(ValueError):
+            load_encoder("tiny", {"backend": backend}, loader=TinyEncoder)
+
+
+def test_variant_name_separates_cached_vectors() -> None:
+    assert variant_name("mpnet") == "mpnet"
+    assert variant_name("mpnet", {"backend": "torch"}) == "mpnet"
+    assert variant_name("mpnet", {"backend": "torch_int8"}) == "mpnet@torch_int8"
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 
@@ -7,3 +9,48 @@ async def test_read_main(async_client: AsyncClient) -> None:
     response = await async_client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+@pytest.mark.asyncio
+async def test_ready_turns_green_after_background_startup(
+    async_client: AsyncClient, monkeypatch
+) -> None:
+    from app.services import indexer, startup
+    from main import app
+
+    state = startup.startup_state
+    state.reset()
+    release = asyncio.Event()
+
+    async def fake_index_documents(app, state=None):
+        state.enter("indexing kb_collection")
+        await release.wait()
+        state.collection_done("kb_collection", {"updated": 3})
+        return ["Hardware", "Network"]
+
+    monkeypatch.setattr(startup, "warmup_embedding_model", lambda: None)
+    async def no_llm_warmup():
+        return None
+
+    monkeypatch.setattr(startup, "warmup_llm", no_llm_warmup)
+    monkeypatch.setattr(startup, "warmup_tokenizer", lambda: None)
+    monkeypatch.setattr(indexer, "index_documents", fake_index_documents)
+
+    task = asyncio.create_task(startup.run_startup(app))
+    while state.stage != "indexing kb_collection":
+        await asyncio.sleep(0.01)
+    response = await async_client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["stage"] == "indexing kb_collection"
+    # Liveness is independent of readiness
+    assert (await async_client.get("/health")).status_code == 200
+
+    release.set()
+    await task
+    response = await async_client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["categories"] == 2
+    assert body["collections"] == {"kb_collection": {"updated": 3}}
+    assert app.state.all_categories == ["Hardware", "Network"]
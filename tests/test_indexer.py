@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from app.db.embedding_store import EmbeddingStore, text_hash
+from app.services import indexer
+from app.services.parallel_embedding import embed_in_processes, worker_count
+from app.services.startup import StartupState
+
+STAGE_SECONDS = 0.2
+
+
+@pytest.mark.asyncio
+async def test_fetches_and_collections_run_in_parallel(monkeypatch) -> None:
+    def slow_fetch(category):
+        def fetch():
+            time.sleep(STAGE_SECONDS)
+            return [{"category": category, "question": "q", "issue": "i"}]
+        return fetch
+
+    def slow_index(collection_name, data, text_fields, payload_fields, force):
+        time.sleep(STAGE_SECONDS)
+        return {"documents": len(data)}
+
+    monkeypatch.setattr(indexer, "fetch_kb_data", slow_fetch("Hardware"))
+    monkeypatch.setattr(indexer, "fetch_guide_data", slow_fetch("Network"))
+    monkeypatch.setattr(indexer, "pre_embed", lambda sources: None)
+    monkeypatch.setattr(indexer, "index_collection", slow_index)
+
+    state = StartupState()
+    start = time.perf_counter()
+    categories = await indexer.index_documents(app=None, state=state)
+    elapsed = time.perf_counter() - start
+
+    assert categories == ["Hardware", "Network"]
+    # Sequential would take 4 stages; parallel is two (fetch, then index)
+    assert elapsed < 3 * STAGE_SECONDS
+    timings = state.snapshot()["stage_seconds"]
+    for stage in ("fetch kb", "fetch guide", "index kb_collection", "index guide_collection"):
+        assert timings[stage] >= STAGE_SECONDS
+    assert timings["total"] < 3 * STAGE_SECONDS
+
+
+def test_process_pool_only_for_enough_new_texts(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert worker_count("auto", 10_000, 256) == 8
+    assert worker_count(3, 10_000, 256) == 3
+    assert worker_count("auto", 300, 256) == 2
+    assert worker_count(0, 10_000, 256) == 0
+
+    store = EmbeddingStore(tmp_path, "fake-model", 2)
+    store.put_many({text_hash("known"): [1.0, 0.0]})
+    assert store.missing(["known", "new", "new"]) == ["new"]
+    # Two texts never justify a second process
+    assert embed_in_processes(store, "fake-model", {}, ["known", "new"]) is None
+
+
+def test_process_pool_fills_shared_store(tmp_path, monkeypatch) -> None:
+    from tests.fake_encoder import DIM, HashEncoder, load_fake_encoder
+
+    # Two workers even on a single-CPU machine
+    monkeypatch.setattr("os.cpu_count", lambda: 2)
+    store = EmbeddingStore(tmp_path, "fake-model", DIM)
+    store.put_many({text_hash("known"): [1.0, 0.0]})
+    texts = ["known"] + [f"text {i}" for i in range(40)]
+
+    report = embed_in_processes(
+        store, "fake-model", {}, texts, workers=2, batch_size=8,
+        min_texts_per_worker=10, loader=load_fake_encoder,
+    )
+
+    assert report["workers"] == 2 and report["encoded"] == 40
+    assert store.missing(texts) == []
+    expected = HashEncoder().encode(texts[1:])
+    stored = store.get_many([text_hash(t) for t in texts[1:]])
+    for text, vector in zip(texts[1:], expected):
+        assert stored[text_hash(text)] == pytest.approx(vector, abs=1e-3)  # float16 store
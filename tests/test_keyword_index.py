@@ -0,0 +1,40 @@
+from app.services.keyword_index import KeywordIndex
+
+GUIDES = [
+    {"issue_code": "PR-002", "issue": "Printer prints blank pages", "category": "Printer"},
+    {"issue_code": "NW-001", "issue": "VPN won't connect", "category": "Network"},
+    {"issue_code": "PR-003", "issue": "Paper jam", "category": "Printer"},
+]
+
+
+def make_index() -> KeywordIndex:
+    index = KeywordIndex()
+    index.build("guide_collection", GUIDES, "issue", ["issue_code", "issue", "category"])
+    return index
+
+
+def test_issue_code_and_exact_phrase_bypass_dense_search() -> None:
+    index = make_index()
+
+    by_code = index.lookup("guide_collection", "still failing, see pr-002", 3)
+    assert [h.payload["issue_code"] for h in by_code] == ["PR-002"]
+
+    by_phrase = index.lookup(
+        "guide_collection", "Help: my VPN won't connect since Monday", 3,
+        metadata_value="Network",
+    )
+    assert [h.payload["issue_code"] for h in by_phrase] == ["NW-001"]
+    assert by_phrase[0].score == 1.0
+
+
+def test_fallback_when_no_exact_match() -> None:
+    index = make_index()
+
+    # Too short to count as an exact phrase, wrong category, or just a paraphrase
+    assert index.lookup("guide_collection", "paper jam", 3) is None
+    assert index.lookup("guide_collection", "PR-002", 3, metadata_value="Network") is None
+    assert index.lookup("guide_collection", "printer prints empty pages", 3) is None
+
+    stats = index.stats()
+    assert stats["lookups"] == 3
+    assert stats["bypass_rate"] == 0.0
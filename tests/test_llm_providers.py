@@ -0,0 +1,68 @@
+import httpx
+import pytest
+
+from app.llm.hf_client import HFInferenceProvider
+from app.llm.providers import OpenAICompatibleProvider, create_provider, openai_params
+from app.llm.stub_server import create_stub_app
+
+TOOLS = [{"type": "function", "function": {
+    "name": "query_knowledge_base",
+    "parameters": {"properties": {"query": {"type": "string"},
+                                  "type_issue": {"type": "string", "enum": ["Hardware"]}}},
+}}]
+PARAMS = {"max_new_tokens": 64, "temperature": 0.2, "top_p": 0.9, "return_full_text": False}
+
+
+def stub_provider(**stub_options) -> tuple:
+    stub = create_stub_app(**stub_options)
+    provider = OpenAICompatibleProvider(
+        base_url="http://stub/v1", transport=httpx.ASGITransport(app=stub)
+    )
+    return provider, stub
+
+
+def test_openai_params_mapping() -> None:
+    assert openai_params(PARAMS) == {"max_tokens": 64, "temperature": 0.2, "top_p": 0.9}
+
+
+@pytest.mark.asyncio
+async def test_model_and_params_are_sent() -> None:
+    provider, stub = stub_provider(answer="Reseat the cable.")
+    completion = await provider.generate("local/model-7b", "USER: hi\nASSISTANT:", PARAMS, [])
+    await provider.aclose()
+
+    assert completion.choices[0].message.content == "Reseat the cable."
+    sent = stub.state.requests[-1]
+    assert sent["model"] == "local/model-7b"
+    assert (sent["max_tokens"], sent["temperature"], sent["top_p"]) == (64, 0.2, 0.9)
+    assert "return_full_text" not in sent and "tools" not in sent
+
+
+@pytest.mark.asyncio
+async def test_stream_and_tool_calls_through_stub() -> None:
+    provider, _ = stub_provider(answer="Reseat the cable now.", tool_calls=True)
+    tokens = []
+    completion = await provider.generate_stream(
+        "m", "USER: printer jam\nTOOL-CALL-OUTPUT: kb\nASSISTANT:", PARAMS, TOOLS, tokens.append
+    )
+    assert "".join(tokens) == "Reseat the cable now."
+    assert completion.choices[0].message.content == "Reseat the cable now."
+
+    completion = await provider.generate("m", "USER: printer jam\nASSISTANT:", PARAMS, TOOLS)
+    call = completion.choices[0].message.tool_calls[0].function
+    assert call.name == "query_knowledge_base"
+    assert call.arguments == '{"query": "printer jam", "type_issue": "Hardware"}'
+    await provider.aclose()
+
+
+def test_create_provider_from_config(monkeypatch) -> None:
+    monkeypatch.delenv("LLM_BASE_URL", raising=False)
+    assert isinstance(create_provider({"provider": "hf"}), HFInferenceProvider)
+    local = create_provider({
+        "provider": "openai_compatible",
+        "openai_compatible": {"base_url": "http://llm.internal:8000/v1/"},
+    })
+    assert type(local) is OpenAICompatibleProvider
+    assert local.base_url == "http://llm.internal:8000/v1"
+    with pytest.raises(ValueError):
+        create_provider({"provider": "nope"})
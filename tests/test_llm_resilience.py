@@ -0,0 +1,149 @@
+import random
+
+import httpx
+import pytest
+
+from app.llm.providers import OpenAICompatibleProvider
+from app.llm.resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, ResilientProvider
+from app.llm.stub_server import create_stub_app
+
+PARAMS = {"max_new_tokens": 64}
+
+
+def resilient(stub_options: dict, **options) -> tuple:
+    stub = create_stub_app(**stub_options)
+    provider = OpenAICompatibleProvider(base_url="http://stub/v1", transport=httpx.ASGITransport(app=stub))
+    options.setdefault("backoff_base_seconds", 0.01)
+    return ResilientProvider(provider, rng=random.Random(0), **options), stub
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_with_backoff() -> None:
+    client, stub = resilient({"fail_first": 2, "answer": "ok"}, max_retries=2)
+    completion = await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+
+    assert completion.choices[0].message.content == "ok"
+    assert len(stub.state.requests) == 3
+    stats = client.stats()
+    assert (stats["attempts"], stats["retries"], stats["failures"]) == (3, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried() -> None:
+    client, stub = resilient({"fail_first": 1, "error_status": 400})
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+    assert len(stub.state.requests) == 1
+    assert client.stats()["circuit"]["error_rate"] == 0.0
+
+
+def test_backoff_uses_full_jitter() -> None:
+    client = ResilientProvider(OpenAICompatibleProvider("http://x"),
+                               backoff_base_seconds=1, backoff_max_seconds=3, rng=random.Random(1))
+    waits = [client.backoff(retry) for retry in (0, 1, 5) for _ in range(50)]
+    assert all(0 <= w <= 1 for w in waits[:50])
+    assert all(0 <= w <= 2 for w in waits[50:100])
+    assert all(0 <= w <= 3 for w in waits[100:])
+    assert len(set(waits)) == len(waits)
+
+
+@pytest.mark.asyncio
+async def test_deadline_exceeded_maps_to_504() -> None:
+    client, _ = resilient({"latency_ms": 500}, deadline_seconds=0.1, attempt_timeout_seconds=5)
+    with pytest.raises(DeadlineExceeded) as error:
+        await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+    assert error.value.status_code == 504
+    assert client.stats()["deadline_exceeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_attempt_times_out_and_is_retried() -> None:
+    client, stub = resilient(
+        {"slow_first": 1, "slow_latency_ms": 1000, "answer": "ok"},
+        deadline_seconds=5, attempt_timeout_seconds=0.2,
+    )
+    completion = await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+    assert completion.choices[0].message.content == "ok"
+    assert client.stats()["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_one() -> None:
+    client, stub = resilient(
+        {"answer": "ok"}, hedging=True, hedge_min_samples=3, hedge_min_delay_seconds=0.05,
+    )
+    for _ in range(3):
+        await client.generate("m", "USER: warm", PARAMS, [])
+    # The next request (number 4) is slow, its hedge (number 5) is not
+    stub_slow = create_stub_app(answer="ok", slow_first=4, slow_latency_ms=2000)
+    stub_slow.state.requests.extend(stub.state.requests)
+    client.provider = OpenAICompatibleProvider(base_url="http://stub/v1",
+                                               transport=httpx.ASGITransport(app=stub_slow))
+
+    completion = await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+    assert completion.choices[0].message.content == "ok"
+    stats = client.stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+    assert stats["latency_p95_seconds"] < 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_then_fails_fast_and_recovers() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(window=4, min_calls=4, error_rate_threshold=0.5, open_seconds=10,
+                             clock=lambda: now[0])
+    client, stub = resilient({"error_rate": 1.0}, max_retries=0, breaker=breaker)
+    for _ in range(4):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.generate("m", "USER: hi", PARAMS, [])
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpen) as error:
+        await client.generate("m", "USER: hi", PARAMS, [])
+    assert (error.value.status_code, error.value.retry_after) == (503, 10)
+    assert len(stub.state.requests) == 4
+
+    # After open_seconds one probe goes through; success closes the circuit
+    now[0] = 11
+    healthy = create_stub_app(answer="ok")
+    client.provider = OpenAICompatibleProvider(base_url="http://stub/v1",
+                                               transport=httpx.ASGITransport(app=healthy))
+    completion = await client.generate("m", "USER: hi", PARAMS, [])
+    await client.aclose()
+    assert completion.choices[0].message.content == "ok"
+    assert client.stats()["circuit"] == {"state": "closed", "error_rate": 0.0, "opened": 1, "fast_failures": 1}
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_returns_503_with_retry_after(async_client, monkeypatch) -> None:
+    breaker = CircuitBreaker(min_calls=1, error_rate_threshold=0.5, open_seconds=30)
+    breaker.record(False)
+    client, stub = resilient({}, breaker=breaker)
+    monkeypatch.setattr("app.services.chat_service.llm_client", client)
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+    from main import app
+    app.state.all_categories = ["Hardware"]
+
+    body = {"user_id": "user-123", "messages": [{"role": "user", "content": "screen flickers"}]}
+    response = await async_client.post("/chat", json=body)
+    await client.aclose()
+
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert stub.state.requests == []
+    assert (await async_client.get("/metrics")).json()["llm_resilience"]["circuit"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_before_first_token() -> None:
+    client, stub = resilient({"fail_first": 1, "answer": "reseat the cable"})
+    tokens = []
+    completion = await client.generate_stream("m", "USER: hi", PARAMS, [], tokens.append)
+    await client.aclose()
+    assert "".join(tokens) == completion.choices[0].message.content == "reseat the cable"
+    assert len(stub.state.requests) == 2
@@ -0,0 +1,56 @@
+from app.services import prompt
+from app.services.prompt_budget import PromptBudget, TokenCounter
+
+
+def conversation(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "detail " * 40})
+        messages.append({"role": "tool-call-output", "content": f"result {i} " + "step " * 80})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "advice " * 40})
+    return messages
+
+
+def test_short_conversation_is_sent_verbatim(monkeypatch) -> None:
+    monkeypatch.setattr(prompt, "prompt_budget", PromptBudget(max_prompt_tokens=100_000))
+    text, report = prompt.assemble_prompt(
+        [{"role": "user", "content": "printer jam"}, {"role": "assistant", "content": "Which model?"}],
+        "user-1", ["Hardware"], tickets=[],
+    )
+    # Lines, not the repr of a Python list
+    assert "USER: printer jam\nASSISTANT: Which model?\nASSISTANT:" in text
+    assert "['" not in text
+    assert report.tokens_saved == 0
+
+
+def test_long_conversation_is_compacted_within_budget(monkeypatch) -> None:
+    budget = PromptBudget(max_prompt_tokens=2500, keep_recent_messages=3, summary_chars=40,
+                          counter=TokenCounter())
+    monkeypatch.setattr(prompt, "prompt_budget", budget)
+    messages = conversation(12)
+
+    text, report = prompt.assemble_prompt(messages, "user-1", ["Hardware"], tickets=[])
+
+    assert report.tokens <= 2500 < report.uncompacted_tokens
+    assert report.tokens == budget.counter.count(text)
+    assert report.compacted_messages > 0
+    # The latest turn is kept word for word
+    for m in messages[-3:]:
+        assert m["content"] in text
+    assert "TOOL-CALL-OUTPUT (earlier result, summarized): result 0" in text or report.dropped_messages
+
+    stats = budget.stats()
+    assert stats["compacted_prompts"] == 1
+    assert stats["tokens_saved"] == report.tokens_saved > 0
+    assert stats["recent"][-1]["tokens_saved"] == report.tokens_saved
+
+
+def test_oldest_summaries_are_dropped_last() -> None:
+    budget = PromptBudget(max_prompt_tokens=120, keep_recent_messages=2, summary_chars=20)
+    turns = [("USER", "old message " * 30) for _ in range(20)] + [("USER", "latest"), ("ASSISTANT", "reply")]
+
+    text, report = budget.fit(turns, lambda lines: "\n".join(lines))
+
+    assert report.dropped_messages > 0
+    assert text.startswith(f"[{report.dropped_messages} earlier messages omitted]")
+    assert text.endswith("USER: latest\nASSISTANT: reply")
@@ -0,0 +1,66 @@
+import pytest
+
+from app.db.schema import SchemaError
+from app.db.vector_backends import NumpyBackend
+from app.db.vector_registry import VectorRegistry
+
+from tests.test_vector_registry import FakeEncoder
+
+
+class CountingBackend(NumpyBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.describes = 0
+        self.indexes = []
+
+    def describe_collection(self, collection_name):
+        self.describes += 1
+        return super().describe_collection(collection_name)
+
+    def create_index(self, collection_name, field_name):
+        self.indexes.append((collection_name, field_name))
+        super().create_index(collection_name, field_name)
+
+
+def make_registry(backend: NumpyBackend, dim: int = 4) -> VectorRegistry:
+    registry = VectorRegistry(
+        {
+            "embedding_model": {"default_model": "fake", "params": {"embedding_dim": dim}},
+            "collections": {"kb_collection": {"payload_indexes": ["category", "issue_code"]}},
+            "vector_backend": "numpy",
+        },
+        model_loader=FakeEncoder,
+    )
+    registry._numpy_backend = backend
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_schema_is_reconciled_once() -> None:
+    backend = CountingBackend()
+    registry = make_registry(backend)
+
+    registry.reconcile_schema()
+    describes = backend.describes
+    # A fresh deployment starts at version 1 behind the alias
+    assert backend.get_alias("kb_collection") == "kb_collection_v1"
+    assert sorted(backend.indexes) == [
+        ("kb_collection_v1", "category"), ("kb_collection_v1", "issue_code")
+    ]
+
+    kb = registry.get_async_collection("kb_collection")
+    for _ in range(5):
+        await kb.query("paper jam", "category", "Printer", 3)
+    registry.get_collection("kb_collection").upsert_documents(
+        [{"text": "paper jam", "category": "Printer"}], ["text"], ["category"]
+    )
+    assert backend.describes == describes
+    assert len(backend.indexes) == 2
+
+
+def test_wrong_vector_size_fails_fast() -> None:
+    backend = NumpyBackend()
+    backend.create_collection("kb_collection", 8, "COSINE")
+
+    with pytest.raises(SchemaError, match="8-dim"):
+        make_registry(backend, dim=4).reconcile_schema()
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.db.compression import CompressionConfig
+from app.db.vector_backends import NumpyBackend, QdrantBackend
+
+
+def load(backend, points) -> None:
+    backend.create_collection("kb_collection", 8, "COSINE")
+    backend.create_index("kb_collection", "category")
+    backend.upsert("kb_collection", points)
+
+
+@pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+def test_numpy_backend_matches_qdrant() -> None:
+    rng = np.random.default_rng(0)
+    points = [
+        PointStruct(
+            id=i,
+            vector=rng.normal(size=8).tolist(),
+            payload={"category": ["Printer", "Network"][i % 2], "content_hash": str(i)},
+        )
+        for i in range(200)
+    ]
+    numpy_backend, qdrant_backend = NumpyBackend(), QdrantBackend(QdrantClient(":memory:"))
+    load(numpy_backend, points)
+    load(qdrant_backend, points)
+
+    for _ in range(10):
+        query = rng.normal(size=8)
+        expected = qdrant_backend.query("kb_collection", query, 5, "category", "Printer")
+        hits = numpy_backend.query("kb_collection", query, 5, "category", "Printer")
+        assert [str(h.id) for h in hits] == [str(h.id) for h in expected]
+        assert [h.score for h in hits] == pytest.approx([h.score for h in expected], abs=1e-5)
+        assert all(h.payload["category"] == "Printer" for h in hits)
+
+    numpy_backend.delete("kb_collection", ["0", "2"])
+    assert numpy_backend.count("kb_collection") == 198
+    assert "0" not in numpy_backend.existing_hashes("kb_collection")
+    assert numpy_backend.query("kb_collection", query, 5, "category", "Unknown") == []
+
+
+def test_numpy_int8_rescore_keeps_ranking() -> None:
+    rng = np.random.default_rng(1)
+    points = [
+        PointStruct(id=i, vector=rng.normal(size=64).tolist(), payload={"category": "Printer"})
+        for i in range(300)
+    ]
+    exact = NumpyBackend()
+    quantized = NumpyBackend(CompressionConfig(quantization="int8", oversampling=3.0))
+    for backend in (exact, quantized):
+        backend.create_collection("kb_collection", 64, "COSINE")
+        backend.upsert("kb_collection", points)
+
+    query = rng.normal(size=64)
+    expected = exact.query("kb_collection", query, 3, "category", "Printer")
+    hits = quantized.query("kb_collection", query, 3, "category", "Printer")
+    assert [h.id for h in hits] == [h.id for h in expected]
+    # Rescored hits carry exact scores
+    assert [h.score for h in hits] == pytest.approx([h.score for h in expected], abs=1e-5)
+    assert quantized.describe_collection("kb_collection").quantization == "int8"
+    assert quantized.memory_bytes("kb_collection") < exact.memory_bytes("kb_collection")
+
+
+def test_numpy_int8_rescore_survives_concurrent_delete(monkeypatch) -> None:
+    rng = np.random.default_rng(2)
+    backend = NumpyBackend(CompressionConfig(quantization="int8", oversampling=2.0))
+    backend.create_collection("kb_collection", 16, "COSINE")
+    backend.upsert("kb_collection", [
+        PointStruct(id=i, vector=rng.normal(size=16).tolist(), payload={"category": "Printer"})
+        for i in range(50)
+    ])
+    collection = backend._collection("kb_collection")
+    partition = collection.partition
+
+    def partition_then_delete(key, value):
+        # A writer deletes every point right after the search takes its snapshot
+        snapshot = partition(key, value)
+        backend.delete("kb_collection", [str(i) for i in range(50)])
+        return snapshot
+
+    monkeypatch.setattr(collection, "partition", partition_then_delete)
+    hits = backend.query("kb_collection", rng.normal(size=16), 5, "category", "Printer")
+    assert len(hits) == 5
@@ -0,0 +1,150 @@
+import zlib
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from app.db.vector_registry import VectorRegistry, VectorSearch
+
+
+class FakeEncoder:
+    """Deterministic stand-in for SentenceTransformer (4-dim vectors)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        self.calls += 1
+        single = isinstance(texts, str)
+        rows = [
+            np.random.default_rng(zlib.crc32(t.encode())).random(4, dtype=np.float32)
+            for t in ([texts] if single else texts)
+        ]
+        return rows[0] if single else np.stack(rows)
+
+
+def make_registry() -> VectorRegistry:
+    config = {
+        "embedding_model": {
+            "default_model": "fake-model",
+            "params": {"embedding_dim": 4},
+        }
+    }
+    return VectorRegistry(
+        config,
+        model_loader=FakeEncoder,
+        client_factory=lambda: QdrantClient(location=":memory:"),
+    )
+
+
+def test_registry_shares_model_and_collection() -> None:
+    registry = make_registry()
+
+    kb = registry.get_collection("kb_collection")
+    guide = registry.get_collection("guide_collection")
+
+    assert registry.get_collection("kb_collection") is kb
+    assert kb.model is guide.model
+    assert kb.backend is not guide.backend
+
+    stats = registry.stats()
+    assert stats["model_loads"] == 1
+    assert stats["collection_opens"] == 2
+    assert stats["collection_hits"] == 1
+    assert stats["collections"] == ["guide_collection", "kb_collection"]
+
+
+def test_upsert_documents_uploads_in_chunks() -> None:
+    registry = make_registry()
+    kb = registry.get_collection("kb_collection")
+    documents = [
+        {"question": f"question {i}", "answer": "answer", "category": "Printer"}
+        for i in range(25)
+    ]
+
+    report = kb.upsert_documents(
+        documents=documents,
+        text_fields=["question", "answer"],
+        payload_fields=["category", "question"],
+        encode_batch_size=4,
+        upload_chunk_size=10,
+        upload_parallelism=2,
+    )
+
+    assert report["documents"] == 25
+    assert kb.model.calls == 3
+    assert kb.backend.count("kb_collection") == 25
+
+
+def test_sync_documents_only_reembeds_changes() -> None:
+    registry = make_registry()
+    guide = registry.get_collection("guide_collection")
+    documents = [
+        {"issue_code": f"PR-{i:03d}", "issue": f"issue {i}", "category": "Printer"}
+        for i in range(5)
+    ]
+    fields = {"text_fields": ["issue"], "payload_fields": ["category", "issue_code"]}
+
+    first = guide.sync_documents(documents, **fields)
+    assert first == {**first, "updated": 5, "skipped": 0, "deleted": 0}
+
+    # Reorder, edit one document and drop another
+    edited = list(reversed(documents[1:]))
+    edited[0] = {**edited[0], "issue": "issue 4, reworded"}
+    calls_before = guide.model.calls
+    second = guide.sync_documents(edited, **fields)
+
+    assert second == {**second, "updated": 1, "skipped": 3, "deleted": 1}
+    assert guide.model.calls == calls_before + 1
+    assert guide.backend.count("guide_collection") == 4
+
+
+def test_duplicate_issue_codes_keep_ids_across_reordering() -> None:
+    registry = make_registry()
+    guide = registry.get_collection("guide_collection")
+    documents = [
+        {"issue_code": "PR-001", "issue": "paper jam", "category": "Printer"},
+        {"issue_code": "PR-001", "issue": "paper jam in tray 2", "category": "Printer"},
+        {"issue_code": "PR-002", "issue": "toner low", "category": "Printer"},
+        {"issue_code": "PR-002", "issue": "toner low", "category": "Printer"},
+    ]
+    fields = {"text_fields": ["issue"], "payload_fields": ["category", "issue_code"]}
+
+    first = guide.sync_documents(documents, **fields)
+    assert first == {**first, "updated": 3, "skipped": 0, "deleted": 0}
+
+    second = guide.sync_documents(list(reversed(documents)), **fields)
+    assert second == {**second, "updated": 0, "skipped": 3, "deleted": 0}
+    assert guide.backend.count("guide_collection") == 3
+
+
+@pytest.mark.asyncio
+async def test_search_many_encodes_once() -> None:
+    registry = VectorRegistry(
+        {
+            "embedding_model": {"default_model": "fake", "params": {"embedding_dim": 4}},
+            "vector_backend": "numpy",
+        },
+        model_loader=FakeEncoder,
+    )
+    for name in ("kb_collection", "guide_collection"):
+        registry.get_collection(name).upsert_documents(
+            [{"issue_code": f"{name}-{i}", "text": f"doc {i}", "category": "Printer"}
+             for i in range(5)],
+            text_fields=["text"],
+            payload_fields=["category"],
+        )
+    encoder = registry.get_model()
+    calls_before = encoder.calls
+
+    results = await registry.search_many("paper jam", [
+        VectorSearch("kb_collection", "Printer", limit=2),
+        VectorSearch("guide_collection", "Printer", limit=3),
+        VectorSearch("guide_collection", "Network", label="guide_network"),
+    ])
+
+    assert encoder.calls == calls_before + 1
+    assert len(results["kb_collection"]) == 2
+    assert len(results["guide_collection"]) == 3
+    assert results["guide_network"] == []
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+import zlib
+from typing import Any
+
+import numpy as np
+import pytest
+from huggingface_hub import ChatCompletionOutput
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.db import vector_registry
+from app.db.vector_registry import VectorRegistry
+from app.llm.providers import OpenAICompatibleProvider
+
+ENCODE_SECONDS = 0.3
+
+
+class SlowEncoder:
+    """Blocking, CPU-bound stand-in for SentenceTransformer.encode."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def encode(self, text: str, **kwargs: Any) -> np.ndarray:
+        time.sleep(ENCODE_SECONDS)
+        return np.random.default_rng(zlib.crc32(text.encode())).random(4)
+
+
+def completion(message: dict) -> ChatCompletionOutput:
+    return ChatCompletionOutput.parse_obj_as_instance({
+        "id": "stub",
+        "created": 0,
+        "model": "stub",
+        "system_fingerprint": "stub",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    })
+
+
+class StubLLM(OpenAICompatibleProvider):
+    """Calls the KB tool on the first turn, then answers from its output."""
+
+    def __init__(self) -> None:
+        super().__init__("http://stub/v1")
+
+    async def generate(self, model: str, prompt: str, params: dict, tools: Any) -> Any:
+        if "TOOL-CALL-OUTPUT" in prompt:
+            return completion({"role": "assistant", "content": "Try clearing the tray."})
+        query = prompt.rsplit("USER: ", 1)[-1].split("'")[0]
+        arguments = json.dumps({"query": query, "type_issue": "Hardware"})
+        return completion({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": "call-0",
+                "type": "function",
+                "function": {"name": "query_knowledge_base", "arguments": arguments},
+            }],
+        })
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_overlap_retrieval(async_client, monkeypatch) -> None:
+    search_client = AsyncQdrantClient(location=":memory:")
+    for collection in ("kb_collection", "guide_collection"):
+        await search_client.create_collection(
+            collection, vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+        )
+        await search_client.upsert(collection, points=[
+            PointStruct(
+                id=i,
+                vector=np.random.default_rng(i).random(4).tolist(),
+                payload={"category": "Hardware", "question": f"q{i}", "answer": f"a{i}"},
+            )
+            for i in range(10)
+        ])
+    registry = VectorRegistry(
+        {"embedding_model": {"default_model": "stub", "params": {"embedding_dim": 4}}},
+        model_loader=SlowEncoder,
+        client_factory=lambda: QdrantClient(location=":memory:"),
+        async_client_factory=lambda: search_client,
+    )
+    monkeypatch.setattr(vector_registry, "_registry", registry)
+    monkeypatch.setattr("app.services.chat_service.llm_client", StubLLM())
+    monkeypatch.setattr("app.services.prompt.fetch_tickets", lambda user_id: [])
+
+    from main import app
+    app.state.all_categories = ["Hardware", "Network", "Software"]
+
+    async def send_request(i: int):
+        payload = {
+            "user_id": "user-123",
+            "messages": [{"role": "user", "content": f"printer problem number {i}"}],
+        }
+        return await async_client.post("/chat", json=payload)
+
+    num_requests = 5
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[send_request(i) for i in range(num_requests)])
+    duration = time.perf_counter() - start
+
+    for res in responses:
+        assert res.status_code == 200
+        assert res.json()["messages"][-1]["content"] == "Try clearing the tray."
+
+    # Serialised retrieval would take num_requests * ENCODE_SECONDS
+    assert duration < num_requests * ENCODE_SECONDS / 2, (
+        f"Retrieval did not overlap: {duration:.3f} seconds"
+    )